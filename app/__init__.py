@@ -2,7 +2,7 @@
 from flask import Flask
 from dotenv import load_dotenv
 from .config import Config
-from .extensions import db, login_manager, csrf, migrate
+from .extensions import db, login_manager, csrf, account_cache, user_cache
 
 def create_app(config_object: type[Config] = Config) -> Flask:
     load_dotenv()
@@ -11,9 +11,34 @@ def create_app(config_object: type[Config] = Config) -> Flask:
 
     # init extensions
     db.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
+    account_cache.init_app(app)
+    user_cache.init_app(app)
+
+    from .replicas import replicas
+    replicas.init_app(app)
+
+    from .idempotency import idempotency
+    idempotency.init_app(app)
+
+    from .archive import ledger_archive
+    ledger_archive.init_app(app)
+
+    from .journal import journal
+    journal.init_app(app)
+
+    from .dbstats import db_stats
+    db_stats.init_app(app)
+
+    from .metrics import metrics
+    metrics.init_app(app)
+
+    from .commands import db_cli, idempotency_cli, ledger_cli, snapshots_cli
+    app.cli.add_command(db_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(snapshots_cli)
+    app.cli.add_command(ledger_cli)
 
     # blueprints
     from .auth import bp as auth_bp
@@ -0,0 +1,142 @@
+# analytics.py (spending summaries over the ledger)
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select
+
+from .extensions import db
+from .models import Account, Transaction
+from .queries import owned_account_ids
+from .snapshots import SIGNED_AMOUNT
+
+_PERIOD_FORMATS = {
+    # dialect -> granularity -> format for the period label
+    "sqlite": {"day": "%Y-%m-%d", "month": "%Y-%m"},
+    "postgresql": {"day": "YYYY-MM-DD", "month": "YYYY-MM"},
+    "mysql": {"day": "%Y-%m-%d", "month": "%Y-%m"},
+}
+
+
+def _period(granularity: str):
+    dialect = db.session.get_bind().dialect.name
+    fmt = _PERIOD_FORMATS.get(dialect, _PERIOD_FORMATS["postgresql"])[granularity]
+    if dialect == "sqlite":
+        return func.strftime(fmt, Transaction.created_at)
+    if dialect == "mysql":
+        return func.date_format(Transaction.created_at, fmt)
+    return func.to_char(Transaction.created_at, fmt)
+
+
+def _cents(expr):
+    """SUM(...) of a money column as integer cents, computed in SQL."""
+    return cast(func.round(func.sum(expr) * 100), BigInteger)
+
+
+def _fmt_cents(cents: int) -> str:
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(int(cents)), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+def summary(
+    user_id: int,
+    *,
+    granularity: str = "day",
+    window: int = 7,
+    account_id: int | None = None,
+    kind: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> dict:
+    """Per-account totals by kind and period, plus running balances.
+
+    Totals and counts are one ``GROUP BY (account, period, kind)`` in the
+    database. Running balances and the rolling average of net flow (over
+    the last ``window`` active periods) are computed on int64 cent arrays
+    built from that same result, never on per-row Decimals. Balances need
+    every kind, so they are left out when ``kind`` is given.
+    """
+    period = _period(granularity)
+    scope = [Transaction.account_id.in_(owned_account_ids(user_id))]
+    if account_id is not None:
+        scope.append(Transaction.account_id == account_id)
+    in_range = list(scope)
+    if since is not None:
+        in_range.append(Transaction.created_at >= since)
+    if until is not None:
+        in_range.append(Transaction.created_at < until)
+
+    # -- aggregates, pushed down -------------------------------------------
+    grouped = db.session.execute(
+        select(
+            Transaction.account_id,
+            period.label("period"),
+            Transaction.kind,
+            func.count(),
+            _cents(Transaction.amount),
+        )
+        .where(*in_range, *([Transaction.kind == kind] if kind else []))
+        .group_by(Transaction.account_id, period, Transaction.kind)
+        .order_by(Transaction.account_id, period, Transaction.kind)
+    ).all()
+
+    totals = [
+        {"account_id": a, "period": p, "kind": k, "count": n, "total": _fmt_cents(c)}
+        for a, p, k, n, c in grouped
+    ]
+    if not grouped or kind is not None:
+        return {"granularity": granularity, "window": window, "totals": totals, "balances": []}
+
+    # -- running balances, vectorized --------------------------------------
+    acct = np.fromiter((r[0] for r in grouped), dtype=np.int64, count=len(grouped))
+    labels = np.array([r[1] for r in grouped])
+    sign = np.fromiter((1 if r[2] == "deposit" else -1 for r in grouped), dtype=np.int64, count=len(grouped))
+    cents = np.fromiter((r[4] for r in grouped), dtype=np.int64, count=len(grouped))
+
+    # collapse kinds into one net figure per (account, period)
+    new_bucket = np.r_[True, (acct[1:] != acct[:-1]) | (labels[1:] != labels[:-1])]
+    starts = np.flatnonzero(new_bucket)
+    net = np.add.reduceat(sign * cents, starts)
+    b_acct = acct[starts]
+    b_label = labels[starts]
+
+    # balance just before the range: current balance minus every flow since
+    current = db.session.execute(
+        select(Account.id, cast(func.round(Account.balance * 100), BigInteger))
+        .where(Account.id.in_(np.unique(b_acct).tolist()))
+    ).all()
+    later = dict(
+        db.session.execute(
+            select(Transaction.account_id, _cents(SIGNED_AMOUNT))
+            .where(*scope, *([Transaction.created_at >= since] if since is not None else []))
+            .group_by(Transaction.account_id)
+        ).all()
+    )
+    base = {a: bal - (later.get(a) or 0) for a, bal in current}
+
+    n = len(net)
+    idx = np.arange(n)
+    seg_start = np.flatnonzero(np.r_[True, b_acct[1:] != b_acct[:-1]])
+    seg_of = np.repeat(seg_start, np.diff(np.r_[seg_start, n]))   # first index of each row's account
+
+    csum = np.cumsum(net)
+    before = np.r_[0, csum][seg_of]                                  # cumsum just before the account's first bucket
+    running = csum - before + np.array([base[a] for a in b_acct.tolist()], dtype=np.int64)
+
+    first = np.maximum(idx - window + 1, seg_of)
+    rolling_sum = csum - np.r_[0, csum][first]
+    rolling_avg = np.rint(rolling_sum / (idx - first + 1)).astype(np.int64)
+
+    balances = [
+        {
+            "account_id": a,
+            "period": p,
+            "net": _fmt_cents(nt),
+            "running_balance": _fmt_cents(rb),
+            "rolling_avg_net": _fmt_cents(ra),
+        }
+        for a, p, nt, rb, ra in zip(b_acct.tolist(), b_label.tolist(), net.tolist(), running.tolist(), rolling_avg.tolist())
+    ]
+    return {"granularity": granularity, "window": window, "totals": totals, "balances": balances}
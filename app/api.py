@@ -1,30 +1,39 @@
 # api.py (JSON API)
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request, abort
+import base64
+import binascii
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, abort, stream_with_context
 from flask_login import login_required, current_user
 from marshmallow import ValidationError
+from . import queries, snapshots
+from .extensions import csrf
+from .idempotency import idempotent
+from .lazy import lazy_import, load_deferred
+from .models import Account
+from .services import apply_batch, create_account, deposit, withdraw, transfer
 
-from .extensions import csrf  # removed: db (unused)
-from .models import Account, Transaction
-from .services import create_account, deposit, withdraw, transfer
-from .schemas import (
-    account_schema,
-    accounts_schema,
-    account_create_schema,
-    transaction_schema,
-    transactions_schema,
-    transaction_create_schema,
-)
+# marshmallow schemas and numpy (analytics) load on the first request that
+# needs them, not when the blueprint is registered
+schemas = lazy_import("app.schemas")
+analytics = lazy_import("app.analytics")
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 csrf.exempt(bp)  # JSON API: skip CSRF tokens on POST/PUT/PATCH/DELETE
+bp.before_request(load_deferred)   # finish the lazy imports before threads share them
+
+EXPORT_CHUNK_SIZE = 1000
 
 
 # ------------ Helpers ------------
 @bp.errorhandler(ValidationError)
 def _handle_validation(err: ValidationError):
-    return jsonify({"error": "validation error", "messages": err.messages})
+    return jsonify({"error": "validation error", "messages": err.messages}), 400
 
 
 def _ensure_owner(account: Account) -> None:
@@ -32,45 +41,159 @@ def _ensure_owner(account: Account) -> None:
         abort(403)
 
 
+def _encode_cursor(created_at: datetime, tx_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, tx_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(ts), int(tx_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"cursor": ["Invalid cursor."]})
+
+
+def _ledger_filters(args: dict) -> dict:
+    """Ledger filters from parsed query args; 404/403 on a foreign account_id."""
+    if args["account_id"] is not None:
+        owner_id = queries.account_owner_id(args["account_id"])
+        if owner_id is None:
+            abort(404)
+        if owner_id != current_user.id:
+            abort(403)
+    return {k: args[k] for k in ("account_id", "kind", "since", "until")}
+
+
+def _ndjson_chunks(chunks):
+    for part in chunks:
+        yield "".join(json.dumps(d) + "\n" for d in schemas.transactions_row_dumper.dump(part))
+
+
+def _csv_chunks(chunks):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=schemas.transactions_row_dumper.fields)
+    writer.writeheader()
+    for part in chunks:
+        writer.writerows(schemas.transactions_row_dumper.dump(part))
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
 # ------------ Accounts ------------
 @bp.get("/accounts")
 @login_required
 def list_accounts():
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
-    return jsonify(accounts_schema.dump(accounts))
+    return jsonify(schemas.accounts_row_dumper.dump(queries.accounts_for_user(current_user.id)))
 
 
 @bp.post("/accounts")
 @login_required
 def create_account_api():
-    payload = account_create_schema.load(request.get_json() or {})
+    payload = schemas.account_create_schema.load(request.get_json() or {})
     acct = create_account(
         current_user.id,
         payload["name"],
         payload["type"],
         payload.get("opening", 0),
     )
-    return jsonify(account_schema.dump(acct)), 201
+    return jsonify(schemas.account_schema.dump(acct)), 201
+
+
+@bp.get("/accounts/<int:account_id>/balance")
+@login_required
+def account_balance(account_id: int):
+    """Balance as of ``?as_of=`` (default now), from the daily snapshots."""
+    args = schemas.balance_query_schema.load(request.args)
+    account = Account.query.get_or_404(account_id)
+    _ensure_owner(account)
+
+    as_of = args["as_of"] or datetime.utcnow()
+    balance = snapshots.balance_as_of(account, as_of)
+    return jsonify(schemas.balance_schema.dump({"account_id": account.id, "as_of": as_of, "balance": balance}))
+
+
+@bp.get("/accounts/<int:account_id>/statement")
+@login_required
+def account_statement(account_id: int):
+    """Monthly statement (``?month=YYYY-MM``): opening/closing + daily closes."""
+    args = schemas.statement_query_schema.load(request.args)
+    account = Account.query.get_or_404(account_id)
+    _ensure_owner(account)
+
+    year, month = map(int, args["month"].split("-"))
+    return jsonify(schemas.statement_schema.dump(snapshots.statement(account, year, month)))
 
 
 # ------------ Transactions ------------
 @bp.get("/transactions")
 @login_required
 def list_transactions():
-    ids = [a.id for a in Account.query.filter_by(user_id=current_user.id).all()]
-    tx = (
-        Transaction.query.filter(Transaction.account_id.in_(ids))
-        .order_by(Transaction.created_at.desc())
-        .all()
+    """Newest-first ledger page, keyset-paginated on (created_at, id)."""
+    args = schemas.transaction_query_schema.load(request.args)
+
+    before = _decode_cursor(args["cursor"]) if args["cursor"] is not None else None
+    limit = args["limit"]
+    tx = queries.transactions_for_user(
+        current_user.id, limit=limit + 1, before=before, **_ledger_filters(args)
+    )
+
+    next_cursor = None
+    if len(tx) > limit:
+        tx = tx[:limit]
+        next_cursor = _encode_cursor(tx[-1].created_at, tx[-1].id)
+
+    return jsonify({"items": schemas.transactions_row_dumper.dump(tx), "next_cursor": next_cursor})
+
+
+@bp.get("/transactions/export")
+@login_required
+def export_transactions():
+    """Stream the (filtered) ledger as CSV or NDJSON without buffering it."""
+    args = schemas.transaction_export_schema.load(request.args)
+
+    chunks = queries.iter_transactions(
+        current_user.id, chunk_size=EXPORT_CHUNK_SIZE, **_ledger_filters(args)
+    )
+
+    if args["format"] == "ndjson":
+        body, mimetype = _ndjson_chunks(chunks), "application/x-ndjson"
+    else:
+        body, mimetype = _csv_chunks(chunks), "text/csv"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=transactions.{args['format']}"},
+    )
+
+
+# ------------ Analytics ------------
+@bp.get("/analytics/summary")
+@login_required
+def analytics_summary():
+    """Totals/counts per account, kind and day|month, plus running balances."""
+    args = schemas.analytics_query_schema.load(request.args)
+    return jsonify(
+        analytics.summary(
+            current_user.id,
+            granularity=args["granularity"],
+            window=args["window"],
+            **_ledger_filters(args),
+        )
     )
-    return jsonify(transactions_schema.dump(tx))
 
 
 @bp.post("/transactions/deposit")
 @login_required
+@idempotent
 def deposit_api():
     data = request.get_json() or {}
-    payload = transaction_create_schema.load(
+    payload = schemas.transaction_create_schema.load(
         {
             "account_id": data.get("account_id"),
             "amount": data.get("amount"),
@@ -83,14 +206,15 @@ def deposit_api():
     _ensure_owner(account)
 
     t = deposit(account, payload["amount"], description=payload.get("description", ""))
-    return jsonify(transaction_schema.dump(t)), 201
+    return jsonify(schemas.transaction_schema.dump(t)), 201
 
 
 @bp.post("/transactions/withdraw")
 @login_required
+@idempotent
 def withdraw_api():
     data = request.get_json() or {}
-    payload = transaction_create_schema.load(
+    payload = schemas.transaction_create_schema.load(
         {
             "account_id": data.get("account_id"),
             "amount": data.get("amount"),
@@ -103,14 +227,15 @@ def withdraw_api():
     _ensure_owner(account)
 
     t = withdraw(account, payload["amount"], description=payload.get("description", ""))
-    return jsonify(transaction_schema.dump(t)), 201
+    return jsonify(schemas.transaction_schema.dump(t)), 201
 
 
 @bp.post("/transactions/transfer")
 @login_required
+@idempotent
 def transfer_api():
     data = request.get_json() or {}
-    payload = transaction_create_schema.load(
+    payload = schemas.transaction_create_schema.load(
         {
             "account_id": data.get("src"),
             "related_account_id": data.get("dst"),
@@ -126,4 +251,32 @@ def transfer_api():
     _ensure_owner(dst)
 
     t = transfer(src, dst, payload["amount"], description=payload.get("description", ""))
-    return jsonify(transaction_schema.dump(t)), 201
+    return jsonify(schemas.transaction_schema.dump(t)), 201
+
+
+@bp.post("/transactions/batch")
+@login_required
+@idempotent
+def batch_api():
+    """Apply up to MAX_BATCH_SIZE ops with one lock pass and one commit.
+
+    Body: ``{"mode": "atomic"|"best_effort", "operations": [...]}`` where each
+    op is a TransactionCreateSchema payload (transfers use
+    ``account_id``/``related_account_id``).
+    """
+    payload = schemas.transaction_batch_schema.load(request.get_json() or {})
+    outcome = apply_batch(
+        current_user.id,
+        payload["operations"],
+        atomic=payload["mode"] == "atomic",
+    )
+
+    results = []
+    for index, (row, error) in enumerate(outcome):
+        if error is None:
+            results.append({"index": index, "status": "ok", "transaction": schemas.transactions_row_dumper.dump([row])[0]})
+        else:
+            results.append({"index": index, "status": "error", "error": error})
+
+    applied = any(row is not None for row, _ in outcome)
+    return jsonify({"mode": payload["mode"], "results": results}), 201 if applied else 400
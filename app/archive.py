@@ -0,0 +1,371 @@
+# archive.py (cold ledger rows in memory-mapped column files)
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator, NamedTuple
+
+from flask import Flask, current_app
+from sqlalchemy import delete, func, select
+
+from .extensions import db
+from .models import Account, Transaction
+from .money import Money
+from .partitions import fold_into_opening
+from .snapshots import record_closes
+
+# numpy is imported where it's used: workers only need it once there is
+# an archive to read.
+
+MANIFEST = "manifest.json"
+# one .npy per column; every array is sorted by (account_id, created_at
+# DESC, id DESC), so one account's rows are a newest-first slice
+COLUMNS = {
+    "id": "int32",
+    "account_id": "int32",
+    "kind": "uint8",                 # index into meta["kinds"]
+    "amount_cents": "int64",
+    "description": "int32",          # index into descriptions.json.gz, -1 = NULL
+    "related_account_id": "int32",   # -1 = NULL
+    "created_at": "datetime64[us]",
+}
+ROW_CHUNK = 1000
+
+
+class Segment(NamedTuple):
+    path: str                # relative to the archive dir
+    account_lo: int          # account ids lo <= id < hi
+    account_hi: int
+    rows: int
+    min_created: datetime
+    max_created: datetime
+    state: str               # "deleting" until the rows are gone from the table, then "archived"
+
+    def overlaps(self, account_ids, since, until, before) -> bool:
+        if since is not None and self.max_created < since:
+            return False
+        if until is not None and self.min_created >= until:
+            return False
+        if before is not None and self.min_created > before[0]:
+            return False
+        return any(self.account_lo <= a < self.account_hi for a in account_ids)
+
+
+class LedgerArchive:
+    """Ledger rows moved out of ``transaction`` by ``flask ledger archive``.
+
+    Each run writes one segment per account-id range under
+    ``LEDGER_ARCHIVE_DIR``: fixed-width numpy columns, opened with
+    ``mmap_mode="r"`` so workers share them through the page cache, plus a
+    gzip'd dictionary of the (highly repetitive) descriptions.
+    ``manifest.json`` lists the segments; it is replaced atomically and
+    re-read when its mtime changes.
+    """
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["ledger_archive"] = {"manifest": (None, []), "open": {}, "lock": threading.Lock()}
+
+    @property
+    def root(self) -> str:
+        """``LEDGER_ARCHIVE_DIR``; empty when archiving isn't set up."""
+        return current_app.config.get("LEDGER_ARCHIVE_DIR") or ""
+
+    @property
+    def _state(self) -> dict:
+        return current_app.extensions["ledger_archive"]
+
+    # -- manifest ----------------------------------------------------------
+    def segments(self) -> list[Segment]:
+        if not self.root:
+            return []
+        path = os.path.join(self.root, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        seen, segments = self._state["manifest"]
+        if seen != mtime:
+            with open(path) as f:
+                raw = json.load(f)
+            segments = [
+                s._replace(min_created=datetime.fromisoformat(s.min_created), max_created=datetime.fromisoformat(s.max_created))
+                for s in (Segment(**entry) for entry in raw["segments"])
+            ]
+            self._state["manifest"] = (mtime, segments)
+        return segments
+
+    def _write_manifest(self, segments: list[Segment]) -> None:
+        entries = [
+            s._replace(min_created=s.min_created.isoformat(), max_created=s.max_created.isoformat())._asdict()
+            for s in segments
+        ]
+        _write_durably(os.path.join(self.root, MANIFEST), json.dumps({"segments": entries}, indent=1).encode())
+
+    def relevant(self, account_ids, *, since=None, until=None, before=None, **_) -> list[Segment]:
+        """Segments that may hold rows for these accounts and time filters."""
+        return [s for s in self.segments() if s.overlaps(account_ids, since, until, before)]
+
+    # -- reading -----------------------------------------------------------
+    def _open(self, segment: Segment) -> dict:
+        cached = self._state["open"].get(segment.path)
+        if cached is None:
+            import numpy as np
+
+            base = os.path.join(self.root, segment.path)
+            cached = {name: np.load(os.path.join(base, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+            with open(os.path.join(base, "meta.json")) as f:
+                cached["kinds"] = json.load(f)["kinds"]
+            with gzip.open(os.path.join(base, "descriptions.json.gz"), "rt") as f:
+                cached["descriptions"] = json.load(f)
+            with self._state["lock"]:
+                cached = self._state["open"].setdefault(segment.path, cached)
+        return cached
+
+    def rows(
+        self,
+        account_ids,
+        *,
+        cents: bool,
+        account_id: int | None = None,
+        kind: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: tuple[datetime, int] | None = None,
+    ) -> list[Iterator[tuple]]:
+        """Archived rows of ``account_ids``, newest first per account and
+        segment: one iterator per (segment, account), for the caller to
+        merge. Rows are tuples in ``TransactionRow`` field order; amounts are
+        Money when ``cents`` is set, else Decimal.
+        """
+        import numpy as np
+
+        if account_id is not None:
+            account_ids = [a for a in account_ids if a == account_id]
+        streams = []
+        for segment in self.relevant(account_ids, since=since, until=until, before=before):
+            cols = self._open(segment)
+            kind_code = cols["kinds"].index(kind) if kind in cols["kinds"] else None
+            if kind is not None and kind_code is None:
+                continue
+            acct = cols["account_id"]
+            for a in sorted(account_ids):
+                lo, hi = np.searchsorted(acct, a, "left"), np.searchsorted(acct, a, "right")
+                if lo == hi:
+                    continue
+                created = cols["created_at"][lo:hi]
+                keep = np.ones(hi - lo, dtype=bool)
+                if since is not None:
+                    keep &= created >= np.datetime64(since, "us")
+                if until is not None:
+                    keep &= created < np.datetime64(until, "us")
+                if before is not None:
+                    ts = np.datetime64(before[0], "us")
+                    keep &= (created < ts) | ((created == ts) & (cols["id"][lo:hi] < before[1]))
+                if kind_code is not None:
+                    keep &= cols["kind"][lo:hi] == kind_code
+                idx = lo + np.flatnonzero(keep)
+                if len(idx):
+                    streams.append(_materialize(cols, idx, cents))
+        return streams
+
+
+def _materialize(cols: dict, idx, cents: bool) -> Iterator[tuple]:
+    kinds, descriptions = cols["kinds"], cols["descriptions"]
+    for start in range(0, len(idx), ROW_CHUNK):
+        i = idx[start:start + ROW_CHUNK]
+        amounts = cols["amount_cents"][i].tolist()
+        for tx_id, acct, k, c, d, rel, at in zip(
+            cols["id"][i].tolist(), cols["account_id"][i].tolist(), cols["kind"][i].tolist(), amounts,
+            cols["description"][i].tolist(), cols["related_account_id"][i].tolist(), cols["created_at"][i].tolist(),
+        ):
+            yield (
+                tx_id, acct, kinds[k],
+                Money(c) if cents else Decimal(c).scaleb(-2),
+                None if d < 0 else descriptions[d],
+                None if rel < 0 else rel,
+                at,
+            )
+
+
+ledger_archive = LedgerArchive()
+
+
+# --------------------
+# Writing (flask ledger archive)
+# --------------------
+def _write_durably(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _fsync_dir(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_range(lo: int, hi: int, before: datetime, chunk_size: int) -> dict | None:
+    """Stream one account range's rows older than ``before`` into columns."""
+    import numpy as np
+
+    stmt = (
+        select(
+            Transaction.id, Transaction.account_id, Transaction.kind, Transaction.amount_cents,
+            Transaction.description, Transaction.related_account_id, Transaction.created_at,
+        )
+        .where(Transaction.account_id >= lo, Transaction.account_id < hi, Transaction.created_at < before)
+        .order_by(Transaction.account_id, Transaction.created_at.desc(), Transaction.id.desc())
+        .execution_options(yield_per=chunk_size)
+    )
+    kinds: dict[str, int] = {}
+    descriptions: dict[str, int] = {}
+    parts: dict[str, list] = {name: [] for name in COLUMNS}
+    for chunk in db.session.execute(stmt).partitions():
+        tx_id, acct, kind, amount, desc, rel, created = zip(*chunk)
+        parts["id"].append(np.array(tx_id, dtype=COLUMNS["id"]))
+        parts["account_id"].append(np.array(acct, dtype=COLUMNS["account_id"]))
+        parts["kind"].append(np.array([kinds.setdefault(k, len(kinds)) for k in kind], dtype=COLUMNS["kind"]))
+        parts["amount_cents"].append(np.array(amount, dtype=COLUMNS["amount_cents"]))
+        parts["description"].append(np.array(
+            [-1 if d is None else descriptions.setdefault(d, len(descriptions)) for d in desc],
+            dtype=COLUMNS["description"],
+        ))
+        parts["related_account_id"].append(
+            np.array([-1 if r is None else r for r in rel], dtype=COLUMNS["related_account_id"])
+        )
+        parts["created_at"].append(np.array(created, dtype=COLUMNS["created_at"]))
+    db.session.commit()
+    if not parts["id"]:
+        return None
+    columns = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+    return {"columns": columns, "kinds": list(kinds), "descriptions": list(descriptions)}
+
+
+def _write_segment(root: str, rel: str, data: dict) -> None:
+    import numpy as np
+
+    final = os.path.join(root, rel)
+    tmp = f"{final}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in data["columns"].items():
+        with open(os.path.join(tmp, f"{name}.npy"), "wb") as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+    _write_durably(os.path.join(tmp, "meta.json"), json.dumps({"kinds": data["kinds"]}).encode())
+    _write_durably(
+        os.path.join(tmp, "descriptions.json.gz"),
+        gzip.compress(json.dumps(data["descriptions"]).encode()),
+    )
+    _fsync_dir(tmp)
+    os.rename(tmp, final)
+    _fsync_dir(os.path.dirname(final))
+
+
+def _delete_archived(root: str, segment: Segment, batch_size: int) -> int:
+    """Delete a segment's rows from ``transaction``, one batch per commit.
+
+    Each batch's total moves into the accounts' opening balances in the
+    same transaction (see partitions.fold_into_opening), so reconcile keeps
+    balancing. Rows already gone are skipped, so this can be re-run.
+    """
+    import numpy as np
+
+    ids = np.load(os.path.join(root, segment.path, "id.npy"), mmap_mode="r")
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size].tolist()
+        id_list = ",".join(map(str, batch))
+        fold_into_opening(f'(SELECT * FROM "transaction" WHERE id IN ({id_list}))')
+        deleted += db.session.execute(
+            delete(Transaction)
+            .where(Transaction.id.in_(batch), Transaction.created_at <= segment.max_created)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+    return deleted
+
+
+class ArchiveReport(NamedTuple):
+    segments: int
+    rows: int
+    deleted: int
+
+
+def archive_before(
+    before: datetime,
+    *,
+    accounts_per_segment: int = 10000,
+    chunk_size: int = 5000,
+    batch_size: int = 1000,
+) -> ArchiveReport:
+    """Move ledger rows older than ``before`` into archive segments.
+
+    For each range of ``accounts_per_segment`` account ids: stream the rows
+    (``chunk_size`` per fetch), write and fsync the segment, publish it in
+    the manifest, then delete the rows from the table ``batch_size`` at a
+    time. The range's daily closes are snapshotted first, so statements and
+    ``snapshots.rebuild`` keep the archived days' balances. Readers merge
+    archive and table on (created_at, id) and drop duplicates, so a row
+    briefly present in both shows up once. Segments left in "deleting" by
+    an interrupted run are finished first.
+
+    The rows leave the database for good, so ``LEDGER_ARCHIVE_DIR`` has to
+    be set explicitly, to durable storage every web instance mounts;
+    raises ``RuntimeError`` otherwise.
+    """
+    root = ledger_archive.root
+    if not root:
+        raise RuntimeError(
+            "LEDGER_ARCHIVE_DIR is not set: point it at durable storage shared by every web instance"
+        )
+    os.makedirs(root, exist_ok=True)
+    segments = list(ledger_archive.segments())
+    deleted = 0
+    for i, segment in enumerate(segments):
+        if segment.state == "deleting":
+            deleted += _delete_archived(root, segment, batch_size)
+            segments[i] = segment._replace(state="archived")
+            ledger_archive._write_manifest(segments)
+
+    first, last = db.session.execute(select(func.min(Account.id), func.max(Account.id))).one()
+    written = rows = 0
+    if first is None:
+        return ArchiveReport(0, 0, deleted)
+    start = first - first % accounts_per_segment
+    for lo in range(start, last + 1, accounts_per_segment):
+        hi = lo + accounts_per_segment
+        data = _read_range(lo, hi, before, chunk_size)
+        if data is None:
+            continue
+        # the archived days' closes can't be recomputed once the rows are gone
+        record_closes(before, lo=lo, hi=hi)
+        db.session.commit()
+        cols = data["columns"]
+        ids = cols["id"]
+        rel = f"accounts-{lo:010d}-{hi:010d}/before-{before:%Y%m%d}-{int(ids.min())}-{int(ids.max())}"
+        _write_segment(root, rel, data)
+        segment = Segment(
+            rel, lo, hi, len(ids),
+            cols["created_at"].min().item(), cols["created_at"].max().item(), "deleting",
+        )
+        segments.append(segment)
+        ledger_archive._write_manifest(segments)
+        deleted += _delete_archived(root, segment, batch_size)
+        segments[-1] = segment._replace(state="archived")
+        ledger_archive._write_manifest(segments)
+        written += 1
+        rows += len(ids)
+    return ArchiveReport(written, rows, deleted)
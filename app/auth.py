@@ -5,6 +5,7 @@ from urllib.parse import urlparse, urljoin
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy import func
 
 from .extensions import db
 from .models import User
@@ -28,7 +29,7 @@ def signup():
         if not email or not password:
             flash("Email and password are required.", "error")
             return redirect(url_for("auth.signup"))
-        if User.query.filter_by(email=email).first():
+        if User.query.filter(func.lower(User.email) == email).first():
             flash("Email already registered.", "error")
             return redirect(url_for("auth.signup"))
 
@@ -50,7 +51,7 @@ def login():
         password = request.form.get("password") or ""
         remember = bool(request.form.get("remember"))
 
-        u = User.query.filter_by(email=email).first()
+        u = User.query.filter(func.lower(User.email) == email).first()
         if not u or not u.check_password(password):
             flash("Invalid credentials.", "error")
             return redirect(url_for("auth.login"))
@@ -0,0 +1,219 @@
+# cache.py (per-user account snapshot cache)
+from __future__ import annotations
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_PENDING_KEY = "account_cache_pending"
+_USER_PENDING_KEY = "user_cache_pending"
+
+
+# --------------------
+# Backends
+# --------------------
+class LocalBackend:
+    """In-process LRU with a TTL. Thread-safe; one per app (per worker)."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[int, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: int, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: int) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Shared across workers/hosts. Needs the optional ``redis`` package,
+    or any client with get/set(ex=)/delete (tests pass a fake)."""
+
+    def __init__(self, url: str = "", ttl: float = 30.0, client: Any = None, prefix: str = "banklite:accounts:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:  # pragma: no cover - optional dependency
+                raise RuntimeError("ACCOUNT_CACHE_BACKEND='redis' requires the 'redis' package") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: int) -> Any | None:
+        raw = self.client.get(f"{self.prefix}{key}")
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key: int, value: Any) -> None:
+        self.client.set(f"{self.prefix}{key}", pickle.dumps(value), ex=max(1, int(self.ttl)))
+
+    def delete(self, *keys: int) -> None:
+        if keys:
+            self.client.delete(*(f"{self.prefix}{k}" for k in keys))
+
+
+class NullBackend:
+    """Caching disabled."""
+
+    def get(self, key: int) -> Any | None:
+        return None
+
+    def set(self, key: int, value: Any) -> None:
+        pass
+
+    def delete(self, *keys: int) -> None:
+        pass
+
+
+# --------------------
+# Extension
+# --------------------
+class AccountCache:
+    """Caches each user's account list (``queries.accounts_for_user``).
+
+    Writers call :meth:`invalidate_on_commit`; ORM flushes touching an
+    ``Account`` are picked up automatically too. Keys are only dropped once
+    the outermost transaction commits, and are discarded on rollback, so a
+    failed transfer never evicts (or leaves behind) anything. The TTL bounds
+    how long a reader racing a commit can serve a stale snapshot.
+    """
+
+    def init_app(self, app: Flask, backend: Any = None) -> None:
+        if backend is None:
+            kind = app.config.get("ACCOUNT_CACHE_BACKEND", "local")
+            ttl = app.config.get("ACCOUNT_CACHE_TTL", 30.0)
+            if kind == "local":
+                backend = LocalBackend(app.config.get("ACCOUNT_CACHE_SIZE", 4096), ttl)
+            elif kind == "redis":
+                backend = RedisBackend(app.config.get("ACCOUNT_CACHE_URL", ""), ttl)
+            elif kind == "null":
+                backend = NullBackend()
+            else:
+                raise ValueError(f"Unknown ACCOUNT_CACHE_BACKEND: {kind!r}")
+        app.extensions["account_cache"] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions["account_cache"]
+
+    def get_or_load(self, user_id: int, load: Callable[[], Any]) -> Any:
+        value = self.backend.get(user_id)
+        if value is None:
+            value = load()
+            if not _from_replica():
+                self.backend.set(user_id, value)
+        return value
+
+    def invalidate(self, *user_ids: int) -> None:
+        self.backend.delete(*user_ids)
+
+    def invalidate_on_commit(self, session: Session, *user_ids: int) -> None:
+        session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+class UserCache:
+    """Caches the :class:`~app.models.Principal` Flask-Login resolves each
+    request's session cookie to, so ``current_user`` costs no query.
+
+    ORM flushes that change or delete a ``User`` evict it on commit, like
+    :class:`AccountCache`. The cache is per process: another worker can
+    serve an old email (or a deleted user) for up to ``USER_CACHE_TTL``
+    seconds, and bulk ``update(User)`` statements are not seen at all.
+    """
+
+    def init_app(self, app: Flask, backend: Any = None) -> None:
+        if backend is None:
+            kind = app.config.get("USER_CACHE_BACKEND", "local")
+            if kind == "local":
+                backend = LocalBackend(app.config.get("USER_CACHE_SIZE", 10000), app.config.get("USER_CACHE_TTL", 60.0))
+            elif kind == "null":
+                backend = NullBackend()
+            else:
+                raise ValueError(f"Unknown USER_CACHE_BACKEND: {kind!r}")
+        app.extensions["user_cache"] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions["user_cache"]
+
+    def get_or_load(self, user_id: int, load: Callable[[], Any]) -> Any:
+        value = self.backend.get(user_id)
+        if value is None:
+            value = load()
+            if value is not None and not _from_replica():   # unknown ids aren't cached; a signup may reuse them
+                self.backend.set(user_id, value)
+        return value
+
+    def invalidate(self, *user_ids: int) -> None:
+        self.backend.delete(*user_ids)
+
+
+def _from_replica() -> bool:
+    # a lagging replica's rows would be served for a whole TTL, even to
+    # clients that are sticking to the primary; only cache primary reads
+    from .extensions import db
+    from .replicas import using_replica
+
+    return has_app_context() and using_replica(db.session)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_account_owners(session: Session, flush_context) -> None:
+    from .models import Account, User
+
+    owners = set()
+    users = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Account) and obj.user_id is not None:
+            owners.add(obj.user_id)
+        elif isinstance(obj, User) and obj.id is not None and obj not in session.new:
+            users.add(obj.id)
+    if owners:
+        session.info.setdefault(_PENDING_KEY, set()).update(owners)
+    if users:
+        session.info.setdefault(_USER_PENDING_KEY, set()).update(users)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # savepoint; wait for the outer commit
+    for key, extension in ((_PENDING_KEY, "account_cache"), (_USER_PENDING_KEY, "user_cache")):
+        pending = session.info.pop(key, None)
+        if pending and has_app_context() and extension in current_app.extensions:
+            current_app.extensions[extension].delete(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING_KEY, None)
+        session.info.pop(_USER_PENDING_KEY, None)
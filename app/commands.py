@@ -0,0 +1,139 @@
+# commands.py (flask CLI groups)
+from __future__ import annotations
+
+import click
+from flask.cli import AppGroup, ScriptInfo
+
+
+class _LazyMigrateGroup(click.Group):
+    """Flask-Migrate's ``flask db`` group, imported once a subcommand is
+    looked up rather than every time the app is created."""
+
+    def _real(self, ctx: click.Context) -> click.Group:
+        from .extensions import init_migrate
+
+        init_migrate(ctx.ensure_object(ScriptInfo).load_app())
+        from flask_migrate.cli import db
+
+        return db
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return self._real(ctx).list_commands(ctx)
+
+    def get_command(self, ctx: click.Context, name: str) -> click.Command | None:
+        return self._real(ctx).get_command(ctx, name)
+
+
+db_cli = _LazyMigrateGroup("db", help="Perform database migrations.")
+idempotency_cli = AppGroup("idempotency", help="Idempotency-Key maintenance.")
+snapshots_cli = AppGroup("snapshots", help="Daily balance snapshots.")
+ledger_cli = AppGroup("ledger", help="Ledger consistency checks.")
+
+
+@idempotency_cli.command("purge")
+def purge_idempotency_keys():
+    """Delete stored Idempotency-Keys older than IDEMPOTENCY_TTL."""
+    from .idempotency import idempotency
+
+    removed = idempotency.purge_expired()
+    click.echo(f"Purged {removed} expired idempotency keys")
+
+
+@snapshots_cli.command("rebuild")
+@click.option("--chunk-size", default=500, show_default=True, help="Accounts per pass.")
+def rebuild_snapshots(chunk_size: int):
+    """Recompute balance_snapshot from the ledger."""
+    from .snapshots import rebuild
+
+    written = rebuild(chunk_size=chunk_size)
+    click.echo(f"Wrote {written} balance snapshots")
+
+
+def _fmt(cents: int) -> str:
+    from .money import Money
+
+    return str(Money(cents))
+
+
+@ledger_cli.command("reconcile")
+@click.option("--chunk-size", default=1000, show_default=True, help="Accounts per id range.")
+@click.option("--workers", default=1, show_default=True, help="Processes scanning ranges in parallel.")
+@click.option("--full", is_flag=True, help="Ignore checkpoints and re-sum the whole ledger.")
+def reconcile_ledger(chunk_size: int, workers: int, full: bool):
+    """Check every balance against opening balance + ledger; exit 1 on drift."""
+    from .reconcile import reconcile
+
+    report = reconcile(chunk_size=chunk_size, workers=workers, full=full)
+    click.echo(
+        f"Checked {report.accounts} accounts, summed {report.rows} ledger rows "
+        f"up to transaction {report.last_tx_id}"
+    )
+    for c in report.drift:
+        line = (
+            f"account {c.account_id}: balance {_fmt(c.balance_cents)}, "
+            f"expected {_fmt(c.expected_cents)} (drift {_fmt(c.drift_cents)})"
+        )
+        if c.mirror_cents != c.balance_cents:
+            line += f", balance column {_fmt(c.mirror_cents)} != cents column"
+        click.echo(line)
+    if report.drift:
+        click.echo(f"{len(report.drift)} accounts drifted")
+        raise SystemExit(1)
+
+
+@ledger_cli.command("partitions")
+@click.option("--months-ahead", type=int, help="Default: LEDGER_PARTITIONS_AHEAD.")
+def ledger_partitions(months_ahead: int | None):
+    """Create the ledger's monthly partitions up to N months ahead (Postgres)."""
+    from flask import current_app
+
+    from .partitions import ensure_partitions, is_partitioned, list_partitions
+
+    if not is_partitioned():
+        click.echo("transaction is not partitioned (Postgres only, see migration 7c41d2e9f0a8)")
+        return
+    if months_ahead is None:
+        months_ahead = current_app.config["LEDGER_PARTITIONS_AHEAD"]
+    for name in ensure_partitions(months_ahead):
+        click.echo(f"Created {name}")
+    parts = list_partitions()
+    click.echo(f"{len(parts)} monthly partitions, {parts[0].start:%Y-%m} to {parts[-1].start:%Y-%m}")
+
+
+@ledger_cli.command("detach")
+@click.option("--before", required=True, type=click.DateTime(["%Y-%m", "%Y-%m-%d"]),
+              help="Detach months that end on or before this date.")
+@click.option("--schema", default="ledger_archive", show_default=True, help="Where detached months go.")
+def ledger_detach(before, schema: str):
+    """Detach old ledger months into an archive schema (Postgres)."""
+    from .partitions import detach_before
+
+    for part in detach_before(before.date(), schema=schema):
+        click.echo(f"Detached {part.name} -> {schema}.{part.name}")
+
+
+@ledger_cli.command("archive")
+@click.option("--before", required=True, type=click.DateTime(["%Y-%m-%d", "%Y-%m"]),
+              help="Archive ledger rows created before this date.")
+@click.option("--accounts-per-file", default=10000, show_default=True, help="Account ids per segment.")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows fetched per round trip.")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows deleted per transaction.")
+def ledger_archive(before, accounts_per_file: int, chunk_size: int, batch_size: int):
+    """Move old ledger rows into memory-mapped column files (LEDGER_ARCHIVE_DIR).
+
+    The rows are deleted from the database, so LEDGER_ARCHIVE_DIR must be
+    set and must be durable storage shared by every web instance (not a
+    disk wiped on deploy); the command refuses to run otherwise.
+    """
+    from .archive import archive_before, ledger_archive
+
+    try:
+        report = archive_before(
+            before, accounts_per_segment=accounts_per_file, chunk_size=chunk_size, batch_size=batch_size
+        )
+    except RuntimeError as e:
+        raise click.UsageError(str(e)) from e
+    click.echo(
+        f"Archived {report.rows} ledger rows into {report.segments} segments under {ledger_archive.root}, "
+        f"deleted {report.deleted} from the table"
+    )
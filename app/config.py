@@ -1,20 +1,128 @@
 # config.py
 import os
 
-class Config:
-    SECRET_KEY = os.getenv("SECRET_KEY", "dev")
 
-    uri = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///banklite.db")
+def _optional_int(name: str, default: str):
+    value = os.getenv(name, default).strip().lower()
+    return None if value in {"", "none"} else int(value)
+
+
+def engine_options(uri: str) -> dict:
+    """SQLAlchemy engine options for ``uri`` from DB_* environment variables.
+
+    Pool sizing only applies to server databases; SQLite keeps
+    Flask-SQLAlchemy's own pool choice. DB_POOL_PRE_PING=0 drops the
+    per-checkout round trip, in which case DB_POOL_RECYCLE should stay
+    below the server's/proxy's idle timeout.
+    """
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1"}
+    if uri.startswith("sqlite"):
+        return options
+
+    from .dbstats import TimedQueuePool
+
+    options.update(
+        poolclass = TimedQueuePool,
+        # one connection per gunicorn thread, so threads don't queue for the pool
+        # (same GUNICORN_THREADS default as gunicorn.conf.py)
+        pool_size = int(os.getenv("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "8"))),
+        max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    )
+    if uri.startswith("postgresql+psycopg"):
+        connect_args = {}
+        timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+        if timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+        # psycopg 3 prepares a statement server-side after N executions;
+        # "none" disables it (needed behind PgBouncer in transaction mode)
+        connect_args["prepare_threshold"] = _optional_int("DB_PREPARE_THRESHOLD", "5")
+        options["connect_args"] = connect_args
+    return options
 
+
+def _normalize_uri(uri: str) -> str:
     # Normalize to SQLAlchemy 2 + psycopg3
     if uri.startswith("postgres://"):
-        uri = uri.replace("postgres://", "postgresql+psycopg://", 1)
-    elif uri.startswith("postgresql://"):
-        uri = uri.replace("postgresql://", "postgresql+psycopg://", 1)
+        return uri.replace("postgres://", "postgresql+psycopg://", 1)
+    if uri.startswith("postgresql://"):
+        return uri.replace("postgresql://", "postgresql+psycopg://", 1)
+    return uri
+
+
+def replica_binds(uris: str) -> dict:
+    """SQLALCHEMY_BINDS entries (replica_0, replica_1, ...) for a comma-separated URI list."""
+    binds = {}
+    for i, uri in enumerate(u.strip() for u in uris.split(",") if u.strip()):
+        uri = _normalize_uri(uri)
+        binds[f"replica_{i}"] = {"url": uri, **engine_options(uri)}
+    return binds
+
+
+class Config:
+    SECRET_KEY = os.getenv("SECRET_KEY", "dev")
+
+    uri = _normalize_uri(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///banklite.db"))
 
     SQLALCHEMY_DATABASE_URI = uri
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(uri)
+
+    # Read replicas (comma-separated URIs): GET/HEAD requests read from one of
+    # them; a client that writes reads from the primary for
+    # REPLICA_STICKY_SECONDS afterwards (see replicas.py).
+    SQLALCHEMY_BINDS = replica_binds(os.getenv("DB_REPLICA_URIS", ""))
+    SQLALCHEMY_REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+    # Per-user account list cache: local | redis | null
+    ACCOUNT_CACHE_BACKEND = os.getenv("ACCOUNT_CACHE_BACKEND", "local")
+    ACCOUNT_CACHE_URL = os.getenv("ACCOUNT_CACHE_URL", "")
+    ACCOUNT_CACHE_SIZE = int(os.getenv("ACCOUNT_CACHE_SIZE", "4096"))
+    ACCOUNT_CACHE_TTL = float(os.getenv("ACCOUNT_CACHE_TTL", "30"))
+
+    # current_user principal cache (per process): local | null
+    USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "local")
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+    # Postgres ledger partitions (see partitions.py): months created ahead of
+    # time, and HASH(account_id) sub-partitions per month (0 = none)
+    LEDGER_PARTITIONS_AHEAD = int(os.getenv("LEDGER_PARTITIONS_AHEAD", "3"))
+    LEDGER_HASH_PARTITIONS = int(os.getenv("LEDGER_HASH_PARTITIONS", "0"))
+
+    # `flask ledger archive` output, read back by the ledger endpoints.
+    # Must be durable and shared by every web instance; archiving refuses
+    # to run while it's unset
+    LEDGER_ARCHIVE_DIR = os.getenv("LEDGER_ARCHIVE_DIR", "")
+
+    # Group commit (journal.py): deposits/withdrawals/transfers from
+    # concurrent requests share one commit, up to GROUP_COMMIT_MAX_OPS per
+    # batch, waiting at most GROUP_COMMIT_WAIT_MS for company
+    LEDGER_GROUP_COMMIT = os.getenv("LEDGER_GROUP_COMMIT", "0") == "1"
+    GROUP_COMMIT_MAX_OPS = int(os.getenv("GROUP_COMMIT_MAX_OPS", "64"))
+    GROUP_COMMIT_WAIT_MS = float(os.getenv("GROUP_COMMIT_WAIT_MS", "2"))
+    # seconds a request waits for its batch before answering 503
+    GROUP_COMMIT_TIMEOUT = float(os.getenv("GROUP_COMMIT_TIMEOUT", "30"))
+
+    # Idempotency-Key retention (seconds) and in-process hot cache size
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+    # Hot-path money source: "decimal" (Numeric columns) or "cents" (BigInteger
+    # *_cents columns). Both are always written; this picks which one is read.
+    MONEY_STORAGE = os.getenv("MONEY_STORAGE", "decimal")
+
+    # /_stats (pool + per-request query stats): loopback only unless a token is set
+    STATS_TOKEN = os.getenv("STATS_TOKEN", "")
+
+    # Per-request SQL budget / N+1 detector (on in debug and testing by default).
+    # SQL_BUDGET_ACTION: "log" or "raise"; unset = raise when testing, else log.
+    SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "50"))
+    SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+    if os.getenv("SQL_BUDGET_ACTION"):
+        SQL_BUDGET_ACTION = os.getenv("SQL_BUDGET_ACTION")
 
 class Testing(Config):
     TESTING = True
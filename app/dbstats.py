@@ -0,0 +1,210 @@
+# dbstats.py (connection pool and per-request query instrumentation)
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+
+class DBStats:
+    """Process-wide pool and query counters. Thread-safe.
+
+    Checkout wait is only measured for :class:`TimedQueuePool` (the
+    default pool for server databases, see ``config.engine_options``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app: Flask) -> None:
+        app.before_request(_start_request)
+        app.after_request(_check_budget)
+        app.teardown_request(_record_request)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkout_wait_seconds = 0.0
+            self.max_checkout_wait_seconds = 0.0
+            self.requests = 0
+            self.queries = 0
+            self.query_seconds = 0.0
+            self.max_request_queries = 0
+            self.max_request_query_seconds = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkout_wait_seconds += seconds
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, seconds)
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def record_request(self, queries: int, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.queries += queries
+            self.query_seconds += seconds
+            self.max_request_queries = max(self.max_request_queries, queries)
+            self.max_request_query_seconds = max(self.max_request_query_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pool": {
+                    "checkouts": self.checkouts,
+                    "checked_out": self.checked_out,
+                    "max_checked_out": self.max_checked_out,
+                    "checkout_wait_seconds": self.checkout_wait_seconds,
+                    "max_checkout_wait_seconds": self.max_checkout_wait_seconds,
+                },
+                "requests": {
+                    "count": self.requests,
+                    "queries": self.queries,
+                    "query_seconds": self.query_seconds,
+                    "max_queries": self.max_request_queries,
+                    "max_query_seconds": self.max_request_query_seconds,
+                },
+            }
+
+
+db_stats = DBStats()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more SQL than SQL_QUERY_BUDGET allows, or repeated a statement."""
+
+
+class QueryLog:
+    """Statements executed on ``engine`` while the ``with`` block runs.
+
+    Statements are compared by their SQL text (parameters aside), so the
+    same SELECT issued once per row shows up in :meth:`repeated`.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: list[str] = []
+        self._context = None
+
+    def __enter__(self) -> QueryLog:
+        event.listen(self.engine, "after_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "after_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if executemany and context is self._context:
+            return   # later batch of the same executemany
+        self._context = context
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {sql: n for sql, n in Counter(self.statements).items() if n >= threshold}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_stats.record_wait(time.perf_counter() - started)
+
+
+def pool_status(engine: Engine) -> dict:
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    return status
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    db_stats.record_checkout()
+
+
+@event.listens_for(Pool, "checkin")
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    db_stats.record_checkin()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info.pop("query_started")
+    if has_request_context():
+        g.db_queries = g.get("db_queries", 0) + 1
+        g.db_query_seconds = g.get("db_query_seconds", 0.0) + elapsed
+        statements = g.get("db_statements")
+        if statements is not None and not (executemany and g.get("db_last_context") is context):
+            # an executemany counts once, however many batches the driver needs
+            statements[statement] += 1
+            g.db_last_context = context
+
+
+def _start_request() -> None:
+    # g can outlive one request when an app context is already pushed
+    g.db_queries = 0
+    g.db_query_seconds = 0.0
+    app = current_app
+    if app.config.get("SQL_BUDGET_ENABLED", app.debug or app.testing):
+        g.db_statements = Counter()
+
+
+def _check_budget(response: Response) -> Response:
+    """Log or raise (SQL_BUDGET_ACTION) when a request blows its SQL budget.
+
+    Only active in debug/test mode unless SQL_BUDGET_ENABLED says otherwise.
+    """
+    statements = g.pop("db_statements", None)
+    g.pop("db_last_context", None)
+    if statements is None:
+        return response
+    config = current_app.config
+    budget = config.get("SQL_QUERY_BUDGET", 50)
+    threshold = config.get("SQL_REPEAT_THRESHOLD", 10)
+    problems = []
+    total = sum(statements.values())
+    if budget and total > budget:
+        problems.append(f"{total} queries (budget {budget})")
+    for sql, n in statements.items():
+        if threshold and n >= threshold:
+            problems.append(f"{n}x repeated (possible N+1): {' '.join(sql.split())[:200]}")
+    if problems:
+        message = f"{request.method} {request.path}: " + "; ".join(problems)
+        if config.get("SQL_BUDGET_ACTION", "raise" if current_app.testing else "log") == "raise":
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+def _record_request(exc) -> None:
+    db_stats.record_request(g.get("db_queries", 0), g.get("db_query_seconds", 0.0))
@@ -2,15 +2,30 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
-from flask_migrate import Migrate
+
+from .cache import AccountCache, UserCache
+from .replicas import RoutingSession
 
 # --- Flask Extensions ---
-db = SQLAlchemy()                   # ORM
+db = SQLAlchemy(session_options = {"class_": RoutingSession})   # ORM; GETs may read replicas (replicas.py)
 login_manager = LoginManager()      # User session management
 csrf = CSRFProtect()                # CSRF protection for forms/APIs
-migrate = Migrate()                 # Database migrations (Flask-Migrate + Alembic)
+account_cache = AccountCache()      # Per-user account list cache (see cache.py)
+user_cache = UserCache()            # current_user principals (see cache.py)
 
 # Configure login_manager
 # This tells Flask_Login which endpoint handles login
 # Example: @auth_bp.route("/login")
-login_manager.login_view = "auth.login"
\ No newline at end of file
+login_manager.login_view = "auth.login"
+
+
+def init_migrate(app):
+    """Database migrations (Flask-Migrate + Alembic), set up on first use.
+
+    Importing Flask-Migrate pulls in all of Alembic, which no request needs;
+    ``flask db`` (see commands.py) and ``wsgi.upgrade_database`` call this.
+    """
+    if "migrate" not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    return app.extensions["migrate"]
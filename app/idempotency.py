@@ -0,0 +1,141 @@
+# idempotency.py (Idempotency-Key replay for money-moving API calls)
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Flask, Response, abort, current_app, jsonify, make_response, request
+from flask_login import current_user
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import HTTPException
+
+from .cache import LocalBackend
+from .extensions import db
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class Idempotency:
+    """Keeps completed responses per (user, key).
+
+    The ``idempotency_key`` table is the source of truth; a small in-process
+    LRU answers hot replays without a query. Keys older than
+    ``IDEMPOTENCY_TTL`` seconds are ignored and removed in bulk by
+    :meth:`purge_expired` (``flask idempotency purge``).
+    """
+
+    def init_app(self, app: Flask) -> None:
+        ttl = app.config.get("IDEMPOTENCY_TTL", 86400)
+        app.extensions["idempotency_cache"] = LocalBackend(app.config.get("IDEMPOTENCY_CACHE_SIZE", 10000), ttl)
+
+    @property
+    def ttl(self) -> timedelta:
+        return timedelta(seconds=current_app.config.get("IDEMPOTENCY_TTL", 86400))
+
+    @property
+    def hot(self) -> LocalBackend:
+        return current_app.extensions["idempotency_cache"]
+
+    def purge_expired(self, now: datetime | None = None) -> int:
+        cutoff = (now or datetime.utcnow()) - self.ttl
+        result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+        db.session.commit()
+        return result.rowcount
+
+
+idempotency = Idempotency()
+
+
+def _fingerprint() -> str:
+    h = hashlib.sha256()
+    h.update(f"{request.method} {request.path}\n".encode())
+    h.update(request.get_data())
+    return h.hexdigest()
+
+
+def _replay(request_hash: str, stored_hash: str, status: int, content_type: str, body: str) -> Response:
+    if stored_hash != request_hash:
+        abort(422, description="Idempotency-Key reused with a different request")
+    resp = make_response(body, status)
+    resp.content_type = content_type
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def idempotent(view):
+    """Replay the stored response when a request repeats its Idempotency-Key.
+
+    The first request claims the key (a row with no status yet) before the
+    view runs, so a concurrent duplicate gets 409 instead of a second
+    posting. Responses below 500 are stored; 5xx releases the key so the
+    client can retry.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            abort(400, description=f"{HEADER} too long")
+
+        user_id = current_user.id
+        request_hash = _fingerprint()
+
+        hit = idempotency.hot.get((user_id, key))
+        if hit is not None:
+            return _replay(request_hash, *hit)
+
+        row = db.session.get(IdempotencyKey, (user_id, key))
+        if row is not None and row.created_at < datetime.utcnow() - idempotency.ttl:
+            db.session.delete(row)
+            db.session.commit()
+            row = None
+        if row is not None:
+            if row.status_code is None:
+                return jsonify({"error": "request with this Idempotency-Key is in progress"}), 409
+            stored = (row.request_hash, row.status_code, row.content_type, row.response_body)
+            idempotency.hot.set((user_id, key), stored)
+            return _replay(request_hash, *stored)
+
+        try:
+            db.session.add(IdempotencyKey(user_id=user_id, key=key, request_hash=request_hash))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "request with this Idempotency-Key is in progress"}), 409
+
+        try:
+            resp = make_response(view(*args, **kwargs))
+        except HTTPException as e:
+            resp = e.get_response()
+        except Exception:
+            db.session.rollback()
+            _release(user_id, key)
+            raise
+
+        db.session.rollback()   # drop anything the view left uncommitted
+        if resp.status_code >= 500:
+            _release(user_id, key)
+            return resp
+
+        body = resp.get_data(as_text=True)
+        row = db.session.get(IdempotencyKey, (user_id, key))
+        row.status_code = resp.status_code
+        row.content_type = resp.content_type
+        row.response_body = body
+        db.session.commit()
+        idempotency.hot.set((user_id, key), (request_hash, resp.status_code, resp.content_type, body))
+        return resp
+
+    return wrapper
+
+
+def _release(user_id: int, key: str) -> None:
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )
+    db.session.commit()
@@ -0,0 +1,191 @@
+# journal.py (group commit for money movements)
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, NamedTuple
+
+from flask import Flask, abort, current_app
+from werkzeug.exceptions import HTTPException
+
+from .extensions import db
+from .metrics import GROUP_COMMIT_BATCH
+
+
+class _Op(NamedTuple):
+    fn: Callable[..., Any]
+    args: tuple
+    future: Future
+
+
+class GroupCommit:
+    """Commits concurrent money movements together (LEDGER_GROUP_COMMIT=1).
+
+    Each process gets one committer thread per app. :meth:`submit` queues
+    an operation and blocks; the committer runs queued operations back to
+    back in its own session and commits them in one transaction: whatever
+    is queued, up to ``GROUP_COMMIT_MAX_OPS``, and while the previous batch
+    had more than one, whatever arrives within ``GROUP_COMMIT_WAIT_MS`` of
+    the first. N requests pay for one commit (one fsync) instead of N.
+    Every caller then gets its own result, or its own exception.
+
+    Operations must not commit, and one that raises an ``HTTPException``
+    (``abort``) must not have written anything; the services are written
+    that way. Any other error raised by an operation (or its flush) rolls
+    the batch back and reruns its operations one per transaction, so one
+    bad operation can't fail the others. A failed commit isn't rerun: it
+    may have committed anyway, so every operation in the batch fails.
+    """
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["group_commit"] = {"queue": None, "pid": None, "thread": None, "lock": threading.Lock()}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(current_app.config.get("LEDGER_GROUP_COMMIT"))
+
+    def submit(self, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(*args)`` in the next batch; return its result once the
+        batch has committed (or raise what it raised).
+
+        ``args`` are used from the committer thread: pass ids, values, or ORM
+        instances whose attributes ``fn`` reads are already loaded.
+        Results should not need their session: ORM objects come back
+        detached with their attributes loaded.
+
+        Waits at most ``GROUP_COMMIT_TIMEOUT`` seconds for a batch to pick
+        the operation up, then aborts with 503 without running it; once
+        its batch has started, the same again for the batch to finish.
+        """
+        timeout = current_app.config.get("GROUP_COMMIT_TIMEOUT", 30.0)
+        future: Future = Future()
+        self._queue().put(_Op(fn, args, future))
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():   # still queued: it will never run
+                abort(503, description="Ledger busy, please retry")
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            abort(503, description="Ledger busy, please retry")
+
+    def _queue(self) -> queue.Queue:
+        state = current_app.extensions["group_commit"]
+        # the thread doesn't survive fork(); start one per worker process,
+        # and another if it ever dies
+        thread = state["thread"]
+        if state["pid"] != os.getpid() or thread is None or not thread.is_alive():
+            with state["lock"]:
+                if state["pid"] != os.getpid():
+                    state["queue"], state["thread"] = queue.Queue(), None
+                if state["thread"] is None or not state["thread"].is_alive():
+                    state["thread"] = threading.Thread(
+                        target=_committer,
+                        args=(current_app._get_current_object(), state["queue"]),
+                        name="group-commit",
+                        daemon=True,
+                    )
+                    state["thread"].start()
+                    state["pid"] = os.getpid()
+        return state["queue"]
+
+
+journal = GroupCommit()
+
+
+def _collect(ops: queue.Queue, max_ops: int, wait: float) -> list[_Op]:
+    """Next batch; skips operations whose caller gave up (cancelled)."""
+    batch: list[_Op] = []
+    while not batch:
+        op = ops.get()
+        if op.future.set_running_or_notify_cancel():
+            batch.append(op)
+    deadline = time.monotonic() + wait
+    while len(batch) < max_ops:
+        remaining = deadline - time.monotonic()
+        try:
+            op = ops.get(timeout=remaining) if remaining > 0 else ops.get_nowait()
+        except queue.Empty:
+            break
+        if op.future.set_running_or_notify_cancel():
+            batch.append(op)
+    return batch
+
+
+def _committer(app: Flask, ops: queue.Queue) -> None:
+    max_ops = app.config.get("GROUP_COMMIT_MAX_OPS", 64)
+    wait = app.config.get("GROUP_COMMIT_WAIT_MS", 2.0) / 1000
+    with app.app_context():
+        size = 1
+        while True:
+            try:
+                session = db.session()
+                session.expire_on_commit = False   # callers read the results after commit
+                # only wait for company when the last batch had some: a lone
+                # caller on an idle worker shouldn't pay GROUP_COMMIT_WAIT_MS
+                size = _commit_next(session, ops, max_ops, wait if size > 1 else 0)
+            except Exception:   # keep the thread alive; the batch's callers got the error
+                app.logger.exception("group commit: batch failed")
+                db.session.remove()   # start over with a fresh session and connection
+                size = 1
+
+
+def _commit_next(session, ops: queue.Queue, max_ops: int, wait: float) -> int:
+    """Collect, run and commit one batch; its callers hear back whatever happens."""
+    batch = _collect(ops, max_ops, wait)
+    try:
+        outcomes = _run_batch(batch)
+        session.expunge_all()
+    except Exception as e:
+        _settle(batch, [(None, e)] * len(batch))
+        raise
+    _settle(batch, outcomes)
+    GROUP_COMMIT_BATCH.observe(len(batch))
+    return len(batch)
+
+
+def _settle(batch: list[_Op], outcomes: list[tuple[Any, Exception | None]]) -> None:
+    for op, (result, error) in zip(batch, outcomes):
+        if error is None:
+            op.future.set_result(result)
+        else:
+            op.future.set_exception(error)
+
+
+def _run_batch(batch: list[_Op]) -> list[tuple[Any, Exception | None]]:
+    outcomes = []
+    try:
+        for op in batch:
+            try:
+                outcomes.append((op.fn(*op.args), None))
+            except HTTPException as e:
+                outcomes.append((None, e))
+        db.session.flush()
+    except Exception as e:
+        db.session.rollback()
+        if len(batch) == 1:
+            return [(None, e)]
+        return [_run_alone(op) for op in batch]
+    try:
+        db.session.commit()
+    except Exception as e:
+        # A failed COMMIT may still have committed on the server (dropped
+        # connection, timeout), so nothing is rerun: every caller gets the
+        # error, as a per-request commit would.
+        db.session.rollback()
+        return [(None, e)] * len(batch)
+    return outcomes
+
+
+def _run_alone(op: _Op) -> tuple[Any, Exception | None]:
+    try:
+        result = op.fn(*op.args)
+        db.session.commit()
+        return result, None
+    except Exception as e:
+        db.session.rollback()
+        return None, e
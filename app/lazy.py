@@ -0,0 +1,53 @@
+# lazy.py (deferred imports for faster worker startup)
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+# every module handed out by lazy_import, so a preloading master can load
+# them all before forking (see gunicorn.conf.py)
+_deferred: list[ModuleType] = []
+# the ones not executed yet; LazyLoader isn't thread-safe before Python
+# 3.12.3, so they're finished under a lock before threads race on them
+_pending: list[ModuleType] = []
+_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return module ``name``, executing it on first attribute access.
+
+    Uses :class:`importlib.util.LazyLoader`: finding the module is eager
+    (so a typo still fails at import time), running its body is not.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    _deferred.append(module)
+    _pending.append(module)
+    return module
+
+
+def load_deferred() -> None:
+    """Finish every lazy import now.
+
+    Called before fork by a preloading gunicorn master (for copy-on-write
+    sharing) and before each request of the blueprints that use lazy
+    modules, so any threaded server (``flask run``, gthread without
+    preload) loads them once, under the lock. Cheap once everything is loaded.
+    """
+    if not _pending:
+        return
+    with _lock:
+        while _pending:
+            getattr(_pending[0], "__name__")
+            _pending.pop(0)
@@ -0,0 +1,105 @@
+# metrics.py (Prometheus metrics for /metrics, aggregated across gunicorn workers)
+from __future__ import annotations
+
+import os
+import time
+from functools import wraps
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does it) every worker
+# writes its samples to mmap'd files in that directory and /metrics merges
+# them, so any worker can answer a scrape. Without it, metrics are
+# per-process as usual.
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUEST_LATENCY = Histogram(
+    "banklite_request_duration_seconds",
+    "Request latency by endpoint.",
+    ["endpoint", "method"],
+)
+REQUESTS = Counter(
+    "banklite_requests_total",
+    "Responses by endpoint and status.",
+    ["endpoint", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "banklite_request_queries",
+    "SQL statements executed per request.",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, float("inf")),
+)
+ERRORS = Counter(
+    "banklite_http_errors_total",
+    "4xx/5xx responses (abort() and unhandled errors) by status.",
+    ["endpoint", "status"],
+)
+GROUP_COMMIT_BATCH = Histogram(
+    "banklite_group_commit_batch_size",
+    "Money movements per group commit (LEDGER_GROUP_COMMIT).",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, float("inf")),
+)
+SERVICE_LATENCY = Histogram(
+    "banklite_service_duration_seconds",
+    "Time spent in service functions.",
+    ["function"],
+)
+
+
+class Metrics:
+    def init_app(self, app: Flask) -> None:
+        app.before_request(_start_timer)
+        app.after_request(_observe)
+
+    def render(self) -> Response:
+        if os.environ.get(MULTIPROC_ENV):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
+
+
+def timed(fn):
+    """Record ``fn``'s wall time in ``banklite_service_duration_seconds``."""
+    histogram = SERVICE_LATENCY.labels(fn.__name__)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def _start_timer() -> None:
+    g.metrics_started = time.perf_counter()
+
+
+def _observe(response: Response) -> Response:
+    started = g.pop("metrics_started", None)
+    endpoint = request.endpoint or "unmatched"
+    if endpoint == "main.metrics_view":
+        return response
+    if started is not None:
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    REQUEST_QUERIES.labels(endpoint).observe(g.get("db_queries", 0))
+    if response.status_code >= 400:
+        ERRORS.labels(endpoint, str(response.status_code)).inc()
+    return response
@@ -5,7 +5,8 @@ from decimal import Decimal
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
-from .extensions import db, login_manager
+from .extensions import db, login_manager, user_cache
+from .money import Money
 
 # --------------------
 # User model
@@ -18,15 +19,38 @@ class User(UserMixin, db.Model):
 
     accounts = db.relationship("Account", backref = "owner", lazy = True)
 
+    __table_args__ = (
+        # login looks users up case-insensitively
+        db.Index("ix_user_email_lower", db.func.lower(email)),
+    )
+
     def set_password(self, password: str):
         self.password_hash = generate_password_hash(password)
 
     def check_password(self, password: str):
         return check_password_hash(self.password_hash, password)
 
+class Principal(UserMixin):
+    """What ``current_user`` resolves to on every request: just id and email,
+    cached by ``user_cache`` instead of loading the ``User`` row."""
+
+    __slots__ = ("id", "email")
+
+    def __init__(self, id: int, email: str):
+        self.id = id
+        self.email = email
+
+    def __repr__(self) -> str:
+        return f"<Principal {self.id}>"
+
+def _load_principal(user_id: int) -> Principal | None:
+    row = db.session.execute(db.select(User.id, User.email).where(User.id == user_id)).first()
+    return Principal(*row) if row else None
+
 @login_manager.user_loader
-def load_user(user_id: str) -> User | None:
-    return User.query.get(int(user_id))
+def load_user(user_id: str) -> Principal | None:
+    uid = int(user_id)
+    return user_cache.get_or_load(uid, lambda: _load_principal(uid))
 
 
 # --------------------
@@ -34,28 +58,93 @@ def load_user(user_id: str) -> User | None:
 # --------------------
 class Account(db.Model):
     id = db.Column(db.Integer, primary_key = True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable = False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable = False, index = True)
     name = db.Column(db.String(80), nullable = False)
     type = db.Column(db.String(30), nullable = False)   # e.g., Checking/Savings
     balance = db.Column(db.Numeric(12, 2), nullable = False)
+    balance_cents = db.Column(db.BigInteger, nullable = False, default = 0, server_default = "0")
+    opening_cents = db.Column(db.BigInteger, nullable = False, default = 0, server_default = "0")   # no ledger row
     created_at = db.Column(db.DateTime, default = datetime.utcnow, nullable = False)
 
     transactions = db.relationship("Transaction", backref = "account", lazy = True)
 
+    @db.validates("balance")
+    def _sync_balance_cents(self, key, value):
+        # the cents column always mirrors balance (see money.py)
+        if value is not None:
+            self.balance_cents = Money.parse(value).cents
+        return value
+
 
 # --------------------
 # Transaction model
 # --------------------
 class Transaction(db.Model):
+    # On Postgres the table is partitioned by month on created_at, maybe
+    # hashed on account_id within each month (primary key (id, created_at,
+    # account_id), see partitions.py). Filter on created_at directly so
+    # queries only touch the months they need.
     id = db.Column(db.Integer, primary_key = True)
     account_id = db.Column(db.Integer, db.ForeignKey("account.id"), nullable = False)
     kind = db.Column(db.String(20), nullable = False)   # deposit/withdraw/transfer
     amount = db.Column(db.Numeric(12, 2), nullable = False)
+    amount_cents = db.Column(db.BigInteger, nullable = False, default = 0, server_default = "0")
     description = db.Column(db.String(255))
     related_account_id = db.Column(db.Integer)      # for transfers
     created_at = db.Column(db.DateTime, default = datetime.utcnow, nullable = False)
 
+    __table_args__ = (
+        # newest-first ledger reads per account (api/routes keyset order)
+        db.Index("ix_transaction_account_id_created_at", account_id, created_at.desc(), id),
+    )
+
+    @db.validates("amount")
+    def _sync_amount_cents(self, key, value):
+        if value is not None:
+            self.amount_cents = Money.parse(value).cents
+        return value
+
     @staticmethod
     def as_decimal(value: float | str | Decimal) -> Decimal:
         """Ensure all amounts are stored as Decimals with 2 dp precision."""
-        return Decimal(str(value)).quantize(Decimal("0.01"))
\ No newline at end of file
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+
+# --------------------
+# Balance snapshot model
+# --------------------
+class BalanceSnapshot(db.Model):
+    """Closing balance of an account at the end of a (UTC) day with activity."""
+    __tablename__ = "balance_snapshot"
+
+    account_id = db.Column(db.Integer, db.ForeignKey("account.id"), primary_key = True)
+    day = db.Column(db.Date, primary_key = True)
+    balance = db.Column(db.Numeric(12, 2), nullable = False)
+
+
+# --------------------
+# Idempotency key model
+# --------------------
+class IdempotencyKey(db.Model):
+    """Stored response for a client-supplied Idempotency-Key (see idempotency.py)."""
+    __tablename__ = "idempotency_key"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key = True)
+    key = db.Column(db.String(255), primary_key = True)
+    request_hash = db.Column(db.String(64), nullable = False)
+    status_code = db.Column(db.Integer)             # NULL while the request is in flight
+    content_type = db.Column(db.String(100))
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default = datetime.utcnow, nullable = False, index = True)
+
+
+# --------------------
+# Ledger reconciliation checkpoint
+# --------------------
+class LedgerCheckpoint(db.Model):
+    """Verified ledger total per account up to ``last_tx_id`` (see reconcile.py)."""
+    __tablename__ = "ledger_checkpoint"
+
+    account_id = db.Column(db.Integer, db.ForeignKey("account.id"), primary_key = True)
+    ledger_cents = db.Column(db.BigInteger, nullable = False)
+    last_tx_id = db.Column(db.Integer, nullable = False)
+    checked_at = db.Column(db.DateTime, default = datetime.utcnow, nullable = False)
@@ -0,0 +1,90 @@
+# money.py (integer minor-unit money value)
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+
+_CENT = Decimal("0.01")
+
+
+class Money:
+    """An amount held as integer cents.
+
+    Parsing a plain ``"123.45"`` string never touches ``Decimal``; anything
+    else (more decimals, exponents, floats) goes through the same
+    ``Decimal(str(value)).quantize(0.01)`` rounding as
+    ``Transaction.as_decimal``, so both paths agree to the cent.
+    """
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents: int = 0):
+        self.cents = cents
+
+    @classmethod
+    def parse(cls, value: Money | Decimal | str | int | float) -> Money:
+        if type(value) is Money:
+            return value
+        if type(value) is str:
+            whole, _, frac = value.partition(".")
+            if len(frac) <= 2 and whole.isdecimal() and (frac.isdecimal() or not frac):
+                return cls(int(whole) * 100 + (int(frac) * (10 if len(frac) == 1 else 1) if frac else 0))
+        if type(value) is int:
+            return cls(value * 100)
+        try:
+            q = (value if type(value) is Decimal else Decimal(str(value))).quantize(_CENT)
+        except InvalidOperation:
+            raise ValueError(f"Not a valid amount: {value!r}") from None
+        if not q.is_finite():
+            raise ValueError(f"Not a valid amount: {value!r}")
+        return cls(int(q.scaleb(2)))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.cents).scaleb(-2)
+
+    def __str__(self) -> str:
+        c = self.cents
+        s = "%03d" % c if c >= 0 else "-%03d" % -c
+        return s[:-2] + "." + s[-2:]
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    def __float__(self) -> float:
+        return self.cents / 100
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    def __hash__(self) -> int:
+        return hash(self.cents)
+
+    def __reduce__(self):
+        return (Money, (self.cents,))
+
+    # arithmetic / comparison against other Money only
+    def __add__(self, other: Money) -> Money:
+        return Money(self.cents + other.cents)
+
+    def __sub__(self, other: Money) -> Money:
+        return Money(self.cents - other.cents)
+
+    def __neg__(self) -> Money:
+        return Money(-self.cents)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is Money and self.cents == other.cents
+
+    def __lt__(self, other: Money) -> bool:
+        return self.cents < other.cents
+
+    def __le__(self, other: Money) -> bool:
+        return self.cents <= other.cents
+
+    def __gt__(self, other: Money) -> bool:
+        return self.cents > other.cents
+
+    def __ge__(self, other: Money) -> bool:
+        return self.cents >= other.cents
+
+
+ZERO = Money(0)
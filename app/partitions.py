@@ -0,0 +1,164 @@
+# partitions.py (monthly range partitions of the Postgres ledger)
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, time
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import text
+
+from .extensions import db
+from .snapshots import record_closes
+
+# The partitioned layout is created by migration 7c41d2e9f0a8 on Postgres.
+# Elsewhere (SQLite in dev/tests) ``transaction`` stays a plain table and
+# everything here is a no-op.
+PARENT = "transaction"
+DEFAULT_PARTITION = "transaction_default"
+ARCHIVE_SCHEMA = "ledger_archive"
+
+_NAME = re.compile(r"^transaction_y(\d{4})m(\d{2})$")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: date          # first day of the month, inclusive
+    end: date            # first day of the next month, exclusive
+    hash_partitions: int  # HASH(account_id) sub-partitions, 0 if none
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transaction_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned() -> bool:
+    """True when ``transaction`` is a partitioned Postgres table."""
+    if db.engine.dialect.name != "postgresql":
+        return False
+    kind = db.session.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": f'"{PARENT}"'}
+    ).scalar()
+    return kind == "p"
+
+
+def list_partitions() -> list[Partition]:
+    """Monthly partitions attached to ``transaction``, oldest first."""
+    rows = db.session.execute(
+        text(
+            "SELECT c.relname, (SELECT count(*) FROM pg_inherits s WHERE s.inhparent = c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:t)"
+        ),
+        {"t": f'"{PARENT}"'},
+    ).all()
+    parts = []
+    for name, children in rows:
+        m = _NAME.match(name)
+        if m:
+            start = date(int(m.group(1)), int(m.group(2)), 1)
+            parts.append(Partition(name, start, add_months(start, 1), int(children)))
+    return sorted(parts, key=lambda p: p.start)
+
+
+def _create_month(month: date, hash_partitions: int) -> None:
+    name, end = partition_name(month), add_months(month, 1)
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+    sub = " PARTITION BY HASH (account_id)" if hash_partitions > 1 else ""
+    # Rows for this month that landed in the default partition have to move
+    # out first, or Postgres refuses the new partition.
+    db.session.execute(text(
+        f"CREATE TEMP TABLE _stray ON COMMIT DROP AS WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= '{month.isoformat()}' "
+        f"AND created_at < '{end.isoformat()}' RETURNING *) SELECT * FROM moved"
+    ))
+    db.session.execute(text(f'CREATE TABLE {name} PARTITION OF "{PARENT}" {bounds}{sub}'))
+    for i in range(hash_partitions if sub else 0):
+        db.session.execute(text(
+            f"CREATE TABLE {name}_h{i} PARTITION OF {name} "
+            f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {i})"
+        ))
+    db.session.execute(text(f'INSERT INTO "{PARENT}" SELECT * FROM _stray'))
+
+
+def ensure_partitions(months_ahead: int = 3, *, today: date | None = None) -> list[str]:
+    """Create any missing monthly partitions from this month through
+    ``months_ahead`` months from now; returns the names created.
+
+    New months get ``LEDGER_HASH_PARTITIONS`` hash sub-partitions on
+    ``account_id`` (0 or 1 = none). Safe to run repeatedly, e.g. from cron
+    and on every deploy.
+    """
+    if not is_partitioned():
+        return []
+    hash_partitions = current_app.config.get("LEDGER_HASH_PARTITIONS", 0)
+    existing = {p.start for p in list_partitions()}
+    this_month = month_start(today or date.today())
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(this_month, n)
+        if month not in existing:
+            _create_month(month, hash_partitions)
+            db.session.commit()
+            created.append(partition_name(month))
+    return created
+
+
+# Ledger rows leaving the table are folded into the account's opening
+# balance (and out of its reconcile checkpoint), so reconcile's
+# opening + ledger == balance keeps holding.
+_SIGNED = "CASE WHEN t.kind = 'deposit' THEN t.amount_cents ELSE -t.amount_cents END"
+
+
+def fold_into_opening(source: str) -> None:
+    """Move the signed total of the ledger rows in ``source`` (a table or
+    subquery aliased ``t``) into ``account.opening_cents``."""
+    db.session.execute(text(
+        f"UPDATE account AS a SET opening_cents = a.opening_cents + m.cents "
+        f"FROM (SELECT t.account_id, SUM({_SIGNED}) AS cents FROM {source} t GROUP BY t.account_id) m "
+        f"WHERE a.id = m.account_id"
+    ))
+    db.session.execute(text(
+        f"UPDATE ledger_checkpoint AS c SET ledger_cents = c.ledger_cents - m.cents "
+        f"FROM (SELECT t.account_id, SUM({_SIGNED}) AS cents FROM {source} t "
+        f"JOIN ledger_checkpoint k ON k.account_id = t.account_id AND t.id <= k.last_tx_id "
+        f"GROUP BY t.account_id) m "
+        f"WHERE c.account_id = m.account_id"
+    ))
+
+
+def detach_before(before: date, *, schema: str = ARCHIVE_SCHEMA) -> list[Partition]:
+    """Detach every monthly partition that ends on or before ``before`` and
+    move it into ``schema``.
+
+    The rows leave the live ledger (and the app's queries) but stay
+    queryable as ``<schema>.transaction_yYYYYmMM``; drop or dump those at
+    leisure. One transaction per month.
+    """
+    if not is_partitioned():
+        return []
+    parts = [p for p in list_partitions() if p.end <= before]
+    if not parts:
+        return []
+    db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+    # the daily closes of the detached months can't be recomputed afterwards
+    record_closes(datetime.combine(parts[-1].end, time.min))
+    db.session.commit()
+    detached = []
+    for part in parts:
+        fold_into_opening(part.name)
+        db.session.execute(text(f'ALTER TABLE "{PARENT}" DETACH PARTITION {part.name}'))
+        for name in [part.name, *(f"{part.name}_h{i}" for i in range(part.hash_partitions))]:
+            db.session.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+        db.session.commit()
+        detached.append(part)
+    return detached
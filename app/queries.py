@@ -0,0 +1,172 @@
+# queries.py (read model: column-projected selects, no ORM entities)
+from __future__ import annotations
+
+import heapq
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple
+
+from flask import current_app
+from sqlalchemy import BigInteger, and_, or_, select, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+from .archive import ledger_archive
+from .extensions import account_cache, db
+from .models import Account, Transaction
+from .money import Money
+
+
+# Field order matches AccountSchema / TransactionSchema so rows can go
+# straight into the schemas' RowDumpers.
+# Money columns are Decimal, or Money when MONEY_STORAGE is "cents".
+class AccountRow(NamedTuple):
+    id: int
+    user_id: int
+    name: str
+    type: str
+    balance: Decimal | Money
+    created_at: datetime
+
+
+class TransactionRow(NamedTuple):
+    id: int
+    account_id: int
+    kind: str
+    amount: Decimal | Money
+    description: str | None
+    related_account_id: int | None
+    created_at: datetime
+
+
+class _Cents(TypeDecorator):
+    """BIGINT cents read straight into Money."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else Money(value)
+
+
+def cents_storage() -> bool:
+    return current_app.config.get("MONEY_STORAGE") == "cents"
+
+
+def _columns(model, fields: tuple[str, ...], money: str) -> tuple[list, list]:
+    cols = [getattr(model, f) for f in fields]
+    cents = list(cols)
+    cents[fields.index(money)] = type_coerce(getattr(model, f"{money}_cents"), _Cents).label(money)
+    return cols, cents
+
+
+_ACCOUNT_COLUMNS, _ACCOUNT_CENTS_COLUMNS = _columns(Account, AccountRow._fields, "balance")
+_TRANSACTION_COLUMNS, _TRANSACTION_CENTS_COLUMNS = _columns(Transaction, TransactionRow._fields, "amount")
+
+
+def owned_account_ids(user_id: int):
+    """Scalar subquery of the user's account ids (for IN (...) filters)."""
+    return select(Account.id).where(Account.user_id == user_id).scalar_subquery()
+
+
+def account_owner_id(account_id: int) -> int | None:
+    return db.session.execute(
+        select(Account.user_id).where(Account.id == account_id)
+    ).scalar_one_or_none()
+
+
+def accounts_for_user(user_id: int) -> list[AccountRow]:
+    """The user's accounts, served from ``account_cache`` when warm."""
+    return account_cache.get_or_load(user_id, lambda: _load_accounts(user_id))
+
+
+def _load_accounts(user_id: int) -> list[AccountRow]:
+    columns = _ACCOUNT_CENTS_COLUMNS if cents_storage() else _ACCOUNT_COLUMNS
+    stmt = select(*columns).where(Account.user_id == user_id).order_by(Account.id)
+    return [AccountRow._make(r) for r in db.session.execute(stmt)]
+
+
+def transactions_select(
+    user_id: int,
+    *,
+    account_id: int | None = None,
+    kind: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    before: tuple[datetime, int] | None = None,
+):
+    """Newest-first ledger select for one user.
+
+    ``before`` is a keyset position ``(created_at, id)``; only rows strictly
+    older than it are returned.
+    """
+    columns = _TRANSACTION_CENTS_COLUMNS if cents_storage() else _TRANSACTION_COLUMNS
+    stmt = select(*columns).where(Transaction.account_id.in_(owned_account_ids(user_id)))
+    if account_id is not None:
+        stmt = stmt.where(Transaction.account_id == account_id)
+    if kind is not None:
+        stmt = stmt.where(Transaction.kind == kind)
+    if since is not None:
+        stmt = stmt.where(Transaction.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(Transaction.created_at < until)
+    if before is not None:
+        ts, tx_id = before
+        stmt = stmt.where(
+            # redundant with the OR, but a plain bound lets Postgres skip
+            # newer ledger partitions
+            Transaction.created_at <= ts,
+            or_(
+                Transaction.created_at < ts,
+                and_(Transaction.created_at == ts, Transaction.id < tx_id),
+            )
+        )
+    return stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+
+
+def _unique(rows: Iterable[TransactionRow]) -> Iterator[TransactionRow]:
+    # a row being archived can briefly be in both places; merged, the two
+    # copies are adjacent
+    last = None
+    for row in rows:
+        if row.id != last:
+            last = row.id
+            yield row
+
+
+def _with_archive(user_id: int, live: Iterable[TransactionRow], filters: dict) -> Iterator[TransactionRow] | None:
+    """``live`` merged newest-first with the user's archived ledger rows, or
+    None when the archive has nothing for these filters."""
+    if not ledger_archive.segments():
+        return None
+    ids = [a.id for a in accounts_for_user(user_id)]
+    streams = ledger_archive.rows(ids, cents=cents_storage(), **filters)
+    if not streams:
+        return None
+    archived = (map(TransactionRow._make, s) for s in streams)
+    return _unique(heapq.merge(live, *archived, key=lambda r: (r.created_at, r.id), reverse=True))
+
+
+def transactions_for_user(user_id: int, *, limit: int | None = None, **filters) -> list[TransactionRow]:
+    """Newest-first ledger rows, archived ones included (see archive.py)."""
+    stmt = transactions_select(user_id, **filters)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    live = [TransactionRow._make(r) for r in db.session.execute(stmt)]
+    merged = _with_archive(user_id, live, filters)
+    return live if merged is None else list(islice(merged, limit))
+
+
+def iter_transactions(user_id: int, *, chunk_size: int = 1000, **filters) -> Iterator[list[TransactionRow]]:
+    """Stream the ledger in chunks over a server-side cursor (yield_per),
+    archived rows merged in."""
+    stmt = transactions_select(user_id, **filters).execution_options(yield_per=chunk_size)
+    parts = db.session.execute(stmt).partitions()
+    live = (TransactionRow._make(r) for part in parts for r in part)
+    merged = _with_archive(user_id, live, filters)
+    if merged is None:
+        for part in parts:
+            yield [TransactionRow._make(r) for r in part]
+        return
+    while chunk := list(islice(merged, chunk_size)):
+        yield chunk
@@ -0,0 +1,194 @@
+# reconcile.py (account balances checked against the ledger)
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import BigInteger, case, cast, func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from .extensions import db
+from .models import Account, LedgerCheckpoint, Transaction
+
+SIGNED_CENTS = case((Transaction.kind == "deposit", Transaction.amount_cents), else_=-Transaction.amount_cents)
+_MIRROR_CENTS = cast(func.round(Account.balance * 100), BigInteger)
+
+
+class AccountCheck(NamedTuple):
+    account_id: int
+    balance_cents: int       # Account.balance_cents
+    mirror_cents: int        # Account.balance, in cents
+    expected_cents: int      # opening_cents + signed ledger total
+    ledger_cents: int
+    last_tx_id: int
+
+    @property
+    def drift_cents(self) -> int:
+        return self.balance_cents - self.expected_cents
+
+    @property
+    def ok(self) -> bool:
+        return self.balance_cents == self.expected_cents == self.mirror_cents
+
+
+class Report(NamedTuple):
+    accounts: int
+    rows: int                # ledger rows summed this run
+    last_tx_id: int          # high-water mark the run checked up to
+    drift: list[AccountCheck]
+
+
+def scan_range(lo: int, hi: int, upto: int, full: bool = False) -> tuple[list[AccountCheck], int]:
+    """Check accounts with ``lo <= id < hi`` against ledger rows ``id <= upto``.
+
+    One GROUP BY over the range, streamed. Unless ``full``, each account's
+    checkpoint total is reused and only rows past its ``last_tx_id`` are
+    summed, which is a primary-key range scan for nightly runs.
+    """
+    accounts = db.session.execute(
+        select(
+            Account.id,
+            Account.balance_cents,
+            _MIRROR_CENTS,
+            Account.opening_cents,
+            LedgerCheckpoint.ledger_cents,
+            LedgerCheckpoint.last_tx_id,
+        )
+        .outerjoin(LedgerCheckpoint, LedgerCheckpoint.account_id == Account.id)
+        .where(Account.id >= lo, Account.id < hi)
+    ).all()
+    if not accounts:
+        return [], 0
+
+    in_range = [Transaction.account_id >= lo, Transaction.account_id < hi, Transaction.id <= upto]
+    stmt = select(Transaction.account_id, func.sum(SIGNED_CENTS), func.count())
+    if not full:
+        since = min(a.last_tx_id or 0 for a in accounts)
+        stmt = stmt.outerjoin(LedgerCheckpoint, LedgerCheckpoint.account_id == Transaction.account_id)
+        in_range += [Transaction.id > since, Transaction.id > func.coalesce(LedgerCheckpoint.last_tx_id, 0)]
+    stmt = stmt.where(*in_range).group_by(Transaction.account_id).execution_options(yield_per=1000)
+
+    delta: dict[int, int] = {}
+    rows = 0
+    for acct_id, cents, n in db.session.execute(stmt):
+        delta[acct_id] = int(cents or 0)
+        rows += n
+
+    checks = []
+    for acct_id, balance_cents, mirror, opening, prev, _ in accounts:
+        ledger = (0 if full else prev or 0) + delta.get(acct_id, 0)
+        checks.append(AccountCheck(acct_id, balance_cents, int(mirror), opening + ledger, ledger, upto))
+    return checks, rows
+
+
+def recheck(account_id: int) -> AccountCheck:
+    """Full recount for one account, balance and ledger in a single statement."""
+    mine = Transaction.account_id == account_id
+    balance_cents, mirror, opening, total, last = db.session.execute(
+        select(
+            Account.balance_cents,
+            _MIRROR_CENTS,
+            Account.opening_cents,
+            select(func.coalesce(func.sum(SIGNED_CENTS), 0)).where(mine).scalar_subquery(),
+            select(func.coalesce(func.max(Transaction.id), 0)).where(mine).scalar_subquery(),
+        ).where(Account.id == account_id)
+    ).one()
+    return AccountCheck(account_id, balance_cents, int(mirror), opening + int(total), int(total), last)
+
+
+def _save_checkpoints(checks: list[AccountCheck]) -> None:
+    if not checks:
+        return
+    now = datetime.utcnow()
+    values = [
+        {"account_id": c.account_id, "ledger_cents": c.ledger_cents, "last_tx_id": c.last_tx_id, "checked_at": now}
+        for c in checks
+    ]
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(LedgerCheckpoint).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            ledger_cents=stmt.inserted.ledger_cents,
+            last_tx_id=stmt.inserted.last_tx_id,
+            checked_at=stmt.inserted.checked_at,
+        )
+    else:
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(LedgerCheckpoint).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["account_id"],
+            set_={
+                "ledger_cents": stmt.excluded.ledger_cents,
+                "last_tx_id": stmt.excluded.last_tx_id,
+                "checked_at": stmt.excluded.checked_at,
+            },
+        )
+    db.session.execute(stmt)
+    db.session.commit()
+
+
+def reconcile(*, chunk_size: int = 1000, workers: int = 1, full: bool = False) -> Report:
+    """Compare every account's balance with ``opening_cents`` + its ledger.
+
+    Accounts are split into id ranges of ``chunk_size``; with ``workers > 1``
+    ranges are scanned in a process pool, each worker with its own engine.
+    Checkpoints are written after each range, so an interrupted run picks
+    up where it stopped. Accounts that look off are recounted from scratch
+    before being reported, so a write racing the scan (or a ledger row that
+    committed behind the high-water mark) doesn't show up as drift.
+    """
+    upto = db.session.execute(select(func.max(Transaction.id))).scalar() or 0
+    first, last = db.session.execute(select(func.min(Account.id), func.max(Account.id))).one()
+    db.session.commit()
+    if first is None:
+        return Report(0, 0, upto, [])
+    ranges = [(lo, lo + chunk_size) for lo in range(first, last + 1, chunk_size)]
+
+    accounts = rows = 0
+    suspects: list[int] = []
+
+    def collect(checks: list[AccountCheck], n: int) -> None:
+        nonlocal accounts, rows
+        accounts += len(checks)
+        rows += n
+        suspects.extend(c.account_id for c in checks if not c.ok)
+        _save_checkpoints(checks)
+
+    if workers > 1:
+        overrides = {k: current_app.config[k] for k in ("SQLALCHEMY_DATABASE_URI", "SQLALCHEMY_ENGINE_OPTIONS")}
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(overrides,)) as pool:
+            for checks, n in pool.map(_scan_in_worker, ranges, repeat(upto), repeat(full)):
+                collect(checks, n)
+    else:
+        for lo, hi in ranges:
+            collect(*scan_range(lo, hi, upto, full))
+
+    drift = []
+    for account_id in suspects:
+        check = recheck(account_id)
+        _save_checkpoints([check])
+        if not check.ok:
+            drift.append(check)
+    return Report(accounts, rows, upto, drift)
+
+
+# -- process pool workers ---------------------------------------------------
+_worker_app = None
+
+
+def _init_worker(overrides: dict) -> None:
+    global _worker_app
+    from . import create_app
+    from .config import Config
+
+    _worker_app = create_app(type("ReconcileWorkerConfig", (Config,), overrides))
+
+
+def _scan_in_worker(bounds: tuple[int, int], upto: int, full: bool) -> tuple[list[AccountCheck], int]:
+    with _worker_app.app_context():
+        try:
+            return scan_range(*bounds, upto, full)
+        finally:
+            db.session.remove()
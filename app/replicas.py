@@ -0,0 +1,101 @@
+# replicas.py (read-replica routing for GET requests)
+from __future__ import annotations
+
+import random
+import time
+
+from flask import Flask, current_app, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import CompoundSelect, Select
+
+# db.session.info keys
+_REPLICA = "db_replica"    # engine this request reads from, if any
+_WROTE = "db_wrote"        # something went to the primary for writing
+
+# Flask session key: read from the primary until this timestamp
+STICKY_KEY = "db_primary_until"
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to the request's replica, everything else to the
+    primary.
+
+    Only requests that :class:`Replicas` marked read-only get a replica.
+    Flushes, INSERT/UPDATE/DELETE, ``SELECT ... FOR UPDATE`` and raw SQL
+    always use the primary, and after the first of those the rest of the
+    request stays there too, so it reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper, clause, bind, **kwargs)
+        if bind is not None or engine is not self._db.engines[None]:
+            return engine
+        if clause is None and not self._flushing:
+            # bare get_bind() (e.g. to look at the dialect): not a statement
+            return self.info.get(_REPLICA, engine)
+        if (
+            not self._flushing
+            and isinstance(clause, (Select, CompoundSelect))
+            and getattr(clause, "_for_update_arg", None) is None
+        ):
+            return self.info.get(_REPLICA, engine)
+        self.info.pop(_REPLICA, None)
+        self.info[_WROTE] = True
+        return engine
+
+
+def mark_written(db_session) -> None:
+    """Record a write made on this request's behalf by another session (the
+    group committer), so the client still sticks to the primary."""
+    db_session.info.pop(_REPLICA, None)
+    db_session.info[_WROTE] = True
+
+
+def using_replica(db_session) -> bool:
+    """True while ``db_session`` is reading from a replica (callers that
+    cache what they read should skip storing it)."""
+    return _REPLICA in db_session.info
+
+
+class Replicas:
+    """Routes GET/HEAD requests to one of ``SQLALCHEMY_REPLICA_BINDS``.
+
+    A request that writes makes the client stick to the primary for
+    ``REPLICA_STICKY_SECONDS``, so the next pages show what it just did
+    even if the replicas lag. The deadline is kept in the (signed) session
+    cookie, so it holds whichever worker serves the next request.
+    """
+
+    def init_app(self, app: Flask) -> None:
+        app.before_request(_route_request)
+        app.after_request(_mark_sticky)
+        app.teardown_request(_reset_route)
+
+
+replicas = Replicas()
+
+
+def _route_request() -> None:
+    from .extensions import db
+
+    binds = current_app.config.get("SQLALCHEMY_REPLICA_BINDS")
+    if not binds or request.method not in ("GET", "HEAD"):
+        return
+    if session.get(STICKY_KEY, 0) > time.time():
+        return
+    db.session.info[_REPLICA] = db.engines[random.choice(binds)]
+
+
+def _mark_sticky(response):
+    from .extensions import db
+
+    if db.session.info.pop(_WROTE, False) and current_app.config.get("SQLALCHEMY_REPLICA_BINDS"):
+        session[STICKY_KEY] = time.time() + current_app.config.get("REPLICA_STICKY_SECONDS", 10)
+    return response
+
+
+def _reset_route(exc) -> None:
+    from .extensions import db
+
+    db.session.info.pop(_REPLICA, None)
+    db.session.info.pop(_WROTE, None)
@@ -1,11 +1,16 @@
 # routes.py
 from __future__ import annotations
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import hmac
+
+from flask import Blueprint, abort, current_app, jsonify, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 
-# removed: from .extensions import db  (unused)
-from .models import Account, Transaction
-from .services import create_account, deposit, withdraw, transfer
+from . import queries
+from .dbstats import db_stats, pool_status
+from .extensions import db
+from .metrics import metrics
+from .models import Account
+from .services import create_account, deposit, withdraw, transfer, transfer_stats
 
 bp = Blueprint("main", __name__)
 
@@ -14,10 +19,43 @@ bp = Blueprint("main", __name__)
 def ping():
     return "ok", 200
 
+def _internal_only():
+    """Loopback only, or X-Stats-Token / Bearer token when STATS_TOKEN is set.
+
+    Behind a reverse proxy on the same host every client looks like
+    loopback, so set STATS_TOKEN there. Without it, requests carrying
+    proxy forwarding headers are refused.
+    """
+    token = current_app.config.get("STATS_TOKEN")
+    if token:
+        sent = request.headers.get("X-Stats-Token") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(sent, token):
+            abort(403)
+    elif request.remote_addr not in {"127.0.0.1", "::1"} or _proxied():
+        abort(403)
+
+def _proxied() -> bool:
+    return any(h in request.headers for h in ("X-Forwarded-For", "X-Real-IP", "Forwarded"))
+
+# Internal stats (no login)
+@bp.route("/_stats")
+def stats():
+    _internal_only()
+    data = db_stats.snapshot()
+    data["pool"].update(pool_status(db.engine))
+    data["transfers"] = transfer_stats.snapshot()
+    return jsonify(data)
+
+# Prometheus scrape target (no login)
+@bp.route("/metrics")
+def metrics_view():
+    _internal_only()
+    return metrics.render()
+
 @bp.route("/")
 @login_required
 def index():
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
+    accounts = queries.accounts_for_user(current_user.id)
     return render_template("index.html", accounts=accounts)
 
 @bp.route("/accounts/new", methods=["GET", "POST"])
@@ -41,20 +79,13 @@ def new_account():
 @bp.route("/transactions", methods=["GET"])
 @login_required
 def transactions_list():
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
-    ids = [a.id for a in accounts]
-    tx = (
-        Transaction.query.filter(Transaction.account_id.in_(ids))
-        .order_by(Transaction.created_at.desc())
-        .all()
-    )
+    accounts = queries.accounts_for_user(current_user.id)
+    tx = queries.transactions_for_user(current_user.id)
     return render_template("transactions/list.html", tx=tx, accounts=accounts)
 
 @bp.route("/transfer", methods=["GET", "POST"])
 @login_required
 def transfer_view():
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
-
     if request.method == "POST":
         try:
             src_id = int(request.form["src"])
@@ -79,12 +110,12 @@ def transfer_view():
         flash("Transfer complete.", "success")
         return redirect(url_for("main.transactions_list"))
 
+    accounts = queries.accounts_for_user(current_user.id)
     return render_template("transactions/transfer.html", accounts=accounts)
 
 @bp.route("/deposit", methods=["GET", "POST"])
 @login_required
 def deposit_view():
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
     if request.method == "POST":
         account_id = int(request.form["account_id"])
         amount = request.form["amount"]
@@ -96,12 +127,12 @@ def deposit_view():
         deposit(account, amount, description=description)
         flash(f"Deposited {amount} to {account.name}", "success")
         return redirect(url_for("main.transactions_list"))
+    accounts = queries.accounts_for_user(current_user.id)
     return render_template("transactions/deposit.html", accounts=accounts)
 
 @bp.route("/withdraw", methods=["GET", "POST"])
 @login_required
 def withdraw_view():
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
     if request.method == "POST":
         account_id = int(request.form["account_id"])
         amount = request.form["amount"]
@@ -117,4 +148,5 @@ def withdraw_view():
             return redirect(url_for("main.withdraw_view"))
         flash(f"Withdrew {amount} from {account.name}", "success")
         return redirect(url_for("main.transactions_list"))
+    accounts = queries.accounts_for_user(current_user.id)
     return render_template("transactions/withdraw.html", accounts=accounts)
@@ -1,18 +1,58 @@
 # schemas.py (Marshmallow schemas for API)
 from __future__ import annotations
 
+from datetime import timezone
 from decimal import Decimal
-from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError, pre_load
+from typing import Any, Iterable, Sequence
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError, pre_load, post_load
+
+from .money import Money, ZERO
 
 ACCOUNT_TYPES = ("Checking", "Savings")
 TX_KINDS = ("deposit", "withdraw", "transfer")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_FORMATS = ("csv", "ndjson")
+BATCH_MODES = ("atomic", "best_effort")
+GRANULARITIES = ("day", "month")
+MAX_BATCH_SIZE = 500
+
+
+def _naive_utc(value):
+    # created_at is stored as naive UTC; compare like with like
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class MoneyField(fields.Field):
+    """Amount as a ``"12.34"`` string on the wire, ``Money`` in between.
+
+    Loads anything ``fields.Decimal(places=2)`` would, rounded the same way;
+    dumps Money, Decimal or numbers.
+    """
+
+    default_error_messages = {"invalid": "Not a valid number."}
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        if value is None:
+            return None
+        return str(value if type(value) is Money else Money.parse(value))
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if isinstance(value, bool):
+            raise self.make_error("invalid")
+        try:
+            return Money.parse(value)
+        except (TypeError, ValueError):
+            raise self.make_error("invalid") from None
 
 
 # ---------- Accounts ----------
 class AccountCreateSchema(Schema):
     name = fields.Str(required=True)
     type = fields.Str(required=True, validate=validate.OneOf(ACCOUNT_TYPES))
-    opening = fields.Decimal(as_string=True, places=2, default=Decimal("0.00"))
+    opening = MoneyField(dump_default=ZERO)
 
     @pre_load
     def strip_strings(self, data, **kwargs):
@@ -22,8 +62,8 @@ class AccountCreateSchema(Schema):
         return data
 
     @validates("opening")
-    def validate_opening(self, value: Decimal):
-        if value < Decimal("0.00"):
+    def validate_opening(self, value: Money):
+        if value.cents < 0:
             raise ValidationError("Opening balance cannot be negative.")
 
 
@@ -32,15 +72,47 @@ class AccountSchema(Schema):
     user_id = fields.Int(dump_only=True)
     name = fields.Str(required=True)
     type = fields.Str(required=True, validate=validate.OneOf(ACCOUNT_TYPES))
-    balance = fields.Decimal(as_string=True, places=2, dump_only=True)
+    balance = MoneyField(dump_only=True)
     created_at = fields.DateTime(format="iso", dump_only=True)
 
 
+class BalanceQuerySchema(Schema):
+    as_of = fields.DateTime(load_default=None)
+
+    @post_load
+    def naive_utc(self, data, **kwargs):
+        data["as_of"] = _naive_utc(data["as_of"])
+        return data
+
+
+class BalanceSchema(Schema):
+    account_id = fields.Int()
+    as_of = fields.DateTime(format="iso")
+    balance = fields.Decimal(as_string=True, places=2)
+
+
+class StatementQuerySchema(Schema):
+    month = fields.Str(required=True, validate=validate.Regexp(r"^\d{4}-(0[1-9]|1[0-2])$", error="Use YYYY-MM."))
+
+
+class DailyBalanceSchema(Schema):
+    day = fields.Date()
+    balance = fields.Decimal(as_string=True, places=2)
+
+
+class StatementSchema(Schema):
+    account_id = fields.Int()
+    month = fields.Str()
+    opening_balance = fields.Decimal(as_string=True, places=2)
+    closing_balance = fields.Decimal(as_string=True, places=2)
+    daily = fields.List(fields.Nested(DailyBalanceSchema))
+
+
 # ---------- Transactions ----------
 class TransactionCreateSchema(Schema):
     account_id = fields.Int(required=True)
     kind = fields.Str(required=True, validate=validate.OneOf(TX_KINDS))
-    amount = fields.Decimal(as_string=True, places=2, required=True)
+    amount = MoneyField(required=True)
     description = fields.Str(load_default="")
     related_account_id = fields.Int(allow_none=True, load_default=None)
 
@@ -51,8 +123,8 @@ class TransactionCreateSchema(Schema):
         return data
 
     @validates("amount")
-    def validate_amount(self, value: Decimal):
-        if value <= Decimal("0.00"):
+    def validate_amount(self, value: Money):
+        if value.cents <= 0:
             raise ValidationError("Amount must be greater than 0.")
 
     @validates_schema
@@ -65,21 +137,115 @@ class TransactionCreateSchema(Schema):
             raise ValidationError({"related_account_id": "should be empty for deposits/withdrawals"})
 
 
+class TransactionBatchSchema(Schema):
+    mode = fields.Str(load_default="atomic", validate=validate.OneOf(BATCH_MODES))
+    operations = fields.List(
+        fields.Nested(TransactionCreateSchema),
+        required=True,
+        validate=validate.Length(min=1, max=MAX_BATCH_SIZE),
+    )
+
+
 class TransactionSchema(Schema):
     id = fields.Int(dump_only=True)
     account_id = fields.Int()
     kind = fields.Str(validate=validate.OneOf(TX_KINDS))
-    amount = fields.Decimal(as_string=True, places=2)
+    amount = MoneyField()
     description = fields.Str()
     related_account_id = fields.Int(allow_none=True)
     created_at = fields.DateTime(format="iso", dump_only=True)
 
 
+class TransactionFilterSchema(Schema):
+    """Query-string filters shared by the ledger read endpoints."""
+    since = fields.DateTime(load_default=None)
+    until = fields.DateTime(load_default=None)
+    account_id = fields.Int(load_default=None)
+    kind = fields.Str(load_default=None, validate=validate.OneOf(TX_KINDS))
+
+    @post_load
+    def naive_utc(self, data, **kwargs):
+        for k in ("since", "until"):
+            data[k] = _naive_utc(data.get(k))
+        return data
+
+
+class TransactionQuerySchema(TransactionFilterSchema):
+    """Filters + keyset cursor for GET /api/transactions."""
+    cursor = fields.Str(load_default=None)
+    limit = fields.Int(
+        load_default=DEFAULT_PAGE_SIZE,
+        validate=validate.Range(min=1, max=MAX_PAGE_SIZE),
+    )
+
+
+class AnalyticsQuerySchema(TransactionFilterSchema):
+    """Filters + bucketing for GET /api/analytics/summary."""
+    granularity = fields.Str(load_default="day", validate=validate.OneOf(GRANULARITIES))
+    window = fields.Int(load_default=7, validate=validate.Range(min=1, max=366))
+
+
+class TransactionExportSchema(TransactionFilterSchema):
+    """Filters + output format for GET /api/transactions/export."""
+    format = fields.Str(load_default="csv", validate=validate.OneOf(EXPORT_FORMATS))
+
+
+# ---------- Fast-path dumps ----------
+class RowDumper:
+    """``many=True`` dump over plain row tuples, compiled from a schema.
+
+    Rows must be ordered like ``self.fields`` (the schema's dump fields), e.g.
+    ``select(*[getattr(Model, f) for f in dumper.fields])``. Output matches
+    ``schema.dump(objs, many=True)`` value for value; Int/Str/Decimal/Money/
+    iso DateTime are inlined, anything else goes through the field itself.
+    """
+
+    def __init__(self, schema: Schema):
+        self.fields = tuple(schema.dump_fields)
+        namespace: dict[str, Any] = {"_D": Decimal, "_M": Money}
+        items = []
+        for i, (name, field) in enumerate(schema.dump_fields.items()):
+            v = f"r[{i}]"
+            if isinstance(field, fields.Integer) and not field.as_string:
+                expr = f"int({v})"
+            elif isinstance(field, fields.Decimal) and field.as_string and field.places is not None:
+                namespace[f"_q{i}"] = field.places
+                namespace[f"_r{i}"] = field.rounding
+                expr = f"str(({v} if type({v}) is _D else _D(str({v}))).quantize(_q{i}, rounding=_r{i}))"
+            elif isinstance(field, MoneyField):
+                expr = f"str({v} if type({v}) is _M else _M.parse({v}))"
+            elif isinstance(field, fields.DateTime) and (field.format or "iso") == "iso":
+                expr = f"{v}.isoformat()"
+            elif type(field) is fields.String:
+                expr = f"str({v})"
+            else:
+                namespace[f"_f{i}"] = field
+                expr = f"_f{i}._serialize({v}, {name!r}, None)"
+            items.append(f"{(field.data_key or name)!r}: (None if {v} is None else {expr})")
+
+        src = f"def dump(rows):\n    return [{{{', '.join(items)}}} for r in rows]\n"
+        exec(compile(src, f"<RowDumper {type(schema).__name__}>", "exec"), namespace)
+        self._dump = namespace["dump"]
+
+    def dump(self, rows: Iterable[Sequence]) -> list[dict]:
+        return self._dump(rows)
+
+
 # Optional singletons
 account_create_schema = AccountCreateSchema()
 account_schema = AccountSchema()
 accounts_schema = AccountSchema(many=True)
+accounts_row_dumper = RowDumper(accounts_schema)
+balance_query_schema = BalanceQuerySchema()
+balance_schema = BalanceSchema()
+statement_query_schema = StatementQuerySchema()
+statement_schema = StatementSchema()
 
 transaction_create_schema = TransactionCreateSchema()
+transaction_batch_schema = TransactionBatchSchema()
 transaction_schema = TransactionSchema()
-transactions_schema = TransactionSchema(many=True)
\ No newline at end of file
+transactions_schema = TransactionSchema(many=True)
+transactions_row_dumper = RowDumper(transactions_schema)
+transaction_query_schema = TransactionQuerySchema()
+transaction_export_schema = TransactionExportSchema()
+analytics_query_schema = AnalyticsQuerySchema()
\ No newline at end of file
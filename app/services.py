@@ -1,113 +1,359 @@
 # services.py (business logic: atomic operations)
 from __future__ import annotations
 
+import random
+import threading
+import time
+from datetime import datetime
 from decimal import Decimal
 from flask import abort
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select
-from .extensions import db
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy import insert, inspect, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from .extensions import account_cache, db
+from .journal import journal
+from .metrics import timed
 
 from .models import Account, Transaction
+from .money import Money
+from .queries import TransactionRow, cents_storage
+from .replicas import mark_written
+from .snapshots import record_balances
 
-def _to_money(value: float | str | Decimal) -> Decimal:
-    amt = Transaction.as_decimal(value)
-    if amt <= Decimal("0.00"):
+def _to_money(value: Money | float | str | Decimal) -> Money:
+    try:
+        amt = Money.parse(value)
+    except ValueError:
+        abort(400, description = "Invalid amount")
+    if amt.cents <= 0:
         abort(400, description = "Amount must be positive")
     return amt
 
-def create_account(user_id: int, name: str, type_: str, opening_balance: float | str = 0) -> Account:
-    opening = Transaction.as_decimal(opening_balance)
-    acct = Account(user_id = user_id, name = name, type = type_, balance = opening)
+@timed
+def create_account(user_id: int, name: str, type_: str, opening_balance: Money | float | str = 0) -> Account:
+    opening = Money.parse(opening_balance)
+    now = datetime.utcnow()
+    acct = Account(user_id = user_id, name = name, type = type_, balance = opening.to_decimal(), opening_cents = opening.cents, created_at = now)
     db.session.add(acct)
+    db.session.flush()
+    record_balances({acct.id: opening.to_decimal()}, now.date())
+    account_cache.invalidate_on_commit(db.session, user_id)
     db.session.commit()
     return acct
 
-def deposit(account: Account, amount: float | str, description: str = "") -> Transaction:
-    amt = _to_money(amount)
-    account.balance += amt
+def _adjust_balance(account: Account, delta: Money) -> Money | None:
+    """``balance += delta`` as one conditional UPDATE ... RETURNING.
+
+    The database does the arithmetic, so concurrent callers can't lose each
+    other's updates, and a debit only matches while ``balance >= -delta``.
+    Both money columns move together; the guard and RETURNING use whichever
+    one ``MONEY_STORAGE`` reads. Returns the new balance, or None if the
+    debit would overdraw.
+    """
+    column = Account.balance_cents if cents_storage() else Account.balance
+    bound = -delta.cents if column is Account.balance_cents else -delta.to_decimal()
+    stmt = (
+        update(Account)
+        .where(Account.id == account.id)
+        .values(balance = Account.balance + delta.to_decimal(), balance_cents = Account.balance_cents + delta.cents)
+        .returning(column)
+        .execution_options(synchronize_session = False)
+    )
+    if delta.cents < 0:
+        stmt = stmt.where(column >= bound)
+    value = db.session.execute(stmt).scalar_one_or_none()
+    if value is None:
+        return None
+    balance = Money(value) if column is Account.balance_cents else Money.parse(value)
+    # keep the caller's instance in sync without a re-SELECT
+    set_committed_value(account, "balance", balance.to_decimal())
+    set_committed_value(account, "balance_cents", balance.cents)
+    return balance
+
+def _commit(op, *args):
+    """Run a money movement (``op`` writes but doesn't commit) and commit it.
+
+    With LEDGER_GROUP_COMMIT the committer thread runs it and commits it
+    together with other requests' movements (see journal.py); this returns
+    once that batch is durable.
+    """
+    if not journal.enabled:
+        result = op(*args)
+        db.session.commit()
+        return result
+    for arg in args:
+        # the op runs in another thread; load what it reads here
+        if isinstance(arg, Account) and inspect(arg).persistent and inspect(arg).expired_attributes:
+            db.session.refresh(arg)
+    # end our own transaction so our pooled connection isn't held while we
+    # wait, keeping the loaded instances as they are
+    session = db.session()
+    expire, session.expire_on_commit = session.expire_on_commit, False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire
+    mark_written(session)
+    return journal.submit(op, *args)
+
+@timed
+def deposit(account: Account, amount: Money | float | str, description: str = "") -> Transaction:
+    return _commit(_deposit, account, _to_money(amount), description)
+
+def _deposit(account: Account, amt: Money, description: str) -> Transaction:
+    now = datetime.utcnow()
+    balance = _adjust_balance(account, amt)
+    if balance is None:
+        abort(404, description = "Account not found")
+    record_balances({account.id: balance.to_decimal()}, now.date())
+    account_cache.invalidate_on_commit(db.session, account.user_id)
     t = Transaction(
         account_id = account.id,
         kind = "deposit",
-        amount = amt,
+        amount = amt.to_decimal(),
         description = description or "Deposit",
+        created_at = now,
     )
     db.session.add(t)
-    db.session.commit()
     return t
 
-def withdraw(account: Account, amount: float | str, description: str = "") -> Transaction:
-    amt = _to_money(amount)
-    if account.balance < amt:
+@timed
+def withdraw(account: Account, amount: Money | float | str, description: str = "") -> Transaction:
+    return _commit(_withdraw, account, _to_money(amount), description)
+
+def _withdraw(account: Account, amt: Money, description: str) -> Transaction:
+    now = datetime.utcnow()
+    balance = _adjust_balance(account, -amt)
+    if balance is None:
         abort(400, description = "Insufficient funds")
-    account.balance -= amt
+    record_balances({account.id: balance.to_decimal()}, now.date())
+    account_cache.invalidate_on_commit(db.session, account.user_id)
     t = Transaction(
         account_id = account.id,
         kind = "withdraw",
-        amount = amt,
+        amount = amt.to_decimal(),
         description = description or "Withdraw",
+        created_at = now,
     )
     db.session.add(t)
-    db.session.commit()
     return t
 
-def transfer(src: Account, dst: Account, amount: float | str, description: str = "") -> Transaction:
-    # reuse your positive-amount helper if you have it
-    amt = Transaction.as_decimal(amount)
-    if amt <= Decimal("0.00"):
-        abort(400, description="Amount must be positive")
+# Transfers retry on deadlock / serialization failure with full-jitter backoff.
+TRANSFER_MAX_ATTEMPTS = 5
+TRANSFER_BACKOFF_BASE = 0.01    # seconds
+TRANSFER_BACKOFF_CAP = 0.25
+
+_RETRYABLE_SQLSTATES = {"40001", "40P01"}   # serialization_failure, deadlock_detected
+
+
+class TransferStats:
+    """Process-wide transfer counters (retries, lock waits). Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.attempts = 0
+            self.retries = 0
+            self.failures = 0
+            self.lock_wait_seconds = 0.0
+            self.max_lock_wait_seconds = 0.0
+
+    def record_attempt(self, lock_wait: float) -> None:
+        with self._lock:
+            self.attempts += 1
+            self.lock_wait_seconds += lock_wait
+            self.max_lock_wait_seconds = max(self.max_lock_wait_seconds, lock_wait)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "lock_wait_seconds": self.lock_wait_seconds,
+                "max_lock_wait_seconds": self.max_lock_wait_seconds,
+            }
+
+
+transfer_stats = TransferStats()
+
+
+def _is_retryable(err: DBAPIError) -> bool:
+    orig = err.orig
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code in _RETRYABLE_SQLSTATES:
+        return True
+    message = str(orig).lower()
+    return "deadlock" in message or "database is locked" in message
+
+def _transfer_once(src: Account, dst: Account, amt: Money, description: str) -> Transaction:
+    # Lock both rows in ascending id order so opposite-direction transfers
+    # over the same pair queue up instead of deadlocking (no-op on SQLite,
+    # which serializes writers anyway).
+    stmt = select(Account.id, Account.user_id).where(Account.id.in_([src.id, dst.id])).order_by(Account.id)
+    if db.session.get_bind().dialect.name in {"postgresql", "mysql"}:
+        stmt = stmt.with_for_update()
+    started = time.perf_counter()
+    owners = dict(db.session.execute(stmt).all())
+    transfer_stats.record_attempt(time.perf_counter() - started)
+
+    if src.id not in owners or dst.id not in owners:
+        abort(404, description="Account not found")
+
+    if owners[src.id] != owners[dst.id]:
+        abort(403, description="Cross-user transfer not allowed")
+
+    now = datetime.utcnow()
+    src_balance = _adjust_balance(src, -amt)
+    if src_balance is None:
+        abort(400, description="Insufficient funds")
+    dst_balance = _adjust_balance(dst, amt)
+    record_balances({src.id: src_balance.to_decimal(), dst.id: dst_balance.to_decimal()}, now.date())
+    account_cache.invalidate_on_commit(db.session, owners[src.id])
+
+    # Ledger entries
+    t1 = Transaction(
+        account_id=src.id,
+        kind="transfer",
+        amount=amt.to_decimal(),
+        description=description or f"To {dst.id}",
+        related_account_id=dst.id,
+        created_at=now,
+    )
+    t2 = Transaction(
+        account_id=dst.id,
+        kind="deposit",
+        amount=amt.to_decimal(),
+        description=f"From {src.id}",
+        related_account_id=src.id,
+        created_at=now,
+    )
+    db.session.add_all([t1, t2])
+    return t1
+
+@timed
+def transfer(src: Account, dst: Account, amount: Money | float | str, description: str = "") -> Transaction:
+    amt = _to_money(amount)
 
     if src.id == dst.id:
         abort(400, description="Cannot transfer to the same account")
 
-    try:
-        # Safe inside or outside an existing transaction
-        with db.session.begin_nested():
-            # Lock rows when supported (no-op on SQLite)
-            dialect = db.session.get_bind().dialect.name
-            if dialect in {"postgresql", "mysql"}:
-                db.session.execute(
-                    select(Account)
-                    .where(Account.id.in_([src.id, dst.id]))
-                    .with_for_update()
-                )
-
-            # Reload fresh instances within this tx
-            src_ref = db.session.get(Account, src.id)
-            dst_ref = db.session.get(Account, dst.id)
-            if src_ref is None or dst_ref is None:
-                abort(404, description="Account not found")
-
-            if src_ref.user_id != dst_ref.user_id:
-                abort(403, description="Cross-user transfer not allowed")
-
-            if src_ref.balance < amt:
-                abort(400, description="Insufficient funds")
-
-            # Apply updates
-            src_ref.balance = src_ref.balance - amt
-            dst_ref.balance = dst_ref.balance + amt
-
-            # Ledger entries
-            t1 = Transaction(
-                account_id=src_ref.id,
-                kind="transfer",
-                amount=amt,
-                description=description or f"To {dst_ref.id}",
-                related_account_id=dst_ref.id,
-            )
-            t2 = Transaction(
-                account_id=dst_ref.id,
-                kind="deposit",
-                amount=amt,
-                description=f"From {src_ref.id}",
-                related_account_id=src_ref.id,
-            )
-            db.session.add_all([t1, t2])
-
-        # Commit the outer transaction (or the implicit one)
-        db.session.commit()
-        return t1
+    for attempt in range(TRANSFER_MAX_ATTEMPTS):
+        try:
+            return _commit(_transfer_once, src, dst, amt, description)
+        except IntegrityError:
+            db.session.rollback()
+            transfer_stats.record_failure()
+            abort(500, description="Transfer failed")
+        except DBAPIError as e:
+            db.session.rollback()
+            if not _is_retryable(e) or attempt == TRANSFER_MAX_ATTEMPTS - 1:
+                transfer_stats.record_failure()
+                abort(503, description="Transfer failed, please retry")
+            transfer_stats.record_retry()
+            time.sleep(random.uniform(0, min(TRANSFER_BACKOFF_CAP, TRANSFER_BACKOFF_BASE * 2 ** attempt)))
+
+
+def apply_batch(user_id: int, ops: list[dict], atomic: bool = True) -> list[tuple[TransactionRow | None, str | None]]:
+    """Apply many deposit/withdraw/transfer ops in one DB transaction.
+
+    ``ops`` are ``TransactionCreateSchema`` payloads. Every account involved
+    is locked once, in id order, then ops are checked in order against
+    running balances. Ledger rows go in with one executemany INSERT and
+    balances with one executemany UPDATE, followed by a single commit.
+
+    Returns ``(row, None)`` or ``(None, error)`` per op. With ``atomic`` any
+    error rejects the whole batch (nothing is written); otherwise failing ops
+    are skipped and the rest are applied.
+    """
+    ids = sorted({op["account_id"] for op in ops} | {op["related_account_id"] for op in ops if op.get("related_account_id")})
+
+    cents = cents_storage()
+    column = Account.balance_cents if cents else Account.balance
+    stmt = select(Account.id, Account.user_id, column).where(Account.id.in_(ids)).order_by(Account.id)
+    if db.session.get_bind().dialect.name in {"postgresql", "mysql"}:
+        stmt = stmt.with_for_update()
+    owners: dict[int, int] = {}
+    balances: dict[int, Money] = {}
+    for acct_id, owner_id, balance in db.session.execute(stmt):
+        owners[acct_id] = owner_id
+        balances[acct_id] = Money(balance) if cents else Money.parse(balance)
+
+    def check(acct_id: int) -> str | None:
+        if acct_id not in owners:
+            return "Account not found"
+        if owners[acct_id] != user_id:
+            return "Forbidden"
+        return None
+
+    errors: list[str | None] = []
+    rows: list[dict] = []
+    row_index: list[int] = []   # which ledger row answers each op
+    for op in ops:
+        kind = op["kind"]
+        src = op["account_id"]
+        dst = op.get("related_account_id")
+        amt = Money.parse(op["amount"])
+        description = op.get("description") or ""
+
+        error = check(src) or (check(dst) if kind == "transfer" else None)
+        if error is None and kind == "transfer" and src == dst:
+            error = "Cannot transfer to the same account"
+        if error is None and kind != "deposit" and balances[src] < amt:
+            error = "Insufficient funds"
+        errors.append(error)
+        if error is not None:
+            row_index.append(-1)
+            continue
+
+        row_index.append(len(rows))
+        if kind == "deposit":
+            balances[src] += amt
+            rows.append(dict(account_id = src, kind = kind, amount = amt, amount_cents = amt.cents, description = description or "Deposit", related_account_id = None))
+        elif kind == "withdraw":
+            balances[src] -= amt
+            rows.append(dict(account_id = src, kind = kind, amount = amt, amount_cents = amt.cents, description = description or "Withdraw", related_account_id = None))
+        else:
+            balances[src] -= amt
+            balances[dst] += amt
+            rows.append(dict(account_id = src, kind = "transfer", amount = amt, amount_cents = amt.cents, description = description or f"To {dst}", related_account_id = dst))
+            rows.append(dict(account_id = dst, kind = "deposit", amount = amt, amount_cents = amt.cents, description = f"From {src}", related_account_id = src))
+
+    if not rows or (atomic and any(errors)):
+        db.session.rollback()   # release the row locks
+        return [(None, e or "Batch rejected") for e in errors]
+
+    now = datetime.utcnow()
+    for r in rows:
+        r["created_at"] = now
+        r["amount"] = r["amount"].to_decimal()   # bulk paths skip the cents validators
+    touched = sorted({r["account_id"] for r in rows})
+    closing = {i: balances[i].to_decimal() for i in touched}
+    db.session.execute(
+        update(Account),
+        [{"id": i, "balance": closing[i], "balance_cents": balances[i].cents} for i in touched],
+    )
+    record_balances(closing, now.date())
+    inserted = db.session.execute(
+        insert(Transaction)
+        .returning(*(getattr(Transaction, f) for f in TransactionRow._fields), sort_by_parameter_order = True),
+        rows,
+    ).all()
+    account_cache.invalidate_on_commit(db.session, user_id)
+    db.session.commit()
 
-    except IntegrityError:
-        db.session.rollback()
-        abort(500, description="Transfer failed")
\ No newline at end of file
+    return [
+        (None, error) if error else (TransactionRow._make(inserted[i]), None)
+        for error, i in zip(errors, row_index)
+    ]
@@ -0,0 +1,191 @@
+# snapshots.py (per-account daily closing balances)
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from .extensions import db
+from .models import Account, BalanceSnapshot, Transaction
+
+# Ledger sign: a "deposit" row credits its account, withdraw/transfer debit it.
+SIGNED_AMOUNT = case((Transaction.kind == "deposit", Transaction.amount), else_=-Transaction.amount)
+
+
+def record_balances(balances: dict[int, Decimal], day: date) -> None:
+    """Upsert ``day``'s closing balance per account, in the caller's transaction.
+
+    Callers hold the account row locks (or SQLite's write lock), so the last
+    writer for a day is also the latest balance.
+    """
+    if not balances:
+        return
+    _upsert([{"account_id": a, "day": day, "balance": b} for a, b in sorted(balances.items())])
+
+
+def _upsert(values: list[dict]) -> None:
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(BalanceSnapshot).values(values)
+        stmt = stmt.on_duplicate_key_update(balance=stmt.inserted.balance)
+    else:
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(BalanceSnapshot).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["account_id", "day"],
+            set_={"balance": stmt.excluded.balance},
+        )
+    db.session.execute(stmt)
+
+
+def record_closes(before: datetime, *, lo: int | None = None, hi: int | None = None) -> int:
+    """Write the closing balance of every day before ``before`` that has
+    ledger rows, for accounts with ``lo <= id < hi`` (all by default).
+
+    Each close is the account's balance minus its rows from later days, so
+    this has to run while those days' rows are still in the ledger: just
+    before they're archived or detached. :func:`rebuild` keeps the
+    snapshots older than an account's live ledger. Doesn't commit.
+    """
+    in_range = [] if lo is None else [Account.id >= lo, Account.id < hi]
+    balances = dict(db.session.execute(select(Account.id, Account.balance).where(*in_range)).all())
+    day_col = func.date(Transaction.created_at)
+    net = db.session.execute(
+        select(Transaction.account_id, day_col, func.sum(SIGNED_AMOUNT))
+        .where(*([] if lo is None else [Transaction.account_id >= lo, Transaction.account_id < hi]))
+        .group_by(Transaction.account_id, day_col)
+        .order_by(Transaction.account_id, day_col.desc())
+    )
+    last_day = (before - timedelta(microseconds=1)).date()
+    values, acct_id, running = [], None, Decimal("0.00")
+    for account_id, day, amount in net:
+        if account_id != acct_id:
+            acct_id, running = account_id, Transaction.as_decimal(balances[account_id])
+        day = date.fromisoformat(day) if isinstance(day, str) else day
+        if day <= last_day:
+            values.append({"account_id": account_id, "day": day, "balance": running})
+        running -= Transaction.as_decimal(amount)
+    for start in range(0, len(values), 1000):
+        _upsert(values[start:start + 1000])
+    return len(values)
+
+
+def balance_as_of(account: Account, as_of: datetime) -> Decimal:
+    """Balance just before ``as_of``: one snapshot plus at most one day of ledger."""
+    if as_of <= account.created_at:
+        return Decimal("0.00")
+
+    day = as_of.date()
+    snap = db.session.execute(
+        select(BalanceSnapshot.day, BalanceSnapshot.balance)
+        .where(BalanceSnapshot.account_id == account.id, BalanceSnapshot.day <= day)
+        .order_by(BalanceSnapshot.day.desc())
+        .limit(1)
+    ).first()
+    if snap is None:
+        return Decimal("0.00")
+    if snap.day < day:
+        return Transaction.as_decimal(snap.balance)
+
+    # Snapshot is that day's close: back out the rows from as_of to midnight.
+    later = db.session.execute(
+        select(func.coalesce(func.sum(SIGNED_AMOUNT), 0)).where(
+            Transaction.account_id == account.id,
+            Transaction.created_at >= as_of,
+            Transaction.created_at < datetime.combine(day + timedelta(days=1), time.min),
+        )
+    ).scalar_one()
+    return Transaction.as_decimal(snap.balance) - Transaction.as_decimal(later)
+
+
+def statement(account: Account, year: int, month: int) -> dict:
+    """Opening/closing balance for a calendar month plus each day's close."""
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    daily = db.session.execute(
+        select(BalanceSnapshot.day, BalanceSnapshot.balance)
+        .where(
+            BalanceSnapshot.account_id == account.id,
+            BalanceSnapshot.day >= start.date(),
+            BalanceSnapshot.day < end.date(),
+        )
+        .order_by(BalanceSnapshot.day)
+    ).all()
+    return {
+        "account_id": account.id,
+        "month": f"{year:04d}-{month:02d}",
+        "opening_balance": balance_as_of(account, start),
+        "closing_balance": balance_as_of(account, end),
+        "daily": [{"day": d, "balance": Transaction.as_decimal(b)} for d, b in daily],
+    }
+
+
+def rebuild(chunk_size: int = 500) -> int:
+    """Recompute every snapshot from the ledger, ``chunk_size`` accounts at a time.
+
+    Each pass is one GROUP BY (account, day) over the chunk's ledger, one
+    DELETE and one bulk INSERT, then a commit. Opening balances have no
+    ledger entry, so each account's starting point is its current balance
+    minus its ledger total. Rows archived or detached out of the ledger
+    are folded into that opening balance, so snapshots from before an
+    account's earliest live row (see :func:`record_closes`) are kept as
+    they are; the opening row is only written when there are none. Run it while writes are quiet; a
+    concurrent deposit can be overwritten until its account is touched again.
+    """
+    day_col = func.date(Transaction.created_at)
+    last_id = 0
+    written = 0
+    while True:
+        accounts = db.session.execute(
+            select(Account.id, Account.balance, Account.created_at)
+            .where(Account.id > last_id)
+            .order_by(Account.id)
+            .limit(chunk_size)
+        ).all()
+        if not accounts:
+            return written
+        ids = [a.id for a in accounts]
+        last_id = ids[-1]
+
+        per_account: dict[int, list[tuple[date, Decimal]]] = defaultdict(list)
+        net = db.session.execute(
+            select(Transaction.account_id, day_col, func.sum(SIGNED_AMOUNT))
+            .where(Transaction.account_id.in_(ids))
+            .group_by(Transaction.account_id, day_col)
+            .order_by(Transaction.account_id, day_col)
+        )
+        for acct_id, day, amount in net:
+            day = date.fromisoformat(day) if isinstance(day, str) else day
+            per_account[acct_id].append((day, Transaction.as_decimal(amount)))
+
+        kept: dict[int, list[dict]] = defaultdict(list)
+        existing = db.session.execute(
+            select(BalanceSnapshot.account_id, BalanceSnapshot.day, BalanceSnapshot.balance)
+            .where(BalanceSnapshot.account_id.in_(ids))
+            .order_by(BalanceSnapshot.account_id, BalanceSnapshot.day)
+        )
+        for acct_id, day, balance in existing:
+            days = per_account.get(acct_id)
+            if not days or day < days[0][0]:
+                kept[acct_id].append({"account_id": acct_id, "day": day, "balance": balance})
+
+        rows = []
+        for a in accounts:
+            days = per_account.get(a.id, [])
+            running = Transaction.as_decimal(a.balance) - sum((amt for _, amt in days), Decimal("0.00"))
+            opened = a.created_at.date()
+            if kept[a.id]:
+                rows.extend(kept[a.id])
+            elif not days or days[0][0] > opened:
+                rows.append({"account_id": a.id, "day": opened, "balance": running})
+            for day, amount in days:
+                running += amount
+                rows.append({"account_id": a.id, "day": day, "balance": running})
+
+        db.session.execute(delete(BalanceSnapshot).where(BalanceSnapshot.account_id.in_(ids)))
+        if rows:
+            db.session.execute(insert(BalanceSnapshot), rows)
+        db.session.commit()
+        written += len(rows)
@@ -1,17 +1,36 @@
 # wsgi.py
 import os
 from app import create_app
-from flask_migrate import upgrade
 
 app = create_app()
 
-RUN_DB_MIGRATIONS = os.getenv("RUN_DB_MIGRATIONS", "1")
-db_uri = os.getenv("SQLALCHEMY_DATABASE_URI", "")
 
-if RUN_DB_MIGRATIONS == "1" and db_uri.startswith(("postgresql+psycopg://", "postgresql+psycopg:")):
+def upgrade_database() -> None:
+    """Apply pending migrations when RUN_DB_MIGRATIONS=1 (the default) on Postgres.
+
+    Runs once per deploy from the gunicorn master before any worker forks
+    (gunicorn.conf.py), so workers neither pay for Alembic nor race each
+    other on the upgrade. Also tops up the ledger's future monthly
+    partitions. Other servers: run ``flask db upgrade`` first.
+    """
+    if os.getenv("RUN_DB_MIGRATIONS", "1") != "1":
+        return
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql+psycopg"):
+        return
+
+    from flask_migrate import upgrade
+    from app.extensions import db, init_migrate
+
     with app.app_context():
+        init_migrate(app)
         try:
             upgrade()
             print("Database upgraded on startup")
+            from app.partitions import ensure_partitions
+
+            for name in ensure_partitions(app.config["LEDGER_PARTITIONS_AHEAD"]):
+                print(f"Created ledger partition {name}")
         except Exception as e:
             print(f"Could not run migrations: {e}")
+        finally:
+            db.engine.dispose()   # don't hand the master's connections to forked workers
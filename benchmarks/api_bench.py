@@ -0,0 +1,358 @@
+# api_bench.py
+"""Latency/throughput benchmark for every API and HTML route.
+
+    python benchmarks/api_bench.py --transactions 1000000 --users 200 \\
+        --mode both --workers 4 --concurrency 8 --out bench.json
+    python benchmarks/api_bench.py ... --compare bench-main.json
+
+    # sync vs threaded workers with a 5 ms simulated DB round trip
+    python benchmarks/api_bench.py --mode gunicorn --only api. --threads 1 \
+        --db-latency-ms 5 --concurrency 32 --out sync.json
+    python benchmarks/api_bench.py --mode gunicorn --only api. --threads 8 \
+        --db-latency-ms 5 --concurrency 32 --out gthread.json --compare sync.json
+
+Seeds a throwaway SQLite file with bulk inserts (benchmarks/seed.py), then
+drives each endpoint through the Flask test client (in-process, one
+request at a time) and/or a local multi-worker gunicorn (``--concurrency``
+logged-in clients over HTTP). Reports p50/p95/p99 latency, throughput and
+peak RSS, and writes everything as JSON; ``--compare`` prints the p95 and
+throughput change per endpoint against an earlier results file.
+``--threads`` picks gunicorn's worker class the same way gunicorn.conf.py
+does (1 = sync, more = gthread); ``--db-latency-ms`` serves
+benchmarks/slow_wsgi.py instead of app.wsgi to mimic a remote database.
+"""
+from __future__ import annotations
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import re
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.extensions import db  # noqa: E402
+from benchmarks.seed import PASSWORD, seed  # noqa: E402
+
+# (name, method, path, form-or-json body); {a}/{b} are two of the user's accounts
+ENDPOINTS = [
+    ("main.index", "GET", "/", None),
+    ("main.transactions_list", "GET", "/transactions", None),
+    ("main.new_account", "GET", "/accounts/new", None),
+    ("main.deposit_view", "GET", "/deposit", None),
+    ("main.deposit_view", "POST", "/deposit", {"form": {"account_id": "{a}", "amount": "1.00"}}),
+    ("main.withdraw_view", "GET", "/withdraw", None),
+    ("main.withdraw_view", "POST", "/withdraw", {"form": {"account_id": "{a}", "amount": "0.01"}}),
+    ("main.transfer_view", "GET", "/transfer", None),
+    ("main.transfer_view", "POST", "/transfer", {"form": {"src": "{a}", "dst": "{b}", "amount": "0.01"}}),
+    ("main.new_account", "POST", "/accounts/new", {"form": {"name": "Bench", "type": "Savings", "opening": "0"}}),
+    ("api.list_accounts", "GET", "/api/accounts", None),
+    ("api.account_balance", "GET", "/api/accounts/{a}/balance", None),
+    ("api.account_statement", "GET", "/api/accounts/{a}/statement?month={month}", None),
+    ("api.list_transactions", "GET", "/api/transactions?limit=50", None),
+    ("api.list_transactions", "GET", "/api/transactions?limit=500&kind=deposit", None),
+    ("api.export_transactions", "GET", "/api/transactions/export?format=ndjson", None),
+    ("api.analytics_summary", "GET", "/api/analytics/summary?granularity=month", None),
+    ("api.deposit_api", "POST", "/api/transactions/deposit", {"json": {"account_id": "{a}", "amount": "1.00"}}),
+    ("api.withdraw_api", "POST", "/api/transactions/withdraw", {"json": {"account_id": "{a}", "amount": "0.01"}}),
+    ("api.transfer_api", "POST", "/api/transactions/transfer", {"json": {"src": "{a}", "dst": "{b}", "amount": "0.01"}}),
+    ("api.batch_api", "POST", "/api/transactions/batch",
+     {"json": {"operations": [{"account_id": "{a}", "kind": "deposit", "amount": "0.01"}] * 50}}),
+    ("api.create_account_api", "POST", "/api/accounts", {"json": {"name": "Bench", "type": "Checking"}}),
+]
+
+
+def _fill(value, ids: dict):
+    if isinstance(value, str):
+        filled = value.format(**ids)
+        return int(filled) if value in ("{a}", "{b}") else filled
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, ids) for v in value]
+    return value
+
+
+def _ids(accounts: list[int]) -> dict:
+    return {"a": accounts[0], "b": accounts[-1], "month": datetime.utcnow().strftime("%Y-%m")}
+
+
+def summarize(latencies: list[float], errors: int, wall: float) -> dict:
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0, 0, 0)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+    }
+
+
+# -- Flask test client -------------------------------------------------------
+def run_test_client(app, users, requests: int, endpoints: list) -> list[dict]:
+    results = []
+    _, email, accounts = users[0]
+    client = app.test_client()
+    client.post("/auth/login", data={"email": email, "password": PASSWORD})
+    ids = _ids(accounts)
+    for name, method, path, body in endpoints:
+        kwargs = {}
+        if body:
+            kwargs = {"data": _fill(body["form"], ids)} if "form" in body else {"json": _fill(body["json"], ids)}
+        url = path.format(**ids)
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            resp = client.open(url, method=method, **kwargs)
+            resp.get_data()
+            latencies.append(time.perf_counter() - t0)
+            errors += resp.status_code >= 400
+        wall = time.perf_counter() - started
+        results.append({"mode": "test_client", "endpoint": name, "method": method, "path": url,
+                        **summarize(latencies, errors, wall)})
+        print(_line(results[-1]))
+    return results
+
+
+# -- gunicorn over HTTP --------------------------------------------------------
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None   # time the view itself, not the page it redirects to
+
+
+class HttpClient:
+    def __init__(self, base: str, email: str):
+        self.base = base
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect
+        )
+        page = self.opener.open(f"{base}/auth/login").read().decode()
+        self.csrf = re.search(r'name="csrf_token" value="([^"]+)"', page).group(1)
+        self.request("POST", "/auth/login", {"form": {"email": email, "password": PASSWORD}})
+
+    def request(self, method: str, path: str, body: dict | None) -> int:
+        data, headers = None, {}
+        if body and "form" in body:
+            data = urllib.parse.urlencode({**body["form"], "csrf_token": self.csrf}).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif body:
+            data = json.dumps(body["json"]).encode()
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.base + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _descendants(pid: int) -> list[int]:
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+    found, frontier = [], [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [p for p, pp in parents.items() if pp == parent]
+        found += children
+        frontier += children
+    return found
+
+
+def _peak_rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def run_gunicorn(db_path: str, users, requests: int, endpoints: list, *, workers: int, threads: int,
+                 concurrency: int, db_latency_ms: float) -> tuple[list[dict], dict]:
+    port = _free_port()
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}", SECRET_KEY="bench",
+               RUN_DB_MIGRATIONS="0", PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(),
+               GUNICORN_THREADS=str(threads), BENCH_DB_LATENCY_MS=str(db_latency_ms))
+    target = "benchmarks.slow_wsgi:app" if db_latency_ms else "app.wsgi:app"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", target],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base}/ping").read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        clients = [(HttpClient(base, email), _ids(accounts)) for _, email, accounts in
+                   (users[i % len(users)] for i in range(concurrency))]
+
+        results = []
+        for name, method, path, body in endpoints:
+            latencies, errors, lock = [], [0], threading.Lock()
+            per_client = max(1, requests // concurrency)
+
+            def drive(client: HttpClient, ids: dict) -> None:
+                filled = _fill(body, ids) if body else None
+                url = path.format(**ids)
+                mine, bad = [], 0
+                for _ in range(per_client):
+                    t0 = time.perf_counter()
+                    status = client.request(method, url, filled)
+                    mine.append(time.perf_counter() - t0)
+                    bad += status >= 400
+                with lock:
+                    latencies.extend(mine)
+                    errors[0] += bad
+
+            threads = [threading.Thread(target=drive, args=c) for c in clients]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            wall = time.perf_counter() - started
+            results.append({"mode": "gunicorn", "endpoint": name, "method": method, "path": path,
+                            **summarize(latencies, errors[0], wall)})
+            print(_line(results[-1]))
+
+        rss = {str(p): _peak_rss_mb(p) for p in [proc.pid, *_descendants(proc.pid)]}
+        return results, rss
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+# -- reporting -----------------------------------------------------------------
+def _line(r: dict) -> str:
+    return (f"{r['mode']:<11} {r['method']:<4} {r['endpoint']:<26} p50 {r['p50_ms']:8.2f}ms  "
+            f"p95 {r['p95_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  {r['rps']:8.1f} req/s  errors {r['errors']}")
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["mode"], r["method"], r["endpoint"], r["path"])  # noqa: E731
+    before = {key(r): r for r in baseline["results"]}
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit', '?')[:12]})")
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None or not old["p95_ms"] or not old["rps"]:
+            continue
+        dp95 = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        drps = (r["rps"] - old["rps"]) / old["rps"] * 100
+        flag = "  <-- slower" if dp95 > 10 else ""
+        print(f"{r['mode']:<11} {r['method']:<4} {r['endpoint']:<26} p95 {dp95:+6.1f}%  req/s {drps:+6.1f}%{flag}")
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=100_000, help="ledger rows to seed (1k..10M)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--accounts-per-user", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--mode", choices=("test_client", "gunicorn", "both"), default="test_client")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker (1 = sync workers)")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="simulated DB round trip (gunicorn mode)")
+    parser.add_argument("--only", default="", help="endpoint name prefix, e.g. 'api.'")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent HTTP clients")
+    parser.add_argument("--db", help="SQLite file to seed (default: a temp file)")
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    endpoints = [e for e in ENDPOINTS if e[0].startswith(args.only)]
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "api_bench.db")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SECRET_KEY = "bench"
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        users = seed(users=args.users, accounts_per_user=args.accounts_per_user, transactions=args.transactions)
+        seeded = time.perf_counter() - t0
+        print(f"seeded {args.users} users, {args.transactions:,} transactions in {seeded:.1f}s ({db_path})")
+        app.config["SQL_BUDGET_ENABLED"] = False   # measure the views, not the N+1 detector
+
+        report = {
+            "meta": {
+                "commit": _commit(),
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+                "seed_seconds": round(seeded, 2),
+            },
+            "results": [],
+            "peak_rss_mb": {},
+        }
+        if args.mode in ("test_client", "both"):
+            report["results"] += run_test_client(app, users, args.requests, endpoints)
+            report["peak_rss_mb"]["test_client"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if args.mode in ("gunicorn", "both"):
+        results, rss = run_gunicorn(db_path, users, args.requests, endpoints, workers=args.workers,
+                                    threads=args.threads, concurrency=args.concurrency,
+                                    db_latency_ms=args.db_latency_ms)
+        report["results"] += results
+        report["peak_rss_mb"]["gunicorn"] = rss
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"peak RSS (MB): {report['peak_rss_mb']}")
+    print(f"wrote {args.out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
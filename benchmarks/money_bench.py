@@ -0,0 +1,129 @@
+# money_bench.py
+"""Per-operation CPU of the Decimal money path vs integer-cents Money.
+
+    python benchmarks/money_bench.py --ops 200000 --rows 200000
+
+Three measurements, each run over identical inputs on both paths and
+checked for identical output:
+
+* ops     parse a request amount, add it to a balance, format both
+* schema  load an amount through the create schema's field
+* ledger  read ledger rows from SQLite and dump them with the RowDumper
+          (``MONEY_STORAGE=decimal`` vs ``cents``)
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from marshmallow import fields  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app, queries  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Account, Transaction, User  # noqa: E402
+from app.money import Money  # noqa: E402
+from app.schemas import MoneyField, transactions_row_dumper  # noqa: E402
+
+
+def amounts(n: int) -> list[str]:
+    rng = random.Random(42)
+    return [f"{rng.randrange(1, 100000)}.{rng.randrange(100):02d}" for _ in range(n)]
+
+
+def decimal_ops(raw: list[str]) -> list[tuple[str, str]]:
+    balance = Transaction.as_decimal("0")
+    out = []
+    for r in raw:
+        amt = Transaction.as_decimal(r)
+        balance += amt
+        out.append((str(amt), str(balance)))
+    return out
+
+
+def money_ops(raw: list[str]) -> list[tuple[str, str]]:
+    balance = Money(0)
+    out = []
+    for r in raw:
+        amt = Money.parse(r)
+        balance += amt
+        out.append((str(amt), str(balance)))
+    return out
+
+
+def field_loads(field: fields.Field, raw: list[str]) -> list[str]:
+    return [str(field.deserialize(r)) for r in raw]
+
+
+def timed(fn, *args):
+    started = time.process_time()
+    result = fn(*args)
+    return time.process_time() - started, result
+
+
+def report(label: str, n: int, legacy, new) -> None:
+    (l_time, l_out), (n_time, n_out) = legacy, new
+    assert l_out == n_out, f"{label}: decimal and cents paths disagree"
+    print(f"{label:<7} decimal {l_time / n * 1e6:6.2f} us/op   cents {n_time / n * 1e6:6.2f} us/op   ({l_time / n_time:.2f}x)")
+
+
+def ledger(rows: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "money_bench.db")
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        ACCOUNT_CACHE_BACKEND = "null"
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="bench@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        acct = Account(user_id=user.id, name="A", type="Checking", balance=0)
+        db.session.add(acct)
+        db.session.flush()
+        now = datetime.utcnow()
+        data = [Money.parse(a) for a in amounts(rows)]
+        db.session.execute(
+            insert(Transaction),
+            [{"account_id": acct.id, "kind": "deposit", "amount": m.to_decimal(), "amount_cents": m.cents,
+              "description": "d", "created_at": now} for m in data],
+        )
+        db.session.commit()
+
+        def dump(mode: str) -> list[dict]:
+            app.config["MONEY_STORAGE"] = mode
+            out = []
+            for chunk in queries.iter_transactions(user.id, chunk_size=1000):
+                out.extend(transactions_row_dumper.dump(chunk))
+            return out
+
+        dump("decimal")   # warm the page cache
+        report("ledger", rows, timed(dump, "decimal"), timed(dump, "cents"))
+    os.remove(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=200_000)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    raw = amounts(args.ops)
+    report("ops", args.ops, timed(decimal_ops, raw), timed(money_ops, raw))
+    legacy = fields.Decimal(as_string=True, places=2)
+    report("schema", args.ops, timed(field_loads, legacy, raw), timed(field_loads, MoneyField(), raw))
+    ledger(args.rows)
+
+
+if __name__ == "__main__":
+    main()
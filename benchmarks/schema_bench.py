@@ -0,0 +1,69 @@
+# schema_bench.py
+"""Ledger serialization: marshmallow schema vs the RowDumper.
+
+    python benchmarks/schema_bench.py --rows 100000 --repeat 3
+
+Dumps the same ``--rows`` transaction rows through
+``transactions_schema`` (from objects, as the ORM path did) and through
+``transactions_row_dumper`` (from plain row tuples), checks the output is
+identical and reports the best of ``--repeat`` runs for each.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas import transactions_row_dumper, transactions_schema  # noqa: E402
+
+
+def rows(n: int) -> list[tuple]:
+    amounts = (Decimal("1.00"), Decimal("12.345"), Decimal("0.005"), "7.1", 3, Decimal("9999999999.99"))
+    return [
+        (
+            i,
+            i % 7 + 1,
+            ("deposit", "withdraw", "transfer")[i % 3],
+            amounts[i % len(amounts)],
+            None if i % 4 == 0 else f"tx {i}",
+            None if i % 2 else i + 1,
+            datetime(2025, 1, 1, 12, 30, i % 60, (i * 37) % 1_000_000),
+        )
+        for i in range(n)
+    ]
+
+
+def best_of(repeat: int, fn, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = rows(args.rows)
+    objs = [SimpleNamespace(**dict(zip(transactions_row_dumper.fields, r))) for r in data]
+    marshmallow_s, expected = best_of(args.repeat, transactions_schema.dump, objs)
+    dumper_s, actual = best_of(args.repeat, transactions_row_dumper.dump, data)
+    assert actual == expected, "row dumper and marshmallow disagree"
+    print(
+        f"{args.rows} rows  marshmallow {marshmallow_s:.3f}s  row dumper {dumper_s:.3f}s  "
+        f"({marshmallow_s / dumper_s:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
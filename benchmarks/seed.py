@@ -0,0 +1,103 @@
+# seed.py
+"""Bulk-seed synthetic users, accounts and ledgers for the benchmarks.
+
+Everything goes in with executemany INSERTs in chunks (never through
+``services``), with balances, cents columns and opening balances filled
+in so the data reconciles. Needs an app context.
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert, select, update
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import Account, Transaction, User
+
+PASSWORD = "bench-password"
+OPENING_CENTS = 100_000
+
+
+def seed(*, users: int, accounts_per_user: int, transactions: int, chunk: int = 50_000,
+         days: int = 365, seed: int = 42) -> list[tuple[int, str, list[int]]]:
+    """Returns ``[(user_id, email, [account ids]), ...]``."""
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD)   # hashing is slow; share one
+    now = datetime.utcnow().replace(microsecond=0)
+    opened = now - timedelta(days=days)
+
+    for lo in range(0, users, chunk):
+        db.session.execute(insert(User), [
+            {"email": f"bench{i}@example.com", "password_hash": password_hash, "created_at": opened}
+            for i in range(lo, min(users, lo + chunk))
+        ])
+    seeded = db.session.execute(
+        select(User.id, User.email).where(User.email.like("bench%@example.com")).order_by(User.id)
+    ).all()
+    user_ids = [u for u, _ in seeded]
+
+    rows = [
+        {"user_id": u, "name": f"Account {j}", "type": ("Checking", "Savings")[j % 2],
+         "balance": Decimal(OPENING_CENTS).scaleb(-2), "balance_cents": OPENING_CENTS,
+         "opening_cents": OPENING_CENTS, "created_at": opened}
+        for u in user_ids for j in range(accounts_per_user)
+    ]
+    for lo in range(0, len(rows), chunk):
+        db.session.execute(insert(Account), rows[lo:lo + chunk])
+    owned: dict[int, list[int]] = {u: [] for u in user_ids}
+    for acct_id, user_id in db.session.execute(
+        select(Account.id, Account.user_id).where(Account.user_id.in_(user_ids)).order_by(Account.id)
+    ):
+        owned[user_id].append(acct_id)
+    db.session.commit()
+
+    balances = {a: OPENING_CENTS for ids in owned.values() for a in ids}
+    groups = list(owned.values())
+    span = days * 86400
+    batch: list[dict] = []
+
+    def flush() -> None:
+        if batch:
+            db.session.execute(insert(Transaction), batch)
+            db.session.commit()
+            batch.clear()
+
+    written = 0
+    while written < transactions:
+        ids = rng.choice(groups)
+        src = rng.choice(ids)
+        cents = rng.randint(1, 20_000)
+        when = opened + timedelta(seconds=rng.randrange(span))
+        kind = rng.choice(("deposit", "withdraw", "transfer")) if len(ids) > 1 else rng.choice(("deposit", "withdraw"))
+        amount = Decimal(cents).scaleb(-2)
+        if kind != "deposit" and balances[src] < cents:
+            kind = "deposit"   # keep every balance non-negative
+        if kind == "transfer" and written + 2 <= transactions:
+            dst = rng.choice([a for a in ids if a != src])
+            balances[src] -= cents
+            balances[dst] += cents
+            batch.append({"account_id": src, "kind": "transfer", "amount": amount, "amount_cents": cents,
+                          "description": f"To {dst}", "related_account_id": dst, "created_at": when})
+            batch.append({"account_id": dst, "kind": "deposit", "amount": amount, "amount_cents": cents,
+                          "description": f"From {src}", "related_account_id": src, "created_at": when})
+            written += 2
+        else:
+            kind = "withdraw" if kind == "withdraw" else "deposit"
+            balances[src] += cents if kind == "deposit" else -cents
+            batch.append({"account_id": src, "kind": kind, "amount": amount, "amount_cents": cents,
+                          "description": kind.title(), "related_account_id": None, "created_at": when})
+            written += 1
+        if len(batch) >= chunk:
+            flush()
+    flush()
+
+    items = sorted(balances.items())
+    for lo in range(0, len(items), chunk):
+        db.session.execute(update(Account), [
+            {"id": a, "balance": Decimal(c).scaleb(-2), "balance_cents": c} for a, c in items[lo:lo + chunk]
+        ])
+    db.session.commit()
+    return [(u, email, owned[u]) for u, email in seeded]
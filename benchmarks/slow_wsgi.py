@@ -0,0 +1,21 @@
+# slow_wsgi.py
+"""``app.wsgi:app`` plus BENCH_DB_LATENCY_MS of sleep before every statement.
+
+Stands in for the network round trip to a real Postgres when api_bench.py
+runs gunicorn against SQLite, which is where sync and threaded workers
+differ.
+"""
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.wsgi import app  # noqa: F401
+
+LATENCY = float(os.getenv("BENCH_DB_LATENCY_MS", "0")) / 1000
+
+if LATENCY:
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _round_trip(conn, cursor, statement, parameters, context, executemany) -> None:
+        time.sleep(LATENCY)
@@ -0,0 +1,177 @@
+# startup_bench.py
+"""Cold-start cost of the app: import time per module and gunicorn boot.
+
+    python benchmarks/startup_bench.py --runs 5 --out startup.json
+    python benchmarks/startup_bench.py --compare startup-main.json
+
+Import times come from ``python -X importtime -c "import app.wsgi"`` in a
+fresh interpreter per run (median of ``--runs``), cumulative per module:
+every top-level import, every ``app.*`` module and the ``--top`` heaviest
+overall. The gunicorn part boots ``--workers`` workers with and without
+``preload_app`` and records time until the first /ping answers plus the
+summed PSS / private memory of master and workers, which is where
+copy-on-write sharing shows up.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.api_bench import _commit, _descendants, _free_port  # noqa: E402
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(runs: int, env: dict) -> tuple[dict, dict]:
+    """Median cumulative import time (ms) per module, and per-run totals."""
+    samples: dict[str, list[float]] = {}
+    depth: dict[str, int] = {}
+    totals = []
+    code = "import time; t = time.perf_counter(); import app.wsgi; print(time.perf_counter() - t)"
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        totals.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+        for line in out.stderr.splitlines():
+            m = _LINE.match(line)
+            if m:
+                samples.setdefault(m.group(4), []).append(int(m.group(2)) / 1000)
+                depth[m.group(4)] = len(m.group(3)) // 2
+    modules = {name: {"cumulative_ms": round(statistics.median(v), 2), "depth": depth[name]}
+               for name, v in samples.items()}
+    return modules, {"median_ms": round(statistics.median(totals), 1), "runs_ms": [round(t, 1) for t in totals]}
+
+
+def _memory_kb(pid: int) -> dict:
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    fields[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+def gunicorn_boot(workers: int, preload: bool, env: dict, requests: int) -> dict:
+    port = _free_port()
+    env = dict(env, GUNICORN_PRELOAD="1" if preload else "0", PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp())
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "app.wsgi:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        ready = None
+        for _ in range(600):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/ping").read()
+                ready = time.perf_counter() - started
+                break
+            except OSError:
+                time.sleep(0.01)
+        # let every worker serve something (touching the pages it needs)
+        for path in ("/ping", "/auth/login", "/api/accounts") * requests:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}{path}").read()
+            except OSError:
+                pass
+        pids = [proc.pid, *_descendants(proc.pid)]
+        memory = {str(p): _memory_kb(p) for p in pids}
+        total = lambda key: round(sum(m.get(key, 0) for m in memory.values()) / 1024, 1)  # noqa: E731
+        return {
+            "preload": preload,
+            "workers": workers,
+            "ready_ms": round(ready * 1000, 1) if ready is not None else None,
+            "pss_mb": total("Pss"),
+            "private_mb": round(total("Private_Clean") + total("Private_Dirty"), 1),
+            "rss_mb": total("Rss"),
+            "processes": memory,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def report_imports(modules: dict, top: int) -> list[tuple[str, float]]:
+    chosen = {n for n, m in modules.items() if m["depth"] == 0 or n == "app" or n.startswith("app.")}
+    chosen |= set(sorted(modules, key=lambda n: -modules[n]["cumulative_ms"])[:top])
+    return sorted(((n, modules[n]["cumulative_ms"]) for n in chosen), key=lambda x: -x[1])
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit', '?')[:12]})")
+    old, new = baseline["import_total"]["median_ms"], current["import_total"]["median_ms"]
+    print(f"import app.wsgi: {old:.1f} -> {new:.1f} ms ({(new - old) / old * 100:+.1f}%)")
+    before = baseline["imports"]
+    for name, ms in report_imports(current["imports"], 0):
+        if name in before and abs(ms - before[name]["cumulative_ms"]) >= 1:
+            print(f"  {name:<40} {before[name]['cumulative_ms']:8.1f} -> {ms:8.1f} ms")
+    for name in sorted(set(before) - set(current["imports"])):
+        if before[name]["depth"] == 0 or name.startswith("app."):
+            print(f"  {name:<40} {before[name]['cumulative_ms']:8.1f} -> (not imported)")
+    for b in baseline.get("gunicorn", []):
+        for c in current.get("gunicorn", []):
+            if (b["preload"], b["workers"]) == (c["preload"], c["workers"]):
+                print(f"gunicorn preload={c['preload']}: ready {b['ready_ms']} -> {c['ready_ms']} ms, "
+                      f"PSS {b['pss_mb']} -> {c['pss_mb']} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25, help="also list the N slowest modules at any depth")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20, help="warm-up rounds per gunicorn boot")
+    parser.add_argument("--skip-gunicorn", action="store_true")
+    parser.add_argument("--out", default="startup-results.json")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "startup_bench.db")
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}", SECRET_KEY="bench")
+    subprocess.run([sys.executable, "-c", "from app.wsgi import app; from app.extensions import db\n"
+                    "with app.app_context(): db.create_all()"], cwd=ROOT, env=env, check=True)
+
+    modules, total = import_times(args.runs, env)
+    print(f"import app.wsgi: median {total['median_ms']:.1f} ms over {args.runs} runs")
+    for name, ms in report_imports(modules, args.top):
+        print(f"  {name:<40} {ms:8.1f} ms")
+
+    report = {
+        "meta": {"commit": _commit(), "python": sys.version.split()[0], "args": vars(args)},
+        "import_total": total,
+        "imports": modules,
+        "gunicorn": [],
+    }
+    if not args.skip_gunicorn:
+        for preload in (False, True):
+            boot = gunicorn_boot(args.workers, preload, env, args.requests)
+            report["gunicorn"].append(boot)
+            print(f"gunicorn -w {args.workers} preload={preload}: ready in {boot['ready_ms']} ms, "
+                  f"PSS {boot['pss_mb']} MB, private {boot['private_mb']} MB, RSS {boot['rss_mb']} MB")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
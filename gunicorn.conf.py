@@ -0,0 +1,77 @@
+# gunicorn.conf.py (picked up automatically by `gunicorn app.wsgi:app`)
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Threaded workers: each process serves up to GUNICORN_THREADS requests at
+# once, so a request waiting on a database round trip parks one thread
+# instead of the whole worker. GUNICORN_THREADS=1 gives plain sync workers.
+# Worker count still comes from WEB_CONCURRENCY / -w; keep DB_POOL_SIZE +
+# DB_MAX_OVERFLOW >= threads (DB_POOL_SIZE defaults to GUNICORN_THREADS).
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Import and build the app once in the master; workers fork with it already
+# loaded and share those pages copy-on-write. GUNICORN_PRELOAD=0 imports it
+# in every worker instead (needed for `--reload`).
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Workers write /metrics samples to mmap'd files here (see app/metrics.py).
+# Set before the app is preloaded, since prometheus_client picks its value
+# storage (and opens files there) at import.
+os.makedirs(
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "banklite-metrics")),
+    exist_ok=True,
+)
+
+
+def on_starting(server):
+    # Start clean so a restart doesn't resurrect old counters. Anything the
+    # preloaded master wrote is per-pid and abandoned once workers fork.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    # Migrate once, here, rather than in every worker. Without preloading
+    # the master must not import the app (workers would inherit it), so the
+    # upgrade runs in a child process.
+    if server.cfg.preload_app:
+        from app.lazy import load_deferred
+        from app.wsgi import upgrade_database
+
+        upgrade_database()
+        load_deferred()
+    else:
+        subprocess.run(
+            [sys.executable, "-c", "from app.wsgi import upgrade_database; upgrade_database()"],
+            check=False,
+        )
+
+
+def post_worker_init(worker):
+    # Without preloading, finish lazy imports before taking requests:
+    # LazyLoader isn't thread-safe on Python < 3.12.3 and gthread workers
+    # would otherwise race on first use.
+    if not worker.cfg.preload_app:
+        from app.lazy import load_deferred
+
+        load_deferred()
+
+
+def post_fork(server, worker):
+    # Drop any pooled connections inherited from the master (close=False
+    # leaves the parent's sockets alone).
+    if server.cfg.preload_app:
+        from app.extensions import db
+        from app.wsgi import app
+
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,43 @@
+"""hot path indexes
+
+Revision ID: 430b61ea529c
+Revises: a7911c1994d7
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '430b61ea529c'
+down_revision = 'a7911c1994d7'
+branch_labels = None
+depends_on = None
+
+
+def _concurrently():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    kw = {'postgresql_concurrently': True} if _concurrently() else {}
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transaction_account_id_created_at',
+            'transaction',
+            ['account_id', sa.text('created_at DESC'), 'id'],
+            unique=False,
+            **kw
+        )
+        op.create_index('ix_account_user_id', 'account', ['user_id'], unique=False, **kw)
+        op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False, **kw)
+
+
+def downgrade():
+    kw = {'postgresql_concurrently': True} if _concurrently() else {}
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_email_lower', table_name='user', **kw)
+        op.drop_index('ix_account_user_id', table_name='account', **kw)
+        op.drop_index('ix_transaction_account_id_created_at', table_name='transaction', **kw)
@@ -0,0 +1,61 @@
+"""ledger reconciliation
+
+Revision ID: 5e2b7c9d41f3
+Revises: aa7f0918cac2
+Create Date: 2026-10-18 15:40:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b7c9d41f3'
+down_revision = 'aa7f0918cac2'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 50000
+
+
+def _backfill_opening():
+    """opening_cents = balance_cents - ledger total, in account-id ranges.
+
+    Opening balances were never recorded, so existing accounts are
+    baselined as consistent at upgrade time.
+    """
+    account = sa.table('account', sa.column('id', sa.Integer), sa.column('balance_cents'), sa.column('opening_cents'))
+    tx = sa.table('transaction', sa.column('account_id'), sa.column('kind'), sa.column('amount_cents'))
+    signed = sa.case((tx.c.kind == 'deposit', tx.c.amount_cents), else_=-tx.c.amount_cents)
+    ledger = (
+        sa.select(sa.func.coalesce(sa.func.sum(signed), 0))
+        .where(tx.c.account_id == account.c.id)
+        .scalar_subquery()
+    )
+    bind = op.get_bind()
+    top = bind.execute(sa.select(sa.func.max(account.c.id))).scalar() or 0
+    for lo in range(0, top + 1, BACKFILL_CHUNK):
+        bind.execute(
+            account.update()
+            .where(account.c.id >= lo, account.c.id < lo + BACKFILL_CHUNK)
+            .values(opening_cents=account.c.balance_cents - ledger)
+        )
+
+
+def upgrade():
+    op.add_column('account', sa.Column('opening_cents', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_table('ledger_checkpoint',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('ledger_cents', sa.BigInteger(), nullable=False),
+    sa.Column('last_tx_id', sa.Integer(), nullable=False),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+    _backfill_opening()
+
+
+def downgrade():
+    op.drop_table('ledger_checkpoint')
+    with op.batch_alter_table('account') as batch_op:
+        batch_op.drop_column('opening_cents')
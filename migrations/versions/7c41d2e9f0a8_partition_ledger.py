@@ -0,0 +1,129 @@
+"""partition ledger by month
+
+Revision ID: 7c41d2e9f0a8
+Revises: 5e2b7c9d41f3
+Create Date: 2026-10-18 17:05:44.902113
+
+Postgres only: ``transaction`` becomes RANGE (created_at) partitioned, one
+partition per month plus ``transaction_default``, optionally each month
+HASH (account_id) sub-partitioned (LEDGER_HASH_PARTITIONS). Later months
+are created by ``flask ledger partitions`` (app/partitions.py). Other
+dialects keep the plain table.
+"""
+import os
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41d2e9f0a8'
+down_revision = '5e2b7c9d41f3'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 50000
+MONTHS_AHEAD = int(os.getenv('LEDGER_PARTITIONS_AHEAD', '3'))
+HASH_PARTITIONS = int(os.getenv('LEDGER_HASH_PARTITIONS', '0'))
+
+COLUMNS = 'id, account_id, kind, amount, amount_cents, description, related_account_id, created_at'
+
+
+def _add_months(month, n):
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def _create_month(month):
+    name, end = f'transaction_y{month.year}m{month.month:02d}', _add_months(month, 1)
+    sub = ' PARTITION BY HASH (account_id)' if HASH_PARTITIONS > 1 else ''
+    op.execute(
+        f'CREATE TABLE {name} PARTITION OF "transaction" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}'){sub}"
+    )
+    for i in range(HASH_PARTITIONS if sub else 0):
+        op.execute(
+            f'CREATE TABLE {name}_h{i} PARTITION OF {name} '
+            f'FOR VALUES WITH (MODULUS {HASH_PARTITIONS}, REMAINDER {i})'
+        )
+
+
+def _copy(source, target):
+    """INSERT ... SELECT in id ranges to keep each statement short."""
+    bind = op.get_bind()
+    top = bind.execute(sa.text(f'SELECT max(id) FROM {source}')).scalar() or 0
+    for lo in range(0, top + 1, BACKFILL_CHUNK):
+        bind.execute(sa.text(
+            f'INSERT INTO {target} ({COLUMNS}) SELECT {COLUMNS} FROM {source} '
+            f'WHERE id >= {lo} AND id < {lo + BACKFILL_CHUNK}'
+        ))
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('ALTER TABLE "transaction" RENAME TO transaction_old')
+    op.execute('ALTER TABLE transaction_old RENAME CONSTRAINT transaction_pkey TO transaction_old_pkey')
+    op.execute('ALTER INDEX ix_transaction_account_id_created_at RENAME TO ix_transaction_old_account_id_created_at')
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY NONE')
+    # every partition key (incl. the optional hash one) has to be in the primary key
+    op.execute(
+        'CREATE TABLE "transaction" ('
+        " id INTEGER NOT NULL DEFAULT nextval('transaction_id_seq'),"
+        ' account_id INTEGER NOT NULL REFERENCES account (id),'
+        ' kind VARCHAR(20) NOT NULL,'
+        ' amount NUMERIC(12, 2) NOT NULL,'
+        " amount_cents BIGINT NOT NULL DEFAULT '0',"
+        ' description VARCHAR(255),'
+        ' related_account_id INTEGER,'
+        ' created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,'
+        ' CONSTRAINT transaction_pkey PRIMARY KEY (id, created_at, account_id)'
+        ') PARTITION BY RANGE (created_at)'
+    )
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+    op.create_index(
+        'ix_transaction_account_id_created_at',
+        'transaction',
+        ['account_id', sa.text('created_at DESC'), 'id'],
+        unique=False,
+    )
+    oldest = op.get_bind().execute(sa.text('SELECT min(created_at) FROM transaction_old')).scalar()
+    this_month = date.today().replace(day=1)
+    month = (oldest or datetime.utcnow()).date().replace(day=1)
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        _create_month(month)
+        month = _add_months(month, 1)
+    op.execute('CREATE TABLE transaction_default PARTITION OF "transaction" DEFAULT')
+    _copy('transaction_old', '"transaction"')
+    op.execute('DROP TABLE transaction_old')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('ALTER TABLE "transaction" RENAME TO transaction_parted')
+    op.execute('ALTER TABLE transaction_parted RENAME CONSTRAINT transaction_pkey TO transaction_parted_pkey')
+    op.execute('ALTER INDEX ix_transaction_account_id_created_at RENAME TO ix_transaction_parted_account_id_created_at')
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY NONE')
+    op.create_table('transaction',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('transaction_id_seq')"), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('amount_cents', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('related_account_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+    _copy('transaction_parted', '"transaction"')
+    op.execute('DROP TABLE transaction_parted CASCADE')
+    op.create_index(
+        'ix_transaction_account_id_created_at',
+        'transaction',
+        ['account_id', sa.text('created_at DESC'), 'id'],
+        unique=False,
+    )
@@ -0,0 +1,45 @@
+"""money cents columns
+
+Revision ID: aa7f0918cac2
+Revises: 189d4f0c4a04
+Create Date: 2026-10-18 14:22:09.671530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'aa7f0918cac2'
+down_revision = '189d4f0c4a04'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 50000
+
+
+def _backfill(table, source, target):
+    """target = round(source * 100), in primary-key ranges to keep each UPDATE short."""
+    t = sa.table(table, sa.column('id', sa.Integer), sa.column(source), sa.column(target))
+    bind = op.get_bind()
+    top = bind.execute(sa.select(sa.func.max(t.c.id))).scalar() or 0
+    for lo in range(0, top + 1, BACKFILL_CHUNK):
+        bind.execute(
+            t.update()
+            .where(t.c.id >= lo, t.c.id < lo + BACKFILL_CHUNK)
+            .values({target: sa.cast(sa.func.round(t.c[source] * 100), sa.BigInteger)})
+        )
+
+
+def upgrade():
+    op.add_column('account', sa.Column('balance_cents', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('transaction', sa.Column('amount_cents', sa.BigInteger(), server_default='0', nullable=False))
+    _backfill('account', 'balance', 'balance_cents')
+    _backfill('transaction', 'amount', 'amount_cents')
+
+
+def downgrade():
+    with op.batch_alter_table('transaction') as batch_op:
+        batch_op.drop_column('amount_cents')
+    with op.batch_alter_table('account') as batch_op:
+        batch_op.drop_column('balance_cents')
@@ -1,8 +1,13 @@
 # conftest.py
+from contextlib import contextmanager
+
 import pytest
+from flask import g
 from app import create_app
 from app.config import Config
+from app.dbstats import QueryLog
 from app.extensions import db
+from app.models import load_user
 
 @pytest.fixture()
 def app():
@@ -21,6 +26,27 @@ def app():
         db.session.remove()
         db.drop_all()
 
+@pytest.fixture()
+def file_app(tmp_path):
+    """File-backed SQLite in WAL mode, for tests that hit the DB from many threads."""
+    class FileConfig(Config):
+        TESTING = True
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'stress.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}}
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(FileConfig)
+
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        yield app
+        db.session.remove()
+        db.drop_all()
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
@@ -45,6 +71,8 @@ def user(app):
 def auth_client(client, user):
     # Logs in via the HTML from endpoints (CSRF disabled in TestConfig)
     client.post("/auth/login", data = {"email": user.email, "password": "password123"}, follow_redirects = True)
+    g.pop("_login_user", None)   # the login's own User; later requests go through the loader
+    load_user(str(user.id))      # ...which has cached the principal after the first one
     return client
 
 @pytest.fixture()
@@ -53,4 +81,19 @@ def accounts(app, user):
     from app.services import create_account
     a1 = create_account(user.id, "Checking", "Checking", 100)
     a2 = create_account(user.id, "Savings", "Savings", 50)
-    return a1, a2
\ No newline at end of file
+    return a1, a2
+
+@pytest.fixture()
+def query_budget(app):
+    """``with query_budget(n): client.get(...)`` asserts at most n SQL statements
+    and no statement repeated ``repeat`` times (an N+1 pattern)."""
+    @contextmanager
+    def check(limit, repeat = 3):
+        db.session.expire_all()   # start cold: every row the request touches is reloaded
+        g.pop("_login_user", None)   # g outlives requests here; resolve current_user afresh
+        with QueryLog(db.engine) as log:
+            yield log
+        assert log.count <= limit, f"{log.count} queries, budget {limit}:\n" + "\n".join(log.statements)
+        repeated = log.repeated(repeat)
+        assert not repeated, f"repeated statements (N+1?): {repeated}"
+    return check
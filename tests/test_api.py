@@ -1,6 +1,13 @@
 # test_api.py
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from decimal import Decimal
 
+import pytest
+
 from app.extensions import db
 from app.models import User, Account, Transaction
 
@@ -140,3 +147,262 @@ def test_api_forbid_cross_user_access(client, app):
     # Try to deposit into user2's account -> forbidden
     r = client.post("/api/transactions/deposit", json={"account_id": other_acc_id, "amount": "5.00"})
     assert r.status_code == 403
+
+def _seed_ledger(account, n, start=datetime(2025, 1, 1)):
+    for i in range(n):
+        db.session.add(Transaction(
+            account_id=account.id,
+            kind="deposit",
+            amount=Decimal("1.00"),
+            description=f"tx {i}",
+            created_at=start + timedelta(days=i),
+        ))
+    db.session.commit()
+
+def test_api_list_transactions_paginates_with_cursor(auth_client, accounts):
+    a1, _ = accounts
+    _seed_ledger(a1, 7)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        r = auth_client.get("/api/transactions", query_string=params)
+        assert r.status_code == 200
+        page = r.get_json()
+        assert len(page["items"]) <= 3
+        seen.extend(t["id"] for t in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+    assert seen == sorted(seen, reverse=True)
+
+def test_api_list_transactions_filters(auth_client, accounts):
+    a1, a2 = accounts
+    _seed_ledger(a1, 5)
+    _seed_ledger(a2, 2)
+
+    r = auth_client.get("/api/transactions", query_string={"account_id": a2.id})
+    assert {t["account_id"] for t in r.get_json()["items"]} == {a2.id}
+
+    r = auth_client.get(
+        "/api/transactions",
+        query_string={"account_id": a1.id, "since": "2025-01-02T00:00:00", "until": "2025-01-04T00:00:00Z"},
+    )
+    items = r.get_json()["items"]
+    assert [t["description"] for t in items] == ["tx 2", "tx 1"]
+
+    r = auth_client.get("/api/transactions", query_string={"kind": "withdraw"})
+    assert r.get_json()["items"] == []
+
+def test_api_list_transactions_rejects_bad_params(auth_client, accounts):
+    assert auth_client.get("/api/transactions", query_string={"cursor": "!!nope"}).status_code == 400
+    assert auth_client.get("/api/transactions", query_string={"limit": 100000}).status_code == 400
+    assert auth_client.get("/api/transactions", query_string={"kind": "refund"}).status_code == 400
+
+def test_api_export_transactions_csv(auth_client, accounts):
+    a1, _ = accounts
+    _seed_ledger(a1, 3)
+
+    r = auth_client.get("/api/transactions/export", query_string={"format": "csv"})
+    assert r.status_code == 200
+    assert r.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(r.get_data(as_text=True))))
+    assert [row["description"] for row in rows] == ["tx 2", "tx 1", "tx 0"]
+    assert rows[0]["amount"] == "1.00"
+
+def test_api_export_transactions_ndjson_matches_list(auth_client, accounts):
+    a1, a2 = accounts
+    _seed_ledger(a1, 4)
+    _seed_ledger(a2, 1)
+
+    r = auth_client.get("/api/transactions/export", query_string={"format": "ndjson", "account_id": a1.id})
+    assert r.status_code == 200
+    exported = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+
+    listed = auth_client.get("/api/transactions", query_string={"account_id": a1.id}).get_json()["items"]
+    assert exported == listed
+
+def test_api_batch_atomic_applies_all(auth_client, accounts):
+    a1, a2 = accounts
+    ops = [
+        {"kind": "deposit", "account_id": a1.id, "amount": "10.00"},
+        {"kind": "withdraw", "account_id": a2.id, "amount": "20.00", "description": "Bill"},
+        {"kind": "transfer", "account_id": a1.id, "related_account_id": a2.id, "amount": "5.00"},
+    ]
+    r = auth_client.post("/api/transactions/batch", json={"operations": ops})
+    assert r.status_code == 201
+    results = r.get_json()["results"]
+    assert [x["status"] for x in results] == ["ok", "ok", "ok"]
+    assert results[1]["transaction"]["description"] == "Bill"
+    assert results[2]["transaction"]["related_account_id"] == a2.id
+
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("105.00")
+    assert db.session.get(Account, a2.id).balance == Decimal("35.00")
+    assert Transaction.query.count() == 4
+
+def test_api_batch_atomic_rejects_whole_batch(auth_client, accounts):
+    a1, a2 = accounts
+    ops = [
+        {"kind": "deposit", "account_id": a1.id, "amount": "10.00"},
+        {"kind": "withdraw", "account_id": a2.id, "amount": "500.00"},
+    ]
+    r = auth_client.post("/api/transactions/batch", json={"operations": ops})
+    assert r.status_code == 400
+    assert [x["status"] for x in r.get_json()["results"]] == ["error", "error"]
+    assert r.get_json()["results"][1]["error"] == "Insufficient funds"
+
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("100.00")
+    assert Transaction.query.count() == 0
+
+def test_api_batch_best_effort_uses_running_balances(auth_client, accounts):
+    a1, a2 = accounts
+    ops = [
+        {"kind": "withdraw", "account_id": a2.id, "amount": "40.00"},
+        {"kind": "withdraw", "account_id": a2.id, "amount": "40.00"},
+        {"kind": "deposit", "account_id": 9999, "amount": "1.00"},
+        {"kind": "deposit", "account_id": a2.id, "amount": "1.00"},
+    ]
+    r = auth_client.post("/api/transactions/batch", json={"mode": "best_effort", "operations": ops})
+    assert r.status_code == 201
+    results = r.get_json()["results"]
+    assert [x["status"] for x in results] == ["ok", "error", "error", "ok"]
+    assert results[2]["error"] == "Account not found"
+
+    db.session.expire_all()
+    assert db.session.get(Account, a2.id).balance == Decimal("11.00")
+
+def test_api_batch_validates_every_item(auth_client, accounts):
+    a1, _ = accounts
+    ops = [
+        {"kind": "deposit", "account_id": a1.id, "amount": "1.00"},
+        {"kind": "transfer", "account_id": a1.id, "amount": "-1"},
+    ]
+    r = auth_client.post("/api/transactions/batch", json={"operations": ops})
+    assert r.status_code == 400
+    assert "1" in r.get_json()["messages"]["operations"]
+
+def test_api_idempotency_key_replays_without_reposting(auth_client, accounts, monkeypatch):
+    a1, _ = accounts
+    headers = {"Idempotency-Key": "pay-42"}
+    body = {"account_id": a1.id, "amount": "10.00"}
+
+    first = auth_client.post("/api/transactions/deposit", json=body, headers=headers)
+    assert first.status_code == 201
+
+    # a replay must not reach services at all
+    import app.api
+    monkeypatch.setattr(app.api, "deposit", lambda *a, **k: pytest.fail("service called on replay"))
+    second = auth_client.post("/api/transactions/deposit", json=body, headers=headers)
+    assert second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.get_json() == first.get_json()
+
+    # replay from the table once the hot cache is cold
+    from app.idempotency import idempotency
+    idempotency.hot.delete((a1.user_id, "pay-42"))
+    third = auth_client.post("/api/transactions/deposit", json=body, headers=headers)
+    assert third.get_json() == first.get_json()
+
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("110.00")
+    assert Transaction.query.count() == 1
+
+def test_api_idempotency_key_rejects_different_payload(auth_client, accounts):
+    a1, _ = accounts
+    headers = {"Idempotency-Key": "k1"}
+    auth_client.post("/api/transactions/deposit", json={"account_id": a1.id, "amount": "1.00"}, headers=headers)
+    r = auth_client.post("/api/transactions/deposit", json={"account_id": a1.id, "amount": "2.00"}, headers=headers)
+    assert r.status_code == 422
+
+def test_api_idempotency_keys_expire_in_bulk(auth_client, accounts, runner):
+    from app.models import IdempotencyKey
+    a1, _ = accounts
+    for i in range(3):
+        auth_client.post("/api/transactions/deposit", json={"account_id": a1.id, "amount": "1.00"},
+                         headers={"Idempotency-Key": f"old-{i}"})
+    IdempotencyKey.query.update({"created_at": datetime.utcnow() - timedelta(days=2)})
+    db.session.commit()
+
+    result = runner.invoke(args=["idempotency", "purge"])
+    assert "Purged 3" in result.output
+    assert IdempotencyKey.query.count() == 0
+
+def test_api_analytics_summary_matches_python_loop(auth_client, accounts):
+    a1, a2 = accounts
+    ledger = [
+        (a1, "deposit", "10.00", datetime(2025, 1, 1, 9)),
+        (a1, "withdraw", "3.25", datetime(2025, 1, 1, 17)),
+        (a1, "deposit", "0.10", datetime(2025, 1, 2, 8)),
+        (a1, "transfer", "5.00", datetime(2025, 1, 5, 8)),
+        (a2, "deposit", "5.00", datetime(2025, 1, 5, 8)),
+        (a2, "withdraw", "1.00", datetime(2025, 2, 1, 8)),
+    ]
+    for acct, kind, amount, when in ledger:
+        db.session.add(Transaction(account_id=acct.id, kind=kind, amount=Decimal(amount), created_at=when))
+        acct.balance += Decimal(amount) if kind == "deposit" else -Decimal(amount)
+    db.session.commit()
+
+    r = auth_client.get("/api/analytics/summary", query_string={"granularity": "day", "window": 2})
+    assert r.status_code == 200
+    body = r.get_json()
+
+    totals = {(t["account_id"], t["period"], t["kind"]): (t["count"], t["total"]) for t in body["totals"]}
+    assert totals[(a1.id, "2025-01-01", "deposit")] == (1, "10.00")
+    assert totals[(a1.id, "2025-01-01", "withdraw")] == (1, "3.25")
+    assert len(totals) == 6
+
+    # reference: walk the ledger in Python, opening = balance - all flows
+    signed = {a.id: [] for a in (a1, a2)}
+    for acct, kind, amount, when in ledger:
+        signed[acct.id].append((when.strftime("%Y-%m-%d"), Decimal(amount) * (1 if kind == "deposit" else -1)))
+    expected = []
+    for acct in (a1, a2):
+        running = acct.balance - sum(v for _, v in signed[acct.id])
+        days = sorted({d for d, _ in signed[acct.id]})
+        nets = [sum(v for d2, v in signed[acct.id] if d2 == d) for d in days]
+        for i, (d, net) in enumerate(zip(days, nets)):
+            running += net
+            window = nets[max(0, i - 1):i + 1]
+            expected.append((acct.id, d, f"{net:.2f}", f"{running:.2f}", f"{sum(window) / len(window):.2f}"))
+
+    got = [(b["account_id"], b["period"], b["net"], b["running_balance"], b["rolling_avg_net"]) for b in body["balances"]]
+    assert got == expected
+
+    r = auth_client.get("/api/analytics/summary", query_string={"granularity": "month", "account_id": a2.id})
+    balances = r.get_json()["balances"]
+    assert [(b["period"], b["running_balance"]) for b in balances] == [("2025-01", "55.00"), ("2025-02", "54.00")]
+
+
+def test_api_serves_concurrent_requests_in_one_process(file_app):
+    # what a gthread worker does: one thread per in-flight request, one app
+    # context and session each
+    u = User(email="threads@example.com")
+    u.set_password("pw")
+    db.session.add(u)
+    db.session.commit()
+    client = file_app.test_client()
+    login(client, u.email, "pw")
+    acct_id = api_create_account(client, opening="0.00").get_json()["id"]
+    cookie = client.get_cookie("session").value
+    db.session.remove()
+
+    def post(i):
+        c = file_app.test_client()
+        c.set_cookie("session", cookie)
+        if i % 2:
+            return c.get("/api/accounts").status_code
+        return c.post("/api/transactions/deposit", json={"account_id": acct_id, "amount": "1.00"}).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(post, range(32)))
+
+    assert statuses.count(201) == 16 and statuses.count(200) == 16
+    assert db.session.get(Account, acct_id).balance == Decimal("16.00")
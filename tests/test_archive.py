@@ -0,0 +1,132 @@
+# test_archive.py
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app import reconcile, snapshots
+from app.archive import ledger_archive
+from app.extensions import db
+from app.models import Account, Transaction
+from app.services import create_account, deposit, transfer, withdraw
+
+
+@pytest.fixture()
+def ledger(app, accounts, tmp_path):
+    """A dozen money movements, one every ten days from 2025-01-01."""
+    app.config["LEDGER_ARCHIVE_DIR"] = str(tmp_path / "archive")
+    a1, a2 = accounts
+    for i in range(4):
+        deposit(a1, "10.00", "salary")
+        withdraw(a1, "2.50", None)
+        transfer(a1, a2, "1.25", f"rent {i}")
+    ids = db.session.execute(select(Transaction.id).order_by(Transaction.id)).scalars().all()
+    for n, tx_id in enumerate(ids):
+        db.session.execute(
+            update(Transaction).where(Transaction.id == tx_id).values(created_at=datetime(2025, 1, 1) + timedelta(days=10 * n))
+        )
+    db.session.commit()
+    return a1, a2
+
+
+def _pages(client, **params):
+    items, cursor = [], None
+    while True:
+        query = dict(params, limit=4, **({"cursor": cursor} if cursor else {}))
+        page = client.get("/api/transactions", query_string=query).get_json()
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def _reads(client, a1):
+    return {
+        "all": _pages(client),
+        "account": _pages(client, account_id=a1.id),
+        "kind": _pages(client, kind="withdraw"),
+        "window": _pages(client, since="2025-02-01T00:00:00", until="2025-05-01T00:00:00"),
+        "csv": client.get("/api/transactions/export").get_data(as_text=True),
+        "ndjson": client.get("/api/transactions/export", query_string={"format": "ndjson"}).get_data(as_text=True),
+    }
+
+
+def test_archived_rows_read_back_transparently(ledger, auth_client, runner):
+    a1, _ = ledger
+    before = _reads(auth_client, a1)
+    total = db.session.execute(select(func.count()).select_from(Transaction)).scalar()
+
+    result = runner.invoke(args=["ledger", "archive", "--before", "2025-03-01", "--accounts-per-file", "1"])
+    assert result.exit_code == 0, result.output
+
+    live = db.session.execute(select(func.min(Transaction.created_at), func.count())).one()
+    assert live[0] >= datetime(2025, 3, 1)
+    segments = ledger_archive.segments()
+    assert len(segments) == 2 and {s.state for s in segments} == {"archived"}
+    assert sum(s.rows for s in segments) == total - live[1] > 0
+    assert f"Archived {total - live[1]} ledger rows into 2 segments" in result.output
+    assert os.path.exists(os.path.join(ledger_archive.root, segments[0].path, "created_at.npy"))
+
+    assert _reads(auth_client, a1) == before
+    assert reconcile.reconcile(full=True).drift == []
+
+
+def test_interrupted_archive_finishes_deletes_and_hides_duplicates(ledger, auth_client, runner, monkeypatch):
+    from app import archive
+
+    a1, _ = ledger
+    before = _reads(auth_client, a1)
+    total = db.session.execute(select(func.count()).select_from(Transaction)).scalar()
+
+    def crash(*args):
+        raise RuntimeError("killed")
+
+    monkeypatch.setattr(archive, "_delete_archived", crash)
+    with pytest.raises(RuntimeError):
+        archive.archive_before(datetime(2025, 3, 1))
+    monkeypatch.undo()
+
+    # published but not yet deleted: rows are in both places, shown once
+    assert [s.state for s in ledger_archive.segments()] == ["deleting"]
+    assert db.session.execute(select(func.count()).select_from(Transaction)).scalar() == total
+    assert _reads(auth_client, a1) == before
+
+    report = archive.archive_before(datetime(2025, 3, 1))
+    assert report.segments == 0 and report.deleted == ledger_archive.segments()[0].rows
+    assert [s.state for s in ledger_archive.segments()] == ["archived"]
+    assert _reads(auth_client, a1) == before
+    assert reconcile.reconcile(full=True).drift == []
+
+
+def test_rebuild_after_archive_keeps_archived_balances(app, user, tmp_path):
+    from app.archive import archive_before
+
+    app.config["LEDGER_ARCHIVE_DIR"] = str(tmp_path / "archive")
+    a = create_account(user.id, "Checking", "Checking", "0")
+    deposit(a, "100.00")
+    db.session.execute(update(Account).where(Account.id == a.id).values(created_at=datetime(2025, 1, 1)))
+    db.session.execute(update(Transaction).values(created_at=datetime(2025, 1, 10)))
+    db.session.commit()
+    deposit(a, "5.00")
+
+    assert archive_before(datetime(2025, 6, 1)).rows == 1
+    snapshots.rebuild()
+
+    assert snapshots.balance_as_of(a, datetime(2025, 1, 5)) == 0
+    assert snapshots.balance_as_of(a, datetime(2025, 1, 11)) == 100
+    jan = snapshots.statement(a, 2025, 1)
+    assert (jan["opening_balance"], jan["closing_balance"]) == (0, 100)
+    assert [d["balance"] for d in jan["daily"]] == [100]
+    assert snapshots.balance_as_of(a, datetime(2100, 1, 1)) == 105
+
+
+def test_archive_refuses_without_an_explicit_dir(app, accounts, runner):
+    deposit(accounts[0], "10.00")
+    app.config["LEDGER_ARCHIVE_DIR"] = ""
+
+    result = runner.invoke(args=["ledger", "archive", "--before", "2100-01-01"])
+    assert result.exit_code != 0
+    assert "LEDGER_ARCHIVE_DIR is not set" in result.output
+    assert db.session.execute(select(func.count()).select_from(Transaction)).scalar() == 1
+    assert ledger_archive.segments() == []
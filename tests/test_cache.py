@@ -0,0 +1,120 @@
+# test_cache.py
+import pytest
+from decimal import Decimal
+
+from app import queries
+from app.cache import LocalBackend, RedisBackend
+from app.extensions import account_cache, db
+from app.models import Principal, load_user
+from app.services import deposit, transfer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for RedisBackend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+
+def test_local_backend_lru_and_ttl():
+    clock = FakeClock()
+    b = LocalBackend(maxsize = 2, ttl = 10, clock = clock)
+    b.set(1, "a")
+    b.set(2, "b")
+    assert b.get(1) == "a"      # 1 is now most recent
+    b.set(3, "c")               # evicts 2
+    assert b.get(2) is None
+    assert b.get(3) == "c"
+
+    clock.now = 11
+    assert b.get(1) is None
+
+
+def test_redis_backend_round_trips_rows():
+    fake = FakeRedis()
+    b = RedisBackend(client = fake, ttl = 5)
+    row = queries.AccountRow(1, 1, "Main", "Checking", Decimal("1.00"), None)
+    b.set(7, [row])
+    assert b.get(7) == [row]
+    b.delete(7)
+    assert b.get(7) is None and fake.data == {}
+
+
+def test_accounts_cached_until_commit(app, accounts):
+    a1, _ = accounts
+    first = queries.accounts_for_user(a1.user_id)
+    assert queries.accounts_for_user(a1.user_id) is first
+
+    deposit(a1, "10.00")
+    fresh = queries.accounts_for_user(a1.user_id)
+    assert fresh is not first
+    assert fresh[0].balance == Decimal("110.00")
+
+
+def test_rollback_keeps_cached_snapshot(app, accounts):
+    a1, _ = accounts
+    cached = queries.accounts_for_user(a1.user_id)
+
+    account_cache.invalidate_on_commit(db.session, a1.user_id)
+    db.session.rollback()
+    db.session.commit()
+    assert queries.accounts_for_user(a1.user_id) is cached
+
+
+def test_failed_transfer_does_not_touch_cache(app, accounts):
+    a1, a2 = accounts
+    cached = queries.accounts_for_user(a1.user_id)
+
+    with pytest.raises(Exception):
+        transfer(a1, a2, "1000.00")
+    db.session.rollback()
+    assert queries.accounts_for_user(a1.user_id) is cached
+
+
+def test_api_sees_new_account_immediately(auth_client, accounts):
+    assert len(auth_client.get("/api/accounts").get_json()) == 2
+    r = auth_client.post("/api/accounts", json = {"name": "Third", "type": "Savings", "opening": "1.00"})
+    assert r.status_code == 201
+    assert len(auth_client.get("/api/accounts").get_json()) == 3
+
+
+def test_principal_cached_until_user_changes(app, user):
+    first = load_user(str(user.id))
+    assert isinstance(first, Principal) and first.email == user.email
+    assert load_user(str(user.id)) is first
+
+    user.set_password("new-password")
+    db.session.rollback()   # nothing committed, nothing evicted
+    assert load_user(str(user.id)) is first
+
+    user.email = "renamed@example.com"
+    db.session.commit()
+    fresh = load_user(str(user.id))
+    assert fresh is not first and fresh.email == "renamed@example.com"
+
+    db.session.delete(user)
+    db.session.commit()
+    assert load_user(str(user.id)) is None
+
+
+def test_authenticated_request_skips_user_query(auth_client, user, query_budget):
+    with query_budget(0):
+        assert auth_client.get("/accounts/new").status_code == 200
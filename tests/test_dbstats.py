@@ -0,0 +1,69 @@
+# test_dbstats.py
+from app import config
+from app.dbstats import TimedQueuePool, db_stats
+
+
+def test_stats_endpoint_reports_request_queries(auth_client, accounts):
+    db_stats.reset()
+    auth_client.get("/api/accounts")
+    auth_client.get("/api/transactions")
+
+    resp = auth_client.get("/_stats")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["requests"]["count"] == 2
+    assert data["requests"]["queries"] >= 2
+    assert data["requests"]["max_queries"] >= 1
+    assert data["pool"]["checkouts"] >= 1
+    assert "class" in data["pool"]
+    assert set(data["transfers"]) >= {"attempts", "retries", "lock_wait_seconds"}
+
+
+def test_stats_endpoint_is_internal(app, client):
+    assert client.get("/_stats", environ_base={"REMOTE_ADDR": "10.1.2.3"}).status_code == 403
+    assert client.get("/_stats").status_code == 200
+    # a reverse proxy on the same host connects from loopback
+    assert client.get("/_stats", headers={"X-Forwarded-For": "203.0.113.9"}).status_code == 403
+
+    app.config["STATS_TOKEN"] = "s3cret"
+    assert client.get("/_stats").status_code == 403
+    assert client.get("/_stats", headers={"X-Stats-Token": "s3cret"}).status_code == 200
+    assert client.get(
+        "/_stats", headers={"X-Stats-Token": "s3cret", "X-Forwarded-For": "203.0.113.9"}
+    ).status_code == 200
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "5000")
+    monkeypatch.setenv("DB_PREPARE_THRESHOLD", "none")
+
+    opts = config.engine_options("postgresql+psycopg://u:p@db/bank")
+    assert opts["poolclass"] is TimedQueuePool
+    assert opts["pool_size"] == 12 and opts["max_overflow"] == 0
+    assert opts["pool_pre_ping"] is False
+    assert opts["connect_args"] == {"options": "-c statement_timeout=5000", "prepare_threshold": None}
+
+    assert config.engine_options("sqlite:///x.db") == {"pool_pre_ping": False}
+
+
+def test_pool_size_follows_gunicorn_threads(monkeypatch):
+    for name in ("DB_POOL_SIZE", "GUNICORN_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+    assert config.engine_options("postgresql+psycopg://u:p@db/bank")["pool_size"] == 8   # gunicorn.conf.py's default
+    monkeypatch.setenv("GUNICORN_THREADS", "3")
+    assert config.engine_options("postgresql+psycopg://u:p@db/bank")["pool_size"] == 3
+
+
+def test_timed_pool_records_checkout_wait():
+    import sqlite3
+
+    db_stats.reset()
+    pool = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0)
+    conn = pool.connect()
+    conn.close()
+    snap = db_stats.snapshot()["pool"]
+    assert snap["checkouts"] == 1 and snap["checked_out"] == 0
+    assert snap["max_checkout_wait_seconds"] >= 0
@@ -0,0 +1,69 @@
+# test_metrics.py
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sample(text, name, **labels):
+    want = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") and all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name}{{{want}}} not found")
+
+
+def test_metrics_endpoint(auth_client, accounts):
+    a1, a2 = accounts
+    before = auth_client.get("/metrics").get_data(as_text=True)
+    auth_client.post("/api/transactions/deposit", json={"account_id": a1.id, "amount": "5.00"})
+    auth_client.post("/api/transactions/withdraw", json={"account_id": a2.id, "amount": "999.00"})
+
+    resp = auth_client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    text = resp.get_data(as_text=True)
+
+    def delta(name, **labels):
+        try:
+            old = _sample(before, name, **labels)
+        except AssertionError:
+            old = 0.0
+        return _sample(text, name, **labels) - old
+
+    assert delta("banklite_request_duration_seconds_count", endpoint="api.deposit_api", method="POST") == 1
+    assert delta("banklite_requests_total", endpoint="api.deposit_api", method="POST", status="201") == 1
+    assert delta("banklite_service_duration_seconds_count", function="deposit") == 1
+    assert delta("banklite_service_duration_seconds_count", function="withdraw") == 1
+    assert delta("banklite_http_errors_total", endpoint="api.withdraw_api", status="400") == 1
+    assert delta("banklite_request_queries_count", endpoint="api.deposit_api") == 1
+    assert delta("banklite_request_queries_sum", endpoint="api.deposit_api") >= 3
+
+
+def test_metrics_aggregate_across_processes(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    worker = textwrap.dedent("""
+        from app import create_app
+        from app.config import Config
+        from app.extensions import db
+
+        class C(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+
+        app = create_app(C)
+        with app.app_context():
+            db.create_all()
+        client = app.test_client()
+        for _ in range(3):
+            client.get("/ping")
+        if __import__("sys").argv[1] == "scrape":
+            print(client.get("/metrics").get_data(as_text=True))
+    """)
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker, "work"], cwd=ROOT, env=env, check=True)
+    out = subprocess.run([sys.executable, "-c", worker, "scrape"], cwd=ROOT, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    assert _sample(out, "banklite_requests_total", endpoint="main.ping", status="200") == 9
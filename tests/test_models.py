@@ -1,8 +1,10 @@
 # test_models.py
 from decimal import Decimal
 
+from sqlalchemy import func, select, text
+
 from app.extensions import db
-from app.models import User, Account
+from app.models import User, Account, Transaction
 
 
 def test_user_password_hash(app):
@@ -36,4 +38,22 @@ def test_create_account(app):
     # Relationship visible from user side too
     db.session.refresh(u)
     assert len(u.accounts) == 1
-    assert u.accounts[0].id == a.id
\ No newline at end of file
+    assert u.accounts[0].id == a.id
+
+def _plan(stmt) -> str:
+    compiled = stmt.compile(dialect = db.engine.dialect, compile_kwargs = {"literal_binds": True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return " ".join(r[-1] for r in rows)
+
+def test_hot_queries_use_indexes(app):
+    owned = select(Account.id).where(Account.user_id == 1)
+    ledger = (
+        select(Transaction)
+        .where(Transaction.account_id.in_(owned.scalar_subquery()))
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    )
+    assert "ix_transaction_account_id_created_at" in _plan(ledger)
+    assert "ix_account_user_id" in _plan(owned)
+
+    login = select(User).where(func.lower(User.email) == "a@b.com")
+    assert "ix_user_email_lower" in _plan(login)
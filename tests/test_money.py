@@ -0,0 +1,102 @@
+# test_money.py
+import random
+from decimal import Decimal
+
+import pytest
+from werkzeug.exceptions import HTTPException
+
+from app import services
+from app.extensions import account_cache, db
+from app.models import Account, Transaction
+from app.money import Money
+from app.queries import accounts_for_user, transactions_for_user
+from app.schemas import accounts_row_dumper, transaction_create_schema, transactions_row_dumper
+
+
+def _random_amounts(n, seed=13):
+    rng = random.Random(seed)
+    for _ in range(n):
+        whole = rng.randrange(0, 10**9)
+        pick = rng.randrange(6)
+        if pick == 0:
+            yield str(whole)
+        elif pick == 1:
+            yield f"{whole}.{rng.randrange(100):02d}"
+        elif pick == 2:
+            yield f"{whole}.{rng.randrange(10)}"
+        elif pick == 3:
+            yield f"-{whole}.{rng.randrange(1000):03d}"      # needs rounding
+        elif pick == 4:
+            yield round(rng.uniform(-1e6, 1e6), rng.randrange(4))
+        else:
+            yield Decimal(f"{whole}.{rng.randrange(10**5):05d}")
+
+
+def test_money_matches_decimal_rounding():
+    for value in _random_amounts(20000):
+        expected = Transaction.as_decimal(value)
+        m = Money.parse(value)
+        assert m.to_decimal() == expected, value
+        assert str(m) == str(expected), value
+
+
+def test_money_arithmetic_matches_decimal():
+    rng = random.Random(7)
+    total_m, total_d = Money(0), Decimal("0.00")
+    for value in _random_amounts(5000, seed=rng.randrange(1000)):
+        total_m += Money.parse(value)
+        total_d += Transaction.as_decimal(value)
+        assert total_m.to_decimal() == total_d
+    assert (total_m < Money(0)) == (total_d < 0)
+
+
+@pytest.mark.parametrize("bad", ["", "abc", "1.2.3", "NaN", "inf", None, [1]])
+def test_money_rejects_bad_input(bad):
+    with pytest.raises(ValueError):
+        Money.parse(bad)
+
+
+def test_schema_loads_money():
+    op = transaction_create_schema.load({"account_id": 1, "kind": "deposit", "amount": "10.005"})
+    assert op["amount"] == Money(1000)
+    errors = transaction_create_schema.validate({"account_id": 1, "kind": "deposit", "amount": "0.001"})
+    assert "amount" in errors
+
+
+@pytest.fixture()
+def cents_app(app):
+    app.config["MONEY_STORAGE"] = "cents"
+    return app
+
+
+def test_cents_storage_gives_identical_results(cents_app, accounts):
+    a1, a2 = accounts
+    services.deposit(a1, "12.34")
+    services.withdraw(a1, "0.35")
+    services.transfer(a1, a2, "100.00")
+    assert a1.balance == Decimal("11.99") and a1.balance_cents == 1199
+    with pytest.raises(HTTPException):
+        services.withdraw(a2, "150.01")
+    db.session.rollback()
+
+    results = services.apply_batch(a1.user_id, [
+        {"account_id": a2.id, "kind": "transfer", "amount": Money(5000), "related_account_id": a1.id},
+        {"account_id": a1.id, "kind": "withdraw", "amount": "0.99"},
+    ])
+    assert all(err is None for _, err in results)
+
+    db.session.expire_all()
+    for acct in Account.query.all():
+        assert acct.balance_cents == Money.parse(acct.balance).cents
+    for tx in Transaction.query.all():
+        assert tx.amount_cents == Money.parse(tx.amount).cents
+
+    # the cents read model dumps exactly what the decimal one does
+    cents_accounts = accounts_row_dumper.dump(accounts_for_user(a1.user_id))
+    cents_ledger = transactions_row_dumper.dump(transactions_for_user(a1.user_id))
+    assert isinstance(transactions_for_user(a1.user_id)[0].amount, Money)
+    cents_app.config["MONEY_STORAGE"] = "decimal"
+    account_cache.invalidate(a1.user_id)
+    assert accounts_row_dumper.dump(accounts_for_user(a1.user_id)) == cents_accounts
+    assert transactions_row_dumper.dump(transactions_for_user(a1.user_id)) == cents_ledger
+    assert [a["balance"] for a in cents_accounts] == ["61.00", "100.00"]
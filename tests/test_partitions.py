@@ -0,0 +1,64 @@
+# test_partitions.py
+from datetime import date, datetime
+
+from sqlalchemy import text, update
+
+from app import partitions, reconcile, snapshots
+from app.extensions import db
+from app.models import Account, Transaction
+from app.services import create_account, deposit, transfer, withdraw
+
+
+def test_month_arithmetic_and_names():
+    assert partitions.add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partitions.month_start(date(2026, 10, 18)) == date(2026, 10, 1)
+    assert partitions.partition_name(date(2026, 3, 1)) == "transaction_y2026m03"
+
+
+def test_sqlite_ledger_is_not_partitioned(app, runner):
+    assert not partitions.is_partitioned()
+    assert partitions.ensure_partitions(3) == []
+    assert partitions.detach_before(date(2030, 1, 1)) == []
+    result = runner.invoke(args=["ledger", "partitions"])
+    assert "not partitioned" in result.output
+
+
+def test_folding_rows_out_keeps_reconcile_clean(app, user):
+    a = create_account(user.id, "Checking", "Checking", "100.00")
+    b = create_account(user.id, "Savings", "Savings", "0")
+    deposit(a, "25.10")
+    withdraw(a, "5.05")
+    reconcile.reconcile()                       # checkpoints cover the rows folded below
+    transfer(a, b, "40.00")
+    cutoff = db.session.execute(db.select(db.func.max(Transaction.id))).scalar() - 2
+
+    old = f'(SELECT * FROM "transaction" WHERE id <= {cutoff})'
+    partitions.fold_into_opening(old)
+    db.session.execute(text(f'DELETE FROM "transaction" WHERE id <= {cutoff}'))
+    db.session.commit()
+
+    assert reconcile.reconcile().drift == []
+    assert reconcile.reconcile(full=True).drift == []
+
+
+def test_folded_months_keep_their_snapshot_history(app, user):
+    a = create_account(user.id, "Checking", "Checking", "0")
+    deposit(a, "100.00")
+    db.session.execute(update(Account).where(Account.id == a.id).values(created_at=datetime(2025, 1, 1)))
+    db.session.execute(update(Transaction).values(created_at=datetime(2025, 1, 10)))
+    db.session.commit()
+    deposit(a, "5.00")
+
+    # what detach_before does around each month it takes out
+    snapshots.record_closes(datetime(2025, 6, 1))
+    partitions.fold_into_opening('(SELECT * FROM "transaction" WHERE created_at < \'2025-06-01\')')
+    db.session.execute(text("DELETE FROM \"transaction\" WHERE created_at < '2025-06-01'"))
+    db.session.commit()
+    snapshots.rebuild()
+
+    assert snapshots.balance_as_of(a, datetime(2025, 1, 5)) == 0
+    assert snapshots.balance_as_of(a, datetime(2025, 1, 11)) == 100
+    assert snapshots.statement(a, 2025, 1)["closing_balance"] == 100
+    assert snapshots.balance_as_of(a, datetime(2100, 1, 1)) == 105
+    assert reconcile.reconcile(full=True).drift == []
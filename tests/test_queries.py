@@ -0,0 +1,57 @@
+# test_queries.py
+from decimal import Decimal
+
+from app import queries
+from app.extensions import db
+from app.models import User
+from app.schemas import accounts_row_dumper, transactions_row_dumper
+from app.services import create_account, deposit, transfer
+
+
+def test_row_fields_line_up_with_dumpers():
+    assert queries.AccountRow._fields == accounts_row_dumper.fields
+    assert queries.TransactionRow._fields == transactions_row_dumper.fields
+
+
+def test_accounts_for_user_returns_rows(app, accounts):
+    a1, a2 = accounts
+    rows = queries.accounts_for_user(a1.user_id)
+    assert [r.id for r in rows] == [a1.id, a2.id]
+    assert isinstance(rows[0], queries.AccountRow)
+    assert rows[0].balance == Decimal("100.00")
+
+
+def test_transactions_for_user_is_scoped_to_owner(app, accounts):
+    a1, a2 = accounts
+    other = User(email = "other@example.com")
+    other.set_password("pw")
+    db.session.add(other)
+    db.session.commit()
+    foreign = create_account(other.id, "Theirs", "Checking", 10)
+
+    deposit(a1, "5.00")
+    transfer(a1, a2, "2.00")
+    deposit(foreign, "1.00")
+
+    rows = queries.transactions_for_user(a1.user_id)
+    assert {r.account_id for r in rows} == {a1.id, a2.id}
+    assert len(rows) == 3
+    assert queries.transactions_for_user(a1.user_id, kind = "transfer")[0].related_account_id == a2.id
+    assert queries.account_owner_id(foreign.id) == other.id
+    assert queries.account_owner_id(9999) is None
+
+
+def test_html_views_render_from_read_model(auth_client, accounts):
+    a1, _ = accounts
+    deposit(a1, "5.00", description = "Paycheck")
+
+    r = auth_client.get("/")
+    assert r.status_code == 200
+    assert b"Checking" in r.data
+
+    r = auth_client.get("/transactions")
+    assert r.status_code == 200
+    assert b"Paycheck" in r.data
+
+    for path in ("/deposit", "/withdraw", "/transfer"):
+        assert auth_client.get(path).status_code == 200
@@ -0,0 +1,94 @@
+# test_query_budgets.py
+"""Every route in routes.py / api.py runs under an asserted SQL budget.
+
+Budgets are sized against a ledger of a few dozen rows, so a per-row lazy
+load (e.g. a template touching ``tx.account``) blows both the count and
+the repeated-statement check.
+"""
+import pytest
+
+from app.dbstats import QueryBudgetExceeded
+from app.extensions import db
+from app.services import deposit, transfer, withdraw
+
+# (endpoint, method) -> (url, request kwargs, budget); build(a1, a2) fills in ids
+BUDGETS = {
+    ("main.ping", "GET"): lambda a1, a2: ("/ping", {}, 0),
+    ("main.stats", "GET"): lambda a1, a2: ("/_stats", {}, 0),
+    ("main.metrics_view", "GET"): lambda a1, a2: ("/metrics", {}, 0),
+    ("main.index", "GET"): lambda a1, a2: ("/", {}, 1),
+    ("main.transactions_list", "GET"): lambda a1, a2: ("/transactions", {}, 2),
+    ("main.new_account", "GET"): lambda a1, a2: ("/accounts/new", {}, 0),
+    ("main.new_account", "POST"): lambda a1, a2: (
+        "/accounts/new", {"data": {"name": "New", "type": "Checking", "opening": "5"}}, 2),
+    ("main.deposit_view", "GET"): lambda a1, a2: ("/deposit", {}, 1),
+    ("main.deposit_view", "POST"): lambda a1, a2: ("/deposit", {"data": {"account_id": a1, "amount": "1"}}, 5),
+    ("main.withdraw_view", "GET"): lambda a1, a2: ("/withdraw", {}, 1),
+    ("main.withdraw_view", "POST"): lambda a1, a2: ("/withdraw", {"data": {"account_id": a1, "amount": "1"}}, 5),
+    ("main.transfer_view", "GET"): lambda a1, a2: ("/transfer", {}, 1),
+    ("main.transfer_view", "POST"): lambda a1, a2: (
+        "/transfer", {"data": {"src": a1, "dst": a2, "amount": "1"}}, 7),
+    ("api.list_accounts", "GET"): lambda a1, a2: ("/api/accounts", {}, 1),
+    ("api.create_account_api", "POST"): lambda a1, a2: (
+        "/api/accounts", {"json": {"name": "N", "type": "Savings"}}, 3),
+    ("api.account_balance", "GET"): lambda a1, a2: (f"/api/accounts/{a1}/balance", {}, 3),
+    ("api.account_statement", "GET"): lambda a1, a2: (f"/api/accounts/{a1}/statement?month=2026-01", {}, 2),
+    ("api.list_transactions", "GET"): lambda a1, a2: ("/api/transactions?limit=100", {}, 1),
+    ("api.export_transactions", "GET"): lambda a1, a2: ("/api/transactions/export", {}, 1),
+    ("api.analytics_summary", "GET"): lambda a1, a2: ("/api/analytics/summary", {}, 3),
+    ("api.deposit_api", "POST"): lambda a1, a2: (
+        "/api/transactions/deposit", {"json": {"account_id": a1, "amount": "1"}}, 5),
+    ("api.withdraw_api", "POST"): lambda a1, a2: (
+        "/api/transactions/withdraw", {"json": {"account_id": a1, "amount": "1"}}, 5),
+    ("api.transfer_api", "POST"): lambda a1, a2: (
+        "/api/transactions/transfer", {"json": {"src": a1, "dst": a2, "amount": "1"}}, 8),
+    ("api.batch_api", "POST"): lambda a1, a2: (
+        "/api/transactions/batch",
+        {"json": {"operations": [{"account_id": a1, "kind": "deposit", "amount": "1"}] * 20}}, 4),
+}
+
+
+@pytest.fixture()
+def ledger(app, accounts):
+    a1, a2 = accounts
+    for _ in range(15):
+        deposit(a1, "3.00")
+        withdraw(a2, "1.00")
+        transfer(a1, a2, "0.50")
+    return a1, a2
+
+
+def test_every_route_has_a_budget(app):
+    routed = {
+        (r.endpoint, m)
+        for r in app.url_map.iter_rules() if r.endpoint.split(".")[0] in {"main", "api"}
+        for m in r.methods - {"HEAD", "OPTIONS"}
+    }
+    assert routed == set(BUDGETS)
+
+
+@pytest.mark.parametrize("route", sorted(BUDGETS), ids="{0[0]} {0[1]}".format)
+def test_route_query_budget(route, auth_client, ledger, query_budget):
+    a1, a2 = ledger
+    url, kwargs, budget = BUDGETS[route](a1.id, a2.id)
+
+    with query_budget(budget):
+        resp = auth_client.open(url, method=route[1], **kwargs)
+        resp.get_data()   # drain streamed responses inside the budget
+    assert resp.status_code < 400, resp.get_data(as_text=True)
+
+
+def test_request_over_budget_raises(app, auth_client, ledger):
+    app.config["SQL_QUERY_BUDGET"] = 1
+    with pytest.raises(QueryBudgetExceeded, match="budget 1"):
+        auth_client.get("/transactions")
+
+
+def test_repeated_statement_is_logged(app, auth_client, ledger, caplog):
+    payload = {"src": ledger[0].id, "dst": ledger[1].id, "amount": "1"}
+    app.config.update(SQL_BUDGET_ACTION="log", SQL_REPEAT_THRESHOLD=2)
+    db.session.expire_all()
+    # loading src and dst is the same SELECT twice
+    with caplog.at_level("WARNING"):
+        auth_client.post("/api/transactions/transfer", json=payload)
+    assert "2x repeated (possible N+1): SELECT account" in caplog.text
@@ -0,0 +1,90 @@
+# test_reconcile.py
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app import reconcile
+from app.extensions import db
+from app.models import Account, LedgerCheckpoint, Transaction, User
+from app.services import create_account, deposit, transfer, withdraw
+
+
+def _ledger(user):
+    a = create_account(user.id, "Checking", "Checking", "100.00")
+    b = create_account(user.id, "Savings", "Savings", "0")
+    deposit(a, "25.10")
+    withdraw(a, "5.05")
+    transfer(a, b, "40.00")
+    return a, b
+
+
+def test_consistent_ledger_has_no_drift(app, user):
+    _ledger(user)
+    report = reconcile.reconcile(chunk_size=1)
+    assert report.accounts == 2
+    assert report.rows == 4
+    assert report.drift == []
+    assert report.last_tx_id == db.session.execute(db.select(db.func.max(Transaction.id))).scalar()
+
+
+def test_drift_is_reported_after_recount(app, user):
+    a, b = _ledger(user)
+    db.session.execute(update(Account).where(Account.id == b.id).values(balance_cents=Account.balance_cents + 1))
+    db.session.commit()
+
+    report = reconcile.reconcile()
+    assert [c.account_id for c in report.drift] == [b.id]
+    check = report.drift[0]
+    assert check.drift_cents == 1
+    assert check.mirror_cents == 4000 and check.expected_cents == 4000
+
+
+def test_incremental_run_only_sums_new_rows(app, user):
+    a, b = _ledger(user)
+    assert reconcile.reconcile().rows == 4
+    assert reconcile.reconcile().rows == 0
+
+    deposit(b, "1.00")
+    report = reconcile.reconcile()
+    assert report.rows == 1 and report.drift == []
+    assert db.session.get(LedgerCheckpoint, b.id).ledger_cents == 4100
+
+    # a row slipped in behind the checkpoint: recount finds it, no false drift
+    db.session.add(Transaction(id=1_000, account_id=a.id, kind="deposit", amount=Decimal("2.00")))
+    db.session.execute(update(Account).where(Account.id == a.id).values(
+        balance=Account.balance + 2, balance_cents=Account.balance_cents + 200))
+    db.session.commit()
+    db.session.execute(update(LedgerCheckpoint).values(last_tx_id=2_000))
+    db.session.commit()
+    assert reconcile.reconcile().drift == []
+    assert reconcile.reconcile(full=True).rows == 6
+
+
+def test_process_pool_matches_serial(file_app):
+    u = User(email="pool@example.com")
+    u.set_password("password123")
+    db.session.add(u)
+    db.session.commit()
+    accounts = [create_account(u.id, f"A{i}", "Checking", "10.00") for i in range(6)]
+    for acct in accounts:
+        deposit(acct, "1.25")
+    db.session.execute(update(Account).where(Account.id == accounts[3].id).values(balance_cents=0))
+    db.session.commit()
+
+    pooled = reconcile.reconcile(chunk_size=2, workers=2, full=True)
+    serial = reconcile.reconcile(chunk_size=2, full=True)
+    assert pooled == serial
+    assert [c.account_id for c in pooled.drift] == [accounts[3].id]
+
+
+def test_cli_exit_code(app, user, runner):
+    a, _ = _ledger(user)
+    result = runner.invoke(args=["ledger", "reconcile"])
+    assert result.exit_code == 0, result.output
+    assert "Checked 2 accounts, summed 4 ledger rows" in result.output
+
+    db.session.execute(update(Account).where(Account.id == a.id).values(balance=Account.balance - 1))
+    db.session.commit()
+    result = runner.invoke(args=["ledger", "reconcile"])
+    assert result.exit_code == 1
+    assert f"account {a.id}: balance 80.05, expected 80.05 (drift 0.00), balance column 79.05 != cents column" in result.output
@@ -0,0 +1,111 @@
+# test_replicas.py
+"""Read-replica routing, with a second SQLite file standing in for the replica.
+
+The replica is a copy of the primary taken after setup; later writes only
+reach the primary, which is exactly what replication lag looks like.
+"""
+import shutil
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Account, User
+from app.services import create_account, deposit
+
+
+@pytest.fixture()
+def replica_app(tmp_path):
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+
+    class ReplicaConfig(Config):
+        TESTING = True
+        SECRET_KEY = "test"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {"replica_0": f"sqlite:///{replica}"}
+        SQLALCHEMY_REPLICA_BINDS = ["replica_0"]
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        u = User(email = "r@example.com")
+        u.set_password("pw")
+        db.session.add(u)
+        db.session.commit()
+        acct_id = create_account(u.id, "Main", "Checking", 100).id
+        db.session.remove()
+        shutil.copy(primary, replica)
+
+        deposit(db.session.get(Account, acct_id), "50.00")   # not replicated yet
+        db.session.remove()
+        yield app, acct_id
+        db.session.remove()
+    db.metadatas.pop("replica_0")   # db is shared by every app in the test run
+
+
+@pytest.fixture()
+def replica_client(replica_app):
+    app, acct_id = replica_app
+    client = app.test_client()
+    client.post("/auth/login", data = {"email": "r@example.com", "password": "pw"})
+    return client, acct_id
+
+
+def _replica_balance(acct_id):
+    with db.engines["replica_0"].connect() as conn:
+        return conn.execute(select(Account.balance).where(Account.id == acct_id)).scalar_one()
+
+
+def test_get_reads_replica_and_writes_go_to_primary(replica_client):
+    client, acct_id = replica_client
+    assert client.get("/api/accounts").get_json()[0]["balance"] == "100.00"
+
+    r = client.post("/api/transactions/deposit", json = {"account_id": acct_id, "amount": "1.00"})
+    assert r.status_code == 201
+    assert _replica_balance(acct_id) == Decimal("100.00")
+    assert db.session.get(Account, acct_id).balance == Decimal("151.00")
+
+
+def test_client_sticks_to_primary_after_writing(replica_app, replica_client):
+    app, _ = replica_app
+    client, acct_id = replica_client
+    other = app.test_client()   # same user, no sticky cookie
+    other.post("/auth/login", data = {"email": "r@example.com", "password": "pw"})
+
+    client.post("/api/transactions/deposit", json = {"account_id": acct_id, "amount": "1.00"})
+    assert other.get("/api/accounts").get_json()[0]["balance"] == "100.00"
+    assert client.get("/api/accounts").get_json()[0]["balance"] == "151.00"
+
+    app.config["REPLICA_STICKY_SECONDS"] = 0
+    client.post("/api/transactions/deposit", json = {"account_id": acct_id, "amount": "1.00"})
+    assert client.get("/api/accounts").get_json()[0]["balance"] == "100.00"
+
+
+def test_locking_reads_and_writes_in_a_get_move_to_primary(replica_app):
+    app, acct_id = replica_app
+    balance = select(Account.balance).where(Account.id == acct_id)
+    with app.test_request_context("/", method = "GET"):
+        app.preprocess_request()
+        assert db.session.execute(balance).scalar_one() == Decimal("100.00")
+        assert db.session.execute(balance.with_for_update()).scalar_one() == Decimal("150.00")
+        assert db.session.execute(balance).scalar_one() == Decimal("150.00")   # pinned now
+        db.session.rollback()
+
+
+def test_only_primary_reads_are_cached(replica_app, replica_client):
+    app, acct_id = replica_app
+    client, _ = replica_client
+    cache = app.extensions["account_cache"]
+    user_id = db.session.get(Account, acct_id).user_id
+
+    client.get("/api/accounts")   # replica
+    assert cache.get(user_id) is None
+
+    client.post("/api/transactions/deposit", json = {"account_id": acct_id, "amount": "1.00"})
+    client.get("/api/accounts")   # sticky: primary
+    assert cache.get(user_id)[0].balance == Decimal("151.00")
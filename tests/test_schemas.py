@@ -0,0 +1,49 @@
+# test_schemas.py
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.schemas import (
+    accounts_schema,
+    accounts_row_dumper,
+    transactions_schema,
+    transactions_row_dumper,
+)
+
+
+def _tx_rows(n):
+    amounts = (Decimal("1.00"), Decimal("12.345"), Decimal("0.005"), "7.1", 3, Decimal("9999999999.99"))
+    return [
+        (
+            i,
+            i % 7 + 1,
+            ("deposit", "withdraw", "transfer")[i % 3],
+            amounts[i % len(amounts)],
+            None if i % 4 == 0 else f"tx {i}",
+            None if i % 2 else i + 1,
+            datetime(2025, 1, 1, 12, 30, i % 60, (i * 37) % 1_000_000),
+        )
+        for i in range(n)
+    ]
+
+
+def _as_objects(rows, dumper):
+    return [SimpleNamespace(**dict(zip(dumper.fields, r))) for r in rows]
+
+
+def test_transactions_row_dumper_matches_marshmallow():
+    rows = _tx_rows(500)
+    expected = transactions_schema.dump(_as_objects(rows, transactions_row_dumper))
+    actual = transactions_row_dumper.dump(rows)
+    assert json.dumps(actual) == json.dumps(expected)
+
+
+def test_accounts_row_dumper_matches_marshmallow():
+    rows = [
+        (1, 1, "Main", "Checking", Decimal("25.5"), datetime(2025, 3, 1)),
+        (2, 1, "Rainy day", "Savings", Decimal("0"), datetime(2025, 3, 2, 8, 0, 0, 1)),
+    ]
+    expected = accounts_schema.dump(_as_objects(rows, accounts_row_dumper))
+    assert json.dumps(accounts_row_dumper.dump(rows)) == json.dumps(expected)
+
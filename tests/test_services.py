@@ -0,0 +1,310 @@
+# test_services.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from werkzeug.exceptions import HTTPException
+
+from app import services
+from app.extensions import db
+from app.models import User, Account, Transaction
+from app.services import create_account, deposit, transfer, transfer_stats, withdraw
+
+
+def test_deposit_and_withdraw_update_instance_in_place(app, accounts):
+    a1, _ = accounts
+    deposit(a1, "12.50")
+    assert a1.balance == Decimal("112.50")
+    withdraw(a1, "2.50")
+    assert a1.balance == Decimal("110.00")
+
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("110.00")
+
+
+def test_withdraw_refuses_overdraft(app, accounts):
+    _, a2 = accounts
+    with pytest.raises(HTTPException) as exc:
+        withdraw(a2, "50.01")
+    assert exc.value.code == 400
+    db.session.rollback()
+
+    assert db.session.get(Account, a2.id).balance == Decimal("50.00")
+    assert Transaction.query.count() == 0
+
+
+def _run_parallel(app, n, fn):
+    """Run fn(i) on n threads released together; each gets its own app context/session."""
+    barrier = threading.Barrier(n)
+
+    def worker(i):
+        with app.app_context():
+            try:
+                barrier.wait()
+                return fn(i)
+            finally:
+                db.session.remove()
+
+    with ThreadPoolExecutor(max_workers = n) as pool:
+        return list(pool.map(worker, range(n)))
+
+
+def test_parallel_withdraws_never_overdraw(file_app):
+    u = User(email = "stress@example.com")
+    u.set_password("pw")
+    db.session.add(u)
+    db.session.commit()
+    acct_id = create_account(u.id, "Hot", "Checking", 100).id
+    db.session.remove()
+
+    def attempt(_):
+        account = db.session.get(Account, acct_id)
+        db.session.expunge(account)
+        db.session.rollback()   # no read transaction held across the write
+        try:
+            withdraw(account, "10.00")
+            return True
+        except HTTPException:
+            db.session.rollback()
+            return False
+
+    outcomes = _run_parallel(file_app, 40, attempt)
+
+    assert outcomes.count(True) == 10
+    assert db.session.get(Account, acct_id).balance == Decimal("0.00")
+    assert Transaction.query.filter_by(account_id = acct_id, kind = "withdraw").count() == 10
+
+
+class _Deadlock(Exception):
+    sqlstate = "40P01"
+
+
+def test_transfer_retries_deadlocks_then_succeeds(app, accounts, monkeypatch):
+    a1, a2 = accounts
+    real_once = services._transfer_once
+    calls = []
+
+    def flaky(*args):
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError("UPDATE account ...", {}, _Deadlock("deadlock detected"))
+        return real_once(*args)
+
+    monkeypatch.setattr(services, "_transfer_once", flaky)
+    monkeypatch.setattr(services, "TRANSFER_BACKOFF_BASE", 0)
+    transfer_stats.reset()
+
+    t = transfer(a1, a2, "5.00")
+    assert t.kind == "transfer"
+    assert len(calls) == 3
+    assert transfer_stats.snapshot()["retries"] == 2
+    assert db.session.get(Account, a2.id).balance == Decimal("55.00")
+
+
+def test_transfer_gives_up_after_max_attempts(app, accounts, monkeypatch):
+    a1, a2 = accounts
+
+    def always(*args):
+        raise OperationalError("UPDATE account ...", {}, _Deadlock("deadlock detected"))
+
+    monkeypatch.setattr(services, "_transfer_once", always)
+    monkeypatch.setattr(services, "TRANSFER_BACKOFF_BASE", 0)
+    transfer_stats.reset()
+
+    with pytest.raises(HTTPException) as exc:
+        transfer(a1, a2, "5.00")
+    assert exc.value.code == 503
+    assert transfer_stats.snapshot()["retries"] == services.TRANSFER_MAX_ATTEMPTS - 1
+    assert transfer_stats.snapshot()["failures"] == 1
+
+
+def test_opposite_direction_transfers_under_load(file_app):
+    """Stress harness: both directions over one pair, from many threads."""
+    u = User(email = "pair@example.com")
+    u.set_password("pw")
+    db.session.add(u)
+    db.session.commit()
+    a_id = create_account(u.id, "A", "Checking", 1000).id
+    b_id = create_account(u.id, "B", "Savings", 1000).id
+    db.session.remove()
+    transfer_stats.reset()
+
+    threads, per_thread = 16, 10
+
+    def hammer(i):
+        src_id, dst_id = (a_id, b_id) if i % 2 else (b_id, a_id)
+        for _ in range(per_thread):
+            transfer(db.session.get(Account, src_id), db.session.get(Account, dst_id), "1.00")
+        return per_thread
+
+    done = sum(_run_parallel(file_app, threads, hammer))
+
+    assert done == threads * per_thread
+    a = db.session.get(Account, a_id)
+    b = db.session.get(Account, b_id)
+    assert a.balance == Decimal("1000.00") and b.balance == Decimal("1000.00")
+    assert Transaction.query.filter_by(kind = "transfer").count() == done
+    assert transfer_stats.snapshot()["failures"] == 0
+
+
+def test_group_commit_shares_commits_and_keeps_errors_per_caller(file_app):
+    from sqlalchemy import event
+
+    file_app.config.update(LEDGER_GROUP_COMMIT = True, GROUP_COMMIT_WAIT_MS = 20)
+    u = User(email = "group@example.com")
+    u.set_password("pw")
+    db.session.add(u)
+    db.session.commit()
+    a_id = create_account(u.id, "A", "Checking", 0).id
+    b_id = create_account(u.id, "B", "Savings", 100).id
+    db.session.remove()
+
+    commits = []   # the committer's; callers only end their read transactions
+    event.listen(db.engine, "commit", lambda conn: commits.append(threading.current_thread().name))
+
+    def move(i):
+        try:
+            if i % 4 == 0:
+                return withdraw(db.session.get(Account, b_id), "60.00").id
+            return deposit(db.session.get(Account, a_id), "1.00").id
+        except HTTPException as e:
+            return e.code
+
+    outcomes = _run_parallel(file_app, 24, move)
+
+    tx_ids = [o for o in outcomes if o != 400]
+    assert outcomes.count(400) == 5                  # only one 60.00 withdrawal fits in 100.00
+    assert len(set(tx_ids)) == 19
+    assert 0 < commits.count("group-commit") < 19
+    assert db.session.get(Account, a_id).balance == Decimal("18.00")
+    assert db.session.get(Account, b_id).balance == Decimal("40.00")
+    assert Transaction.query.count() == 19
+
+
+def test_group_commit_reruns_a_broken_batch_one_by_one(app, accounts):
+    from concurrent.futures import Future
+
+    from app import journal
+    from app.money import Money
+
+    a1, _ = accounts
+
+    def boom():
+        db.session.add(Transaction(account_id = a1.id, kind = "deposit", amount = Decimal("1.00")))
+        raise RuntimeError("broken op")
+
+    ops = [
+        journal._Op(services._deposit, (a1, Money.parse("5.00"), "kept"), Future()),
+        journal._Op(boom, (), Future()),
+    ]
+    (t, ok), (none, err) = journal._run_batch(ops)
+
+    assert ok is None and t.description == "kept"
+    assert none is None and isinstance(err, RuntimeError)
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("105.00")
+    assert [r.description for r in Transaction.query] == ["kept"]
+
+
+def test_group_commit_fails_the_batch_when_commit_raises(app, accounts, monkeypatch):
+    from concurrent.futures import Future
+
+    from app import journal
+    from app.money import Money
+
+    a1, _ = accounts
+    session = db.session()
+    commit = session.commit
+
+    def lost_reply():   # the COMMIT went through, the connection didn't
+        commit()
+        raise OperationalError("COMMIT", {}, Exception("server closed the connection"))
+
+    monkeypatch.setattr(session, "commit", lost_reply)
+    ops = [
+        journal._Op(services._deposit, (a1, Money.parse("5.00"), "one"), Future()),
+        journal._Op(services._deposit, (a1, Money.parse("2.00"), "two"), Future()),
+    ]
+    outcomes = journal._run_batch(ops)
+    monkeypatch.undo()
+
+    assert all(result is None and isinstance(err, OperationalError) for result, err in outcomes)
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("107.00")     # applied once, not rerun
+    assert sorted(r.description for r in Transaction.query) == ["one", "two"]
+
+
+def test_group_commit_survives_committer_errors(app, accounts, monkeypatch):
+    import queue
+
+    from app import journal
+
+    app.config["LEDGER_GROUP_COMMIT"] = True
+    a1, _ = accounts
+
+    class FlakyHistogram:
+        calls = 0
+
+        def observe(self, size):
+            FlakyHistogram.calls += 1
+            if FlakyHistogram.calls == 1:
+                raise RuntimeError("metrics down")
+
+    monkeypatch.setattr(journal, "GROUP_COMMIT_BATCH", FlakyHistogram())
+    assert deposit(a1, "1.00").amount == Decimal("1.00")     # answered before the metric blew up
+    assert deposit(a1, "2.00").amount == Decimal("2.00")     # and the thread kept going
+
+    # a dead committer is replaced on the next submit
+    dead = threading.Thread(target = lambda: None)
+    dead.start()
+    dead.join()
+    app.extensions["group_commit"].update(queue = queue.Queue(), thread = dead)
+    assert deposit(a1, "3.00").amount == Decimal("3.00")
+    assert app.extensions["group_commit"]["thread"].is_alive()
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("106.00")
+
+
+def test_group_commit_times_out_with_503_without_running_the_op(app, accounts):
+    from app import journal
+    from app.money import Money
+
+    app.config.update(LEDGER_GROUP_COMMIT = True, GROUP_COMMIT_TIMEOUT = 0.5)
+    a1, _ = accounts
+    running, release, results = threading.Event(), threading.Event(), []
+
+    def stuck():
+        running.set()
+        release.wait(5)
+        return "late"
+
+    def first_caller():
+        with app.app_context():
+            results.append(journal.journal.submit(stuck))
+
+    blocker = threading.Thread(target = first_caller)
+    blocker.start()
+    assert running.wait(5)
+    with pytest.raises(HTTPException) as exc:
+        journal.journal.submit(services._deposit, a1, Money.parse("5.00"), "never")
+    assert exc.value.code == 503
+    release.set()
+    blocker.join(5)
+
+    assert results == ["late"]
+    assert deposit(a1, "1.00").description == "Deposit"     # the cancelled op was skipped
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("101.00")
+    assert [t.description for t in Transaction.query] == ["Deposit"]
+
+
+def test_group_commit_api_deposit(auth_client, app, accounts):
+    app.config["LEDGER_GROUP_COMMIT"] = True
+    a1, _ = accounts
+    r = auth_client.post("/api/transactions/deposit", json = {"account_id": a1.id, "amount": "2.00"})
+    assert r.status_code == 201
+    assert r.get_json()["amount"] == "2.00" and r.get_json()["id"]
+    db.session.expire_all()
+    assert db.session.get(Account, a1.id).balance == Decimal("102.00")
@@ -0,0 +1,96 @@
+# test_snapshots.py
+from datetime import datetime
+from decimal import Decimal
+
+from app import snapshots
+from app.extensions import db
+from app.models import Account, BalanceSnapshot, Transaction
+from app.services import deposit, transfer, withdraw
+
+
+def _snapshot(account_id):
+    return db.session.execute(
+        db.select(BalanceSnapshot.balance)
+        .where(BalanceSnapshot.account_id == account_id)
+        .order_by(BalanceSnapshot.day.desc())
+    ).scalars().first()
+
+
+def _backdated_account(user):
+    """Account opened 2025-01-01 with 20.00 and a ledger spread over January."""
+    acct = Account(user_id = user.id, name = "Old", type = "Checking", balance = Decimal("20.00"),
+                   created_at = datetime(2025, 1, 1, 9, 0))
+    db.session.add(acct)
+    db.session.flush()
+    ledger = [
+        ("deposit", "10.00", datetime(2025, 1, 1, 10, 0)),
+        ("withdraw", "5.00", datetime(2025, 1, 3, 8, 0)),
+        ("deposit", "7.50", datetime(2025, 1, 3, 18, 0)),
+        ("transfer", "2.50", datetime(2025, 1, 31, 23, 0)),
+        ("deposit", "100.00", datetime(2025, 2, 2, 12, 0)),
+    ]
+    for kind, amount, when in ledger:
+        db.session.add(Transaction(account_id = acct.id, kind = kind, amount = Decimal(amount), created_at = when))
+        acct.balance += Decimal(amount) if kind == "deposit" else -Decimal(amount)
+    db.session.commit()
+    return acct
+
+
+def _brute_force(acct, as_of):
+    if as_of <= acct.created_at:
+        return Decimal("0.00")
+    rows = Transaction.query.filter_by(account_id = acct.id).all()
+
+    def signed(t):
+        return t.amount if t.kind == "deposit" else -t.amount
+
+    opening = acct.balance - sum(signed(t) for t in rows)
+    return opening + sum((signed(t) for t in rows if t.created_at < as_of), Decimal("0.00"))
+
+
+def test_services_keep_todays_snapshot_current(app, accounts):
+    a1, a2 = accounts
+    assert _snapshot(a1.id) == Decimal("100.00")
+
+    deposit(a1, "5.00")
+    withdraw(a1, "1.00")
+    transfer(a1, a2, "4.00")
+    assert _snapshot(a1.id) == Decimal("100.00")
+    assert _snapshot(a2.id) == Decimal("54.00")
+    assert BalanceSnapshot.query.count() == 2     # one row per account per day
+
+
+def test_rebuild_and_balance_as_of_match_full_scan(app, user):
+    acct = _backdated_account(user)
+    assert snapshots.rebuild(chunk_size = 1) == 4    # Jan 1, Jan 3, Jan 31, Feb 2
+
+    probes = [
+        datetime(2024, 12, 31),
+        datetime(2025, 1, 1, 9, 30),
+        datetime(2025, 1, 1, 12, 0),
+        datetime(2025, 1, 3, 12, 0),
+        datetime(2025, 1, 15),
+        datetime(2025, 2, 1),
+        datetime(2025, 2, 2, 12, 0),
+        datetime(2025, 3, 1),
+    ]
+    for as_of in probes:
+        assert snapshots.balance_as_of(acct, as_of) == _brute_force(acct, as_of), as_of
+
+
+def test_statement_and_balance_endpoints(auth_client, user, runner):
+    acct = _backdated_account(user)
+    result = runner.invoke(args = ["snapshots", "rebuild"])
+    assert "Wrote 4" in result.output
+
+    r = auth_client.get(f"/api/accounts/{acct.id}/statement", query_string = {"month": "2025-01"})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["opening_balance"] == "0.00"
+    assert body["closing_balance"] == "30.00"
+    assert [d["day"] for d in body["daily"]] == ["2025-01-01", "2025-01-03", "2025-01-31"]
+
+    r = auth_client.get(f"/api/accounts/{acct.id}/balance", query_string = {"as_of": "2025-01-03T12:00:00Z"})
+    assert r.get_json()["balance"] == "25.00"
+
+    assert auth_client.get(f"/api/accounts/{acct.id}/statement", query_string = {"month": "2025-13"}).status_code == 400
@@ -0,0 +1,55 @@
+# test_startup.py
+import subprocess
+import sys
+from pathlib import Path
+
+from app.extensions import db
+
+
+def test_create_app_defers_alembic_schemas_and_numpy(tmp_path):
+    code = (
+        "import sys\n"
+        "from app import create_app\n"
+        "app = create_app()\n"
+        "print(' '.join(n for n in ('alembic', 'flask_migrate', 'numpy') if n in sys.modules))\n"
+        "import app.schemas as schemas\n"
+        "print(schemas.account_schema.__class__.__name__)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parents[1], capture_output=True, text=True, check=True,
+        env={"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'x.db'}", "PATH": ""},
+    )
+    deferred, schema = out.stdout.splitlines()
+    assert deferred == ""
+    assert schema == "AccountSchema"
+
+
+def test_db_cli_loads_flask_migrate_on_demand(app, runner):
+    assert "migrate" not in app.extensions
+    result = runner.invoke(args=["db", "heads"])
+    assert result.exit_code == 0, result.output
+    assert "(head)" in result.output
+    assert app.extensions["migrate"].db is db
+
+
+def test_api_works_after_lazy_schema_import(auth_client, accounts):
+    r = auth_client.get("/api/analytics/summary")
+    assert r.status_code == 200 and "totals" in r.get_json()
+
+
+def test_first_api_request_finishes_lazy_imports(tmp_path):
+    code = (
+        "import sys\n"
+        "from app import create_app, lazy\n"
+        "app = create_app()\n"
+        "print(len(lazy._pending), 'numpy' in sys.modules)\n"
+        "app.test_client().get('/api/accounts')\n"
+        "print(len(lazy._pending), 'numpy' in sys.modules)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parents[1], capture_output=True, text=True, check=True,
+        env={"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'x.db'}", "PATH": ""},
+    )
+    assert out.stdout.splitlines() == ["2 False", "0 True"]